@@ -0,0 +1,26 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Hash Quality Analysis
+
+# Checks the claims of the hashing module with millions of random inputs:
+#       - hash_addition ignores the order of the characters and only uses a few of its 32 bits
+#       - the allbits variants spread their hashes evenly,
+#         but a flipped input bit never changes the output bits below it
+#       - hash_toycrypt has an avalanche effect, but some of its bits are biased
+
+import string
+
+from toycrypt.analysis import analyze
+from toycrypt.hashing import *
+
+SAMPLES = 2_000_000
+LENGTH = 8
+
+if __name__ == "__main__":
+    print("-- Hash Quality Analysis --\n")
+    for hash_function in (hash_addition, hash_allbits16, hash_allbits32, hash_toycrypt):
+        print(analyze(hash_function, samples=SAMPLES, length=LENGTH), "\n")
+
+    print("-- Avalanche matrix of hash_toycrypt for lowercase inputs (5 is ideal) --")
+    report = analyze(hash_toycrypt, samples=SAMPLES, length=4, alphabet=string.ascii_lowercase)
+    print(report.format_avalanche())
@@ -18,7 +18,11 @@
 # Wanted:
 #   - Any input string that hashes to the same value as the original password
 
+from toycrypt import hashing
 from toycrypt.hashing import *
+from toycrypt.bruteforce import brute_force as brute_force_engine, mask_attack
+from toycrypt.keyspace import Mask
+from toycrypt.telemetry import ProgressReporter, instrumented, format_counters
 from itertools import product
 
 
@@ -46,6 +50,9 @@ def brute_force(hash_function, password: str, max_iterations: int = 10_000_000):
     ]
 
     print("\n\tStarting attempts...")
+    # Prints the speed and the remaining time every 5 seconds (pass path= to also write them to a JSON-lines file)
+    progress = ProgressReporter(hash_function.__name__, print, interval=5.0)
+    progress.start(sum(len(chars) ** length for length in range(1, 10 + 1)))
     iterations = 0
     for length in range(1, 10 + 1):  # Try up to a length of 10
         # Try all possible combinations - like you would try on a 4 digit bike lock
@@ -65,8 +72,8 @@ def brute_force(hash_function, password: str, max_iterations: int = 10_000_000):
                 return
 
             iterations += 1
-            if iterations % 1_000_000 == 0:
-                print(f"    Completed {iterations} tries!")
+            if iterations % 10_000 == 0:
+                progress.update(iterations)
             if iterations == max_iterations:
                 print(f"    Could not find a preimage after {iterations} tries!")
                 return
@@ -92,3 +99,35 @@ measure(brute_force, password="1234", hash_function=hash_toycrypt)
 # The only two uncracked hash function (can take up to 30 seconds)
 measure(brute_force, password="12345", hash_function=hash_allbits32)
 measure(brute_force, password="12345", hash_function=hash_toycrypt)
+
+# The library engine in toycrypt.bruteforce tries the candidates in the same order, but reuses the hash values
+# of the shared prefix between candidates - so each candidate costs only a single hash step
+chars = "abcdefghijklmnopqrstuvwxyz0123456789"
+print(measure(brute_force_engine, hash_toycrypt, hash_toycrypt("12345"), chars))
+
+# The engine can report its progress as well
+print(brute_force_engine(hash_toycrypt, hash_toycrypt("zz9zz"), chars, max_length=5,
+                         progress=ProgressReporter("engine", print, interval=5.0)))
+
+# The instrumentation counts the calls and the time spent in the library functions
+# Here almost all the time of the naive attack is spent hashing each candidate from the start
+# Only the functions looked up in their module are counted - hash_toycrypt imported above is still the original
+with instrumented():
+    brute_force(password="zz9", hash_function=hashing.hash_toycrypt)
+print(format_counters())
+
+# Instead of a list of chars and a range of lengths the keyspace can be described with a mask (see toycrypt.keyspace)
+# ?1 is the first custom charset (lowercase letters and digits) - this is the same keyspace as above up to length 5
+mask = Mask("?1?1?1?1?1", ["?l?d"], min_length=1)
+print(f"Mask {mask} contains {mask.get_size():,} candidates, 'zz9zz' is number {mask.index_of('zz9zz'):,}")
+
+# Masks also describe patterns: a capital letter, two lowercase letters and two digits
+mask = Mask("?u?l?l?d?d")
+print(f"Mask {mask} contains {mask.get_size():,} candidates, number 1,000,000 is '{mask[1_000_000]}'")
+
+# Any candidate can be reached directly by its index - so the search can be split between machines
+# Every machine only needs the mask, the number of machines and its own number to know its range
+target = hash_toycrypt("Pas12")
+for machine, (start, end) in enumerate(mask.split(4)):
+    result = mask_attack(hash_toycrypt, target, mask, start, end)
+    print(f"    Machine {machine} searches [{start:,}, {end:,}): {result}")
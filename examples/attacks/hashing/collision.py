@@ -17,6 +17,7 @@
 #   - Any two different input strings that hash to the same value
 
 from toycrypt.hashing import *
+from toycrypt.collision import find_collision
 
 
 # Start a collision attack with the given hash function and a input length (the length of our malicious payload)
@@ -48,3 +49,9 @@ measure(collision_attack, hash_function=hash_allbits32, input_length=4)
 
 # This is the only function who does not suffer from the glaring addition weakness - but another collision is found rather quickly
 measure(collision_attack, hash_function=hash_toycrypt, input_length=4)
+
+# The dictionary above grows with every try - for 32-bit hashes that are gigabytes before a collision is found
+# toycrypt.collision walks from input to input (hash, then map the hash back to an input) until the walk repeats
+# The point where it repeats is reached from two different inputs - a collision using only constant memory
+chars = "abcdefghijklmnopqrstuvwxyz0123456789"
+print(measure(find_collision, hash_toycrypt, chars, 7))
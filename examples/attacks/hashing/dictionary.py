@@ -0,0 +1,66 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Dictionary Attack
+
+# Topics: Hashing, Passwords
+
+# A database leak contains the password hashes of many users at once
+# Instead of trying every possible string, the attacker tries common words and the ways people change them
+# (capital letters, digits at the end, leetspeak). Every candidate is hashed once and checked against all hashes
+# of the leak - so cracking ten thousand users costs about the same as cracking one
+
+# Known:
+#   - The password hashes of many users (e.g. stolen from a database)
+#   - The hash function used
+#   - A wordlist of common passwords
+# Hidden:
+#   - The original password strings
+# Wanted:
+#   - As many passwords (or preimages) as possible
+
+import os
+import random
+import string
+import tempfile
+import time
+
+import numpy as np
+
+from toycrypt.dictionary import TargetSet, dictionary_attack, read_words
+from toycrypt.hashing import *
+from toycrypt.telemetry import ProgressReporter
+
+WORDS = 5_000
+
+if __name__ == "__main__":
+    # Real attacks use wordlists of leaked passwords - here we make up random words
+    random.seed(0)
+    words = [''.join(random.choices(string.ascii_lowercase, k=random.randint(4, 9))) for _ in range(WORDS)]
+    path = os.path.join(tempfile.mkdtemp(), "wordlist.txt")
+    with open(path, "w") as file:
+        file.write("\n".join(words))
+
+    # The users changed words of the list in typical ways, some chose a random password
+    passwords = [words[10].capitalize() + "1", words[200].upper() + "42", words[3000].translate(
+        str.maketrans("aeiost", "431057")), words[4000], "x7#Qp!2z"]
+    leak = [hash_toycrypt(password) for password in passwords]
+
+    print("-- Dictionary Attack --")
+    print(f"    Wordlist       : {WORDS} words")
+    print(f"    Leaked hashes  : {len(leak)}")
+    result = dictionary_attack(hash_toycrypt, leak, read_words(path),
+                               progress=ProgressReporter("dictionary", print, interval=5.0))
+    print(f"    {result}")
+    for password, password_hash in zip(passwords, leak):
+        print(f"    {password:<12} -> {result.get_preimage(password_hash)}")
+
+    # The speed does not depend on the number of hashes in the leak
+    print("\n-- Speed with growing leaks --")
+    for size in (10, 10_000, 1_000_000):
+        targets = TargetSet(np.random.default_rng(size).integers(0, 1 << 32, size, dtype=np.uint64))
+        start = time.perf_counter()
+        result = dictionary_attack(hash_toycrypt, targets, read_words(path), stop_when_complete=False)
+        seconds = time.perf_counter() - start
+        print(f"    {size:>9,} hashes: {result.get_attempts() / seconds:>12,.0f} candidates/s"
+              f"   ({len(result.get_found())} random hashes hit by chance)")
+    os.remove(path)
@@ -1,2 +1,57 @@
 #  SPDX-License-Identifier: GPL-3.0-only
 
+# Rainbow Table Attack
+# Topics: Hashing, Passwords, Time-memory trade-off
+
+# A rainbow table attack finds preimages of password hashes using a table that was precomputed once
+# A brute force attack has to try all inputs again for every single hash it wants to crack
+# A rainbow table does this work only once and can then answer many lookups very quickly
+# It stores only the start and end of long hash/reduce chains instead of every (input, hash) pair
+# Note: This is why passwords are "salted" - a random value added to each password makes precomputation useless
+
+# Known:
+#   - The password hashes (e.g. stolen from a database)
+#   - The hash function used
+# Hidden:
+#   - The original password strings
+# Wanted:
+#   - Any input string that hashes to the same value as each password
+
+import os
+import random
+import tempfile
+import time
+
+from toycrypt.hashing import *
+from toycrypt.rainbowtable import generate_table
+
+
+def rainbow_table_attack(hash_function, passwords: [str], chars: str, length: int):
+    print("-- Rainbow Table Attack --")
+    print(f"    Using hash     : {hash_function.__name__}")
+    path = os.path.join(tempfile.gettempdir(), f"toycrypt_{hash_function.__name__}.rt")
+
+    # The precomputation is the expensive part - but it only happens once
+    start = time.perf_counter()
+    table = generate_table(path, hash_function, chars, length, chains=200_000, chain_length=400)
+    print(f"    Generated {len(table)} chains in {time.perf_counter() - start:.2f}s")
+
+    # Now every stolen hash can be looked up in milliseconds
+    start = time.perf_counter()
+    preimages = table.lookup_many([hash_function(password) for password in passwords])
+    elapsed = time.perf_counter() - start
+    found = sum(preimage is not None for preimage in preimages)
+    print(f"    Cracked {found} of {len(passwords)} hashes in {elapsed:.2f}s ({elapsed / len(passwords) * 1000:.2f}ms each)")
+    for password, preimage in list(zip(passwords, preimages))[:5]:
+        print(f"    {password} -> {preimage}")
+
+
+# The table can only contain inputs from its keyspace: here all 5 character strings of lowercase letters and digits
+# Note: The table is generated with multiple processes, which requires the main guard on some platforms
+if __name__ == "__main__":
+    chars = "abcdefghijklmnopqrstuvwxyz0123456789"
+    random.seed(42)
+    stolen_passwords = [''.join(random.choices(chars, k=5)) for _ in range(1000)]
+
+    # Not every password is found - the table covers only part of the keyspace (more or longer chains cover more)
+    measure(rainbow_table_attack, hash_toycrypt, stolen_passwords, chars, 5)
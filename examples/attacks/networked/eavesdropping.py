@@ -7,7 +7,10 @@
 # (Wikipedia)
 
 from toycrypt.crypto import diffie_hellman_private, diffie_hellman_exchange
+from toycrypt.diffie_hellman import generate_group
+from toycrypt.discrete_log import discrete_log
 from toycrypt.simulation import Connection, Device
+from toycrypt.util import measure
 
 # Note: the internet is always a public connection as you cant rely on anything
 internet = Connection()
@@ -19,7 +22,6 @@ internet.add_listener(eve)
 # Alice and Bob now want to send messages to each other
 alice = Device("Alice")
 bob = Device("Bob")
-internet = Connection()  # Note: the internet is always a public connection as you cant rely on anything
 
 # Both connect to the internet
 alice.connect(internet)
@@ -52,3 +54,15 @@ bob_secret = diffie_hellman_exchange(p, g, 3, alice)
 
 print(alice_secret)
 print(bob_secret)
+
+# Eve saw p, g and both public keys - to get a secret she has to solve g^secret = public mod p for the secret
+# This is the discrete logarithm problem. In such a small group it takes no time at all
+eve_secret = discrete_log(g, alice.get_number(), p)
+print(f"Eve recovered Alice's secret: {eve_secret}")
+print(f"Eve computed the shared secret: {diffie_hellman_exchange(p, g, eve_secret, bob)}")
+
+# The time needed grows with the size of the group - real groups use 2048 bits and more (see examples/benchmarks)
+group = generate_group(40)
+alice_secret_number = 123456789
+alice_public = diffie_hellman_private(group.get_p(), group.get_g(), alice_secret_number)
+print(measure(discrete_log, group.get_g(), alice_public.get_number(), group.get_p()))
@@ -0,0 +1,69 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Base Conversion Benchmark
+
+# Converts random numbers with up to 1 million digits to strings and back with the functions of util
+#       - hex: bit slicing (power-of-two base) - linear time
+#       - decimal: divide and conquer with cached powers of 10
+#       - digit by digit: the old conversion (one division or multiplication per digit), only for small sizes
+# Python's builtin hex()/int() are shown as reference
+# Also converts arrays of 64-bit numbers to and from hex strings at once
+
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from toycrypt import toymath
+from toycrypt.util import (geometric_progression, geometric_progression_rev, decimal2hex_many, hex2decimal_many)
+
+sys.set_int_max_str_digits(0)  # Python limits int <-> decimal string conversions of huge numbers by default
+
+
+def digit_by_digit(b: int, number: int) -> str:
+    digits = []
+    while number > 0:
+        number, r = toymath.modulo(number, b)
+        digits.append("0123456789abcdefghijklmnopqrstuvwxyz"[r])
+    return ''.join(reversed(digits)) or "0"
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+random.seed(0)
+print("-- Base Conversion Benchmark --")
+print("    Time per conversion in milliseconds\n")
+print("    base   digits       to str     from str      builtin  digit by digit")
+for b, max_digits in ((16, 1_000_000), (10, 1_000_000)):
+    digits = 1000
+    while digits <= max_digits:
+        number = random.getrandbits(int(digits * math.log2(b)))
+        text, to_time = timed(geometric_progression_rev, b, number)
+        value, from_time = timed(geometric_progression, b, text)
+        builtin = hex if b == 16 else str
+        expected, builtin_time = timed(builtin, number)
+        assert value == number and text == expected.removeprefix("0x"), "conversion is not correct"
+        if digits <= 100_000:
+            old, old_time = timed(digit_by_digit, b, number)
+            assert old == text
+            old_column = f"{old_time:>16.2f}"
+        else:
+            old_column = f"{'-':>16}"
+        print(f"    {b:>4} {len(text):>8} {to_time:>12.2f} {from_time:>12.2f} {builtin_time:>12.2f}{old_column}")
+        digits *= 10
+
+print("\n    Batch conversion of 64-bit numbers")
+print("    count       to hex     from hex   hex() loop")
+for count in (1000, 100_000, 1_000_000):
+    numbers = np.random.default_rng(0).integers(0, 2 ** 63, count, dtype=np.uint64)
+    hexas, to_time = timed(decimal2hex_many, numbers)
+    values, from_time = timed(hex2decimal_many, hexas)
+    expected, loop_time = timed(lambda: [hex(number) for number in numbers.tolist()])
+    assert hexas == expected and (values == numbers).all(), "batch conversion is not correct"
+    print(f"    {count:>7} {to_time:>12.2f} {from_time:>12.2f} {loop_time:>12.2f}")
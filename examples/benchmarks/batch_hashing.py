@@ -0,0 +1,35 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Batch Hashing Benchmark
+
+# Compares hashing one string at a time with hashing a whole batch using hash_many()
+# Both paths must produce exactly the same hash numbers
+
+import random
+import string
+import time
+
+from toycrypt.hashing import *
+
+BATCH_SIZE = 1_000_000
+SCALAR_SIZE = 50_000  # The scalar path is much slower - only time a sample of it
+LENGTH = 8
+
+random.seed(0)
+chars = string.ascii_lowercase + string.digits
+inputs = [''.join(random.choices(chars, k=LENGTH)) for _ in range(BATCH_SIZE)]
+
+print("-- Batch Hashing Benchmark --")
+print(f"    Inputs: {BATCH_SIZE} strings of length {LENGTH}\n")
+for hash_function in (hash_addition, hash_allbits16, hash_allbits32, hash_toycrypt):
+    start = time.perf_counter()
+    scalar = [hash_function(value).get_hash() for value in inputs[:SCALAR_SIZE]]
+    scalar_rate = SCALAR_SIZE / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch = hash_many(hash_function, inputs)
+    batch_rate = BATCH_SIZE / (time.perf_counter() - start)
+
+    assert batch[:SCALAR_SIZE].tolist() == scalar, "Batch hashing is not bit-identical"
+    print(f"    {hash_function.__name__:<15} scalar: {scalar_rate:>12,.0f} hashes/s"
+          f"   batch: {batch_rate:>14,.0f} hashes/s   speedup: {batch_rate / scalar_rate:.0f}x")
@@ -0,0 +1,32 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Brute Force Benchmark
+
+# Compares the naive brute force loop of examples/attacks/hashing/brute_force.py (rebuild and rehash every candidate)
+# with the prefix-sharing engine of toycrypt.bruteforce on the same slice of the keyspace for lengths 5 to 8
+
+import time
+from itertools import product, islice
+
+from toycrypt.hashing import *
+from toycrypt.bruteforce import search_range
+
+CANDIDATES = 200_000  # How many candidates of each length are tried
+chars = "abcdefghijklmnopqrstuvwxyz0123456789"
+target = hash_toycrypt("does not exist")  # Not reachable - both paths have to try every candidate
+
+print("-- Brute Force Benchmark --")
+print(f"    Hash: hash_toycrypt, {CANDIDATES} candidates per length\n")
+for length in range(5, 8 + 1):
+    start = time.perf_counter()
+    for candidate in islice(product(chars, repeat=length), CANDIDATES):
+        if hash_toycrypt(''.join(candidate)) == target:
+            break
+    naive_rate = CANDIDATES / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    result = search_range(hash_toycrypt, target, chars, length, 0, CANDIDATES)
+    engine_rate = result.get_attempts() / (time.perf_counter() - start)
+
+    print(f"    length {length}   naive: {naive_rate:>10,.0f} hashes/s   engine: {engine_rate:>12,.0f} hashes/s"
+          f"   speedup: {engine_rate / naive_rate:.1f}x")
@@ -0,0 +1,27 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Diffie-Hellman Benchmark
+
+# Measures complete simulated key exchanges (two public keys and both shared secrets) per second
+# The 512-bit group is generated, the larger ones are the well-known groups
+
+import random
+import time
+
+from toycrypt.diffie_hellman import batch_handshakes, generate_group, get_well_known_group
+
+rng = random.Random(0)
+
+print("-- Diffie-Hellman Benchmark --\n")
+start = time.perf_counter()
+groups = [generate_group(512, rng)]
+print(f"    Generated a 512-bit safe prime group in {time.perf_counter() - start:.2f}s\n")
+groups += [get_well_known_group(bits) for bits in (1024, 1536, 2048, 3072)]
+
+for group in groups:
+    count = max(5, 20_000 // group.get_p().bit_length())
+    batch_handshakes(group, 1, rng)  # Builds the fixed-base table of the group
+    start = time.perf_counter()
+    batch_handshakes(group, count, rng)
+    elapsed = time.perf_counter() - start
+    print(f"    {group.get_p().bit_length():>4} bit: {count / elapsed:>10,.1f} handshakes/s")
@@ -0,0 +1,32 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Discrete Logarithm Benchmark
+
+# Measures how long it takes to recover a Diffie-Hellman secret from a public key for growing group sizes
+# All groups use safe primes, so the work is dominated by the subgroup of the large prime q = (p - 1) / 2
+# Both baby-step giant-step and Pollard's rho need about sqrt(p) steps: each 2 extra bits double the time
+
+import random
+import time
+
+from toycrypt.diffie_hellman import generate_group
+from toycrypt.discrete_log import baby_step_giant_step, pollard_rho_log, discrete_log
+
+rng = random.Random(0)
+attacks = [baby_step_giant_step, pollard_rho_log, discrete_log]
+
+print("-- Discrete Logarithm Benchmark --")
+print("    Seconds to recover a random secret\n")
+print("    bits  " + "".join(f"{attack.__name__:>22}" for attack in attacks))
+for bits in range(16, 40 + 1, 4):
+    group = generate_group(bits, rng)
+    p, g = group.get_p(), group.get_g()
+    secret = rng.randrange(2, group.get_q())
+    public = pow(g, secret, p)
+    timings = []
+    for attack in attacks:
+        start = time.perf_counter()
+        result = attack(g, public, p)
+        timings.append(time.perf_counter() - start)
+        assert pow(g, result, p) == public, f"{attack.__name__} failed"
+    print(f"    {bits:>4}  " + "".join(f"{timing:>22.4f}" for timing in timings))
@@ -0,0 +1,35 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# GCD Benchmark
+
+# Compares the gcd algorithms of toymath for operands from 32 to 4096 bits
+#       - gcd: iterative Euclidean algorithm (one big division per step)
+#       - gcd_binary: Stein's algorithm (only shifts and subtractions)
+#       - gcd_lehmer: Lehmer's algorithm (simulates many Euclid steps on the leading bits)
+# math.gcd (implemented in C) is shown as reference
+
+import math
+import random
+import time
+
+from toycrypt.toymath import gcd, gcd_binary, gcd_lehmer
+
+PAIRS = 200
+
+random.seed(0)
+functions = [gcd, gcd_binary, gcd_lehmer, math.gcd]
+names = ["gcd", "gcd_binary", "gcd_lehmer", "math.gcd"]
+
+print("-- GCD Benchmark --")
+print(f"    Average time per call in microseconds over {PAIRS} random pairs\n")
+print("    bits  " + "".join(f"{name:>14}" for name in names))
+for bits in (32, 64, 128, 256, 512, 1024, 2048, 4096):
+    pairs = [(random.getrandbits(bits), random.getrandbits(bits)) for _ in range(PAIRS)]
+    expected = [math.gcd(a, b) for a, b in pairs]
+    timings = []
+    for function in functions:
+        start = time.perf_counter()
+        results = [function(a, b) for a, b in pairs]
+        timings.append((time.perf_counter() - start) / PAIRS * 1e6)
+        assert results == expected, f"{function} is not exact"
+    print(f"    {bits:>4}  " + "".join(f"{timing:>14.1f}" for timing in timings))
@@ -0,0 +1,43 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Modular Inversion Benchmark
+
+# Inverts many random values modulo a prime of different sizes
+#       - eec_matrix: extended Euclid with one quotient matrix per step
+#       - eec: single-pass extended Euclid that keeps only scalars
+#       - get_multi_inverses: Montgomery's trick - one inversion and 3 multiplications per value
+# Python's pow(a, -1, n) (implemented in C) is shown as reference
+
+import random
+import time
+
+from toycrypt.factorization import is_prime
+from toycrypt.toymath import eec, eec_matrix, get_multi_inverses
+
+VALUES = 2000
+
+random.seed(0)
+names = ["eec_matrix", "eec", "batch", "pow(a, -1, n)"]
+
+print("-- Modular Inversion Benchmark --")
+print(f"    Average time per inverse in microseconds over {VALUES} values\n")
+print("    bits  " + "".join(f"{name:>15}" for name in names))
+for bits in (64, 256, 1024, 2048):
+    n = random.getrandbits(bits) | (1 << (bits - 1)) | 1
+    while not is_prime(n):
+        n += 2
+    values = [random.randrange(1, n) for _ in range(VALUES)]
+    expected = [pow(value, -1, n) for value in values]
+    runs = [
+        lambda: [eec_matrix(value, n)[0] % n for value in values],
+        lambda: [eec(value, n)[0] % n for value in values],
+        lambda: get_multi_inverses(values, n),
+        lambda: [pow(value, -1, n) for value in values],
+    ]
+    timings = []
+    for name, run in zip(names, runs):
+        start = time.perf_counter()
+        results = run()
+        timings.append((time.perf_counter() - start) / VALUES * 1e6)
+        assert results == expected, f"{name} is not correct"
+    print(f"    {bits:>4}  " + "".join(f"{timing:>15.2f}" for timing in timings))
@@ -0,0 +1,45 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Modular Exponentiation Benchmark
+
+# Compares the ways to compute g^e mod p for a fixed generator g and random exponents e
+#       - pow_mult_sqr: square and multiply from toymath (with reduction after every step)
+#       - pow_mod: sliding window exponentiation
+#       - montgomery: sliding window using Montgomery multiplication
+#       - pow_many: fixed-base comb table shared by all exponents (table build time included)
+#       - builtin: Python's pow(g, e, p) implemented in C
+
+import random
+import time
+
+from toycrypt.modexp import pow_mod, pow_many, MontgomeryContext
+from toycrypt.toymath import pow_mult_sqr
+
+EXPONENTS = 50
+
+random.seed(0)
+names = ["pow_mult_sqr", "pow_mod", "montgomery", "pow_many", "builtin"]
+
+print("-- Modular Exponentiation Benchmark --")
+print(f"    Average time per exponentiation in milliseconds over {EXPONENTS} exponents\n")
+print("    bits  " + "".join(f"{name:>14}" for name in names))
+for bits in (256, 512, 1024, 2048, 3072):
+    p = random.getrandbits(bits) | (1 << (bits - 1)) | 1
+    g = 5
+    exponents = [random.getrandbits(bits) for _ in range(EXPONENTS)]
+    expected = [pow(g, e, p) for e in exponents]
+    context = MontgomeryContext(p)
+    runs = [
+        lambda: [pow_mult_sqr(g, e, p) for e in exponents],
+        lambda: [pow_mod(g, e, p) for e in exponents],
+        lambda: [context.pow(g, e) for e in exponents],
+        lambda: pow_many(g, exponents, p),
+        lambda: [pow(g, e, p) for e in exponents],
+    ]
+    timings = []
+    for name, run in zip(names, runs):
+        start = time.perf_counter()
+        results = run()
+        timings.append((time.perf_counter() - start) / EXPONENTS * 1000)
+        assert results == expected, f"{name} is not correct"
+    print(f"    {bits:>4}  " + "".join(f"{timing:>14.3f}" for timing in timings))
@@ -0,0 +1,64 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Network Simulation Benchmark
+
+# Simulates 10,000 devices sending 1 million messages over a connection with a virtual clock
+# Every device sends a message to a random device about every 10 ms (simulated), with 20 ms latency and 1 MB/s uplinks
+# Each device reads up to 2 messages from its bounded inbox whenever it sends - full inboxes drop messages
+# Two eavesdroppers listen to the "chat" topic only
+# Reports simulated messages per second (virtual time) and processed messages per second (wall-clock time)
+
+import random
+import time
+
+from toycrypt.simulation import Connection, Device, Scheduler
+
+DEVICES = 10_000
+MESSAGES = 1_000_000
+SEND_INTERVAL = 0.01  # Average time between two messages of one device in seconds
+
+rng = random.Random(0)
+scheduler = Scheduler()
+internet = Connection(scheduler, latency=0.02, bandwidth=1_000_000)
+devices = [Device(f"Device {i}", inbox_size=64) for i in range(DEVICES)]
+for device in devices:
+    device.connect(internet)
+eavesdroppers = [Device(f"Eve {i}", inbox_size=1000) for i in range(2)]
+for eve in eavesdroppers:
+    internet.add_listener(eve, "chat")
+
+topics = ["chat", "update", "ping", "file"]
+sent = 0
+
+
+def tick(device: Device):
+    global sent
+    if sent >= MESSAGES:
+        return
+    sent += 1
+    device.send(devices[int(rng.random() * DEVICES)], "Hello there!", topics[sent % 4])
+    device.receive()
+    device.receive()
+    scheduler.schedule(rng.expovariate(1 / SEND_INTERVAL), tick, device)
+
+
+for device in devices:
+    scheduler.schedule(rng.random() * SEND_INTERVAL, tick, device)
+
+print("-- Network Simulation Benchmark --\n")
+start = time.perf_counter()
+events = scheduler.run()
+wall_time = time.perf_counter() - start
+simulated_time = scheduler.get_time()
+
+dropped = sum(device.get_dropped() for device in devices)
+overheard = sum(len(eve.get_received_messages()) + eve.get_dropped() for eve in eavesdroppers)
+print(f"    Devices:              {DEVICES:>14,}")
+print(f"    Messages sent:        {internet.get_sent():>14,}")
+print(f"    Messages delivered:   {internet.get_delivered():>14,}")
+print(f"    Dropped (inbox full): {dropped:>14,}")
+print(f"    Overheard by Eves:    {overheard:>14,}")
+print(f"    Events processed:     {events:>14,}\n")
+print(f"    Simulated time:       {simulated_time:>14.2f} s"
+      f"   {internet.get_delivered() / simulated_time:>12,.0f} messages/s")
+print(f"    Wall-clock time:      {wall_time:>14.2f} s   {internet.get_delivered() / wall_time:>12,.0f} messages/s")
@@ -0,0 +1,103 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Network Transport Benchmark
+
+# Runs a hub, a receiver (Bob), an eavesdropper (Eve) and several senders in separate processes
+# The senders send XOR encrypted messages to Bob over a Unix socket, Eve listens to the "chat" topic
+# Reports the messages per second received by Bob and the latency from sending to receiving (median and p99)
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from toycrypt.crypto import encrypt_xor
+from toycrypt.network import RemoteConnection, run_hub
+from toycrypt.simulation import Device
+
+SENDERS = 4
+MESSAGES = 50_000  # Per sender
+
+
+class TimingDevice(Device):
+    """Records the latency of every received message instead of keeping it"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.latencies = []
+
+    def receive_message(self, message):
+        self.latencies.append(time.time() - message.get_sent_time())
+
+
+async def receive(address, name: str, topic: str | None, expected: int, ready, results):
+    connection = RemoteConnection(address)
+    await connection.open()
+    device = TimingDevice(name)
+    if topic:
+        connection.add_listener(device, topic)
+    else:
+        device.connect(connection)
+    await connection.sync()
+    ready.set()
+    while len(device.latencies) < expected:
+        await asyncio.sleep(0.01)
+    results.put((name, device.latencies))
+    await connection.close()
+
+
+async def send(address, name: str, start):
+    connection = RemoteConnection(address)
+    await connection.open()
+    device = Device(name)
+    device.connect(connection)
+    device.set_encryption(lambda text: encrypt_xor(text, 0xC0FFEE))
+    bob = connection.get_device("Bob")
+    start.wait()
+    for i in range(MESSAGES):
+        device.send(bob, f"Message {i} from {name}", "chat" if i % 10 == 0 else "data")
+        if i % 64 == 0:
+            await connection.drain()
+    await connection.close()
+
+
+def run(function, *args):
+    asyncio.run(function(*args))
+
+
+if __name__ == "__main__":
+    address = os.path.join(tempfile.mkdtemp(), "hub.sock")
+    hub = multiprocessing.Process(target=run_hub, args=(address,), daemon=True)
+    hub.start()
+    while not os.path.exists(address):
+        time.sleep(0.01)
+
+    results = multiprocessing.Queue()
+    bob_ready, eve_ready, start = multiprocessing.Event(), multiprocessing.Event(), multiprocessing.Event()
+    total = SENDERS * MESSAGES
+    receivers = [
+        multiprocessing.Process(target=run, args=(receive, address, "Bob", None, total, bob_ready, results)),
+        multiprocessing.Process(target=run, args=(receive, address, "Eve", "chat", total // 10, eve_ready, results)),
+    ]
+    senders = [multiprocessing.Process(target=run, args=(send, address, f"Sender {i}", start)) for i in range(SENDERS)]
+    for process in receivers + senders:
+        process.start()
+    bob_ready.wait()
+    eve_ready.wait()
+
+    start_time = time.perf_counter()
+    start.set()
+    latencies = dict(results.get() for _ in receivers)
+    elapsed = time.perf_counter() - start_time
+    for process in receivers + senders:
+        process.join()
+    hub.terminate()
+
+    print("-- Network Transport Benchmark --\n")
+    print(f"    {SENDERS} senders, {total:,} messages to Bob, {len(latencies['Eve']):,} overheard by Eve\n")
+    print(f"    Throughput: {total / elapsed:>12,.0f} messages/s")
+    for name in ("Bob", "Eve"):
+        values = sorted(latencies[name])
+        median, p99 = values[len(values) // 2], values[int(len(values) * 0.99)]
+        print(f"    {name} latency:  median {median * 1000:>8.2f} ms   p99 {p99 * 1000:>8.2f} ms")
@@ -0,0 +1,57 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# RSA Signature Benchmark
+
+# Measures signatures per second for different key sizes
+#       - sign (plain): h^d mod n with the full private exponent
+#       - sign (CRT): two half-size exponentiations mod p and q combined with the Chinese Remainder Theorem
+#       - verify: every signature on its own
+#       - verify_many: every signature on its own, all messages hashed at once
+#       - screen: one exponentiation for the whole batch (one verdict, not per signature)
+
+import random
+import time
+
+from toycrypt import modexp, rsa
+from toycrypt.hashing import hash_toycrypt
+
+MESSAGES = 200
+
+rng = random.Random(0)
+messages = [f"Message number {i}" for i in range(MESSAGES)]
+names = ["sign (plain)", "sign (CRT)", "verify", "verify_many", "screen"]
+
+print("-- RSA Signature Benchmark --")
+print(f"    Signatures per second over {MESSAGES} messages\n")
+print("    bits  " + "".join(f"{name:>14}" for name in names))
+for bits in (512, 1024, 2048, 3072):
+    keypair = rsa.generate_keypair(bits, rng=rng)
+    private, public = keypair.get_private(), keypair.get_public()
+    hashes = [hash_toycrypt(message).get_hash() % public.get_n() for message in messages]
+    timings = []
+
+    start = time.perf_counter()
+    plain = [modexp.pow_mod(h, private.get_d(), public.get_n()) for h in hashes]
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    signatures = [rsa.sign(private, message) for message in messages]
+    timings.append(time.perf_counter() - start)
+    assert signatures == plain, "CRT signatures are not correct"
+
+    start = time.perf_counter()
+    results = [rsa.verify(public, message, signature) for message, signature in zip(messages, signatures)]
+    timings.append(time.perf_counter() - start)
+    assert all(results)
+
+    start = time.perf_counter()
+    results = rsa.verify_many(public, list(zip(messages, signatures)))
+    timings.append(time.perf_counter() - start)
+    assert all(results)
+
+    start = time.perf_counter()
+    verdict = rsa.screen(public, list(zip(messages, signatures)))
+    timings.append(time.perf_counter() - start)
+    assert verdict
+
+    print(f"    {bits:>4}  " + "".join(f"{MESSAGES / timing:>14,.0f}" for timing in timings))
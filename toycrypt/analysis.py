@@ -0,0 +1,226 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Hash Quality Analysis
+
+# Measures how close a hash function of toycrypt.hashing comes to an ideal (random) function
+#       - Strict avalanche criterion (SAC): flipping any single input bit should flip every output bit
+#         with probability 1/2. The avalanche matrix holds that probability for every (input bit, output bit) pair
+#       - Bias: every output bit should be set for half of all inputs
+#       - Uniformity: the hashes are sorted into buckets, a chi-square test compares the bucket sizes
+#         with the expected (equal) size. A p-value close to 0 means the hashes are not uniformly distributed
+#       - Collisions: for n distinct inputs an ideal function with m outputs produces n - m * (1 - (1 - 1/m)^n)
+#         collisions on average (birthday problem). A ratio much larger than 1 means the function collides too often
+# Inputs are random strings of a fixed length, hashed as a code matrix with hash_codes()
+# The work is split into chunks that are analyzed by multiple processes - each returns only its counts and hashes
+# All bit statistics use np.unpackbits on the hashes (or on the XOR of two hashes for the avalanche matrix)
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from toycrypt import hashing
+
+_OUTPUT_BITS = {hashing.AllBits16Hasher: 16}  # All other hash functions use 32 bits
+
+
+def _unpack_bits(hashes: np.ndarray, bits: int) -> np.ndarray:
+    """Returns a matrix with one row of 0/1 values per hash (least significant bit first)"""
+    as_bytes = hashes.astype("<u4").view(np.uint8).reshape(-1, 4)
+    return np.unpackbits(as_bytes, axis=1, bitorder="little")[:, :bits]
+
+
+def _chi_square_p_value(chi_square: float, degrees: int) -> float:
+    """Upper tail probability of the chi-square distribution (Wilson-Hilferty approximation)"""
+    if degrees <= 0:
+        return 1.0
+    variance = 2 / (9 * degrees)
+    z = ((chi_square / degrees) ** (1 / 3) - (1 - variance)) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def expected_collisions(inputs: int, bits: int) -> float:
+    """
+    Returns the expected number of collisions of an ideal hash function (birthday problem)
+    :param inputs: number of distinct inputs
+    :param bits: output size of the hash function
+    """
+    outputs = 2 ** bits
+    # outputs * (1 - (1 - 1/outputs)^inputs) is the expected number of distinct hashes - computed without rounding
+    distinct = -outputs * math.expm1(inputs * math.log1p(-1 / outputs))
+    return inputs - distinct
+
+
+def _analyze_chunk(task: tuple) -> (np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+    hash_function, samples, avalanche_samples, length, alphabet, bits, buckets, seed = task
+    rng = np.random.default_rng(seed)
+    codes = alphabet[rng.integers(0, len(alphabet), (samples, length))]
+    hashes = hashing.hash_codes(hash_function, codes)
+
+    bit_counts = _unpack_bits(hashes, bits).sum(axis=0, dtype=np.int64)
+    bucket_counts = np.bincount((hashes % np.uint64(buckets)).astype(np.intp), minlength=buckets)
+
+    # Every input is copied once per input bit and that bit is flipped - all copies are hashed in one call
+    input_bits = length * 8
+    base = codes[:avalanche_samples]
+    positions = np.arange(input_bits)
+    flipped = np.repeat(base[np.newaxis], input_bits, axis=0)
+    flipped[positions[:, np.newaxis], np.arange(len(base)), (positions // 8)[:, np.newaxis]] ^= (
+        np.uint64(1) << (positions % 8).astype(np.uint64))[:, np.newaxis]
+    flipped_hashes = hashing.hash_codes(hash_function, flipped.reshape(-1, length)).reshape(input_bits, -1)
+    changes = flipped_hashes ^ hashes[np.newaxis, :len(base)]
+    flip_counts = _unpack_bits(changes.ravel(), bits).reshape(input_bits, len(base), bits).sum(axis=1,
+                                                                                               dtype=np.int64)
+    return bit_counts, bucket_counts, flip_counts, codes.astype(np.uint8), hashes.astype(np.uint32)
+
+
+class HashQualityReport:
+    """The results of analyze() - all probabilities are between 0 and 1, the ideal value is 0.5"""
+    _name: str
+    _samples: int
+    _avalanche_samples: int
+    _length: int
+    _bits: int
+    _avalanche: np.ndarray  # Shape (input bits, output bits)
+    _bias: np.ndarray  # Probability that each output bit is set
+    _buckets: int
+    _chi_square: float
+    _distinct_inputs: int
+    _collisions: int
+    _expected_collisions: float
+
+    def __init__(self, name: str, samples: int, avalanche_samples: int, length: int, bits: int, avalanche: np.ndarray,
+                 bias: np.ndarray, buckets: int, chi_square: float, distinct_inputs: int, collisions: int):
+        self._name = name
+        self._samples = samples
+        self._avalanche_samples = avalanche_samples
+        self._length = length
+        self._bits = bits
+        self._avalanche = avalanche
+        self._bias = bias
+        self._buckets = buckets
+        self._chi_square = chi_square
+        self._distinct_inputs = distinct_inputs
+        self._collisions = collisions
+        self._expected_collisions = expected_collisions(distinct_inputs, bits)
+
+    def __str__(self):
+        ratio = self.get_collision_ratio()
+        return "\n".join([
+            f"{self._name}: {self._samples:,} inputs of length {self._length}, {self._bits} output bits",
+            f"    avalanche     flip probability {self._avalanche.mean():.4f}"
+            f"   deviation mean {float(np.abs(self._avalanche - 0.5).mean()):.4f}"
+            f" worst {self.get_avalanche_deviation():.4f}"
+            f"   ({self._avalanche_samples:,} inputs x {self._length * 8} flipped bits)",
+            f"    bias          worst deviation {self.get_bias_deviation():.4f}"
+            f"   (bit {int(np.abs(self._bias - 0.5).argmax())})",
+            f"    uniformity    chi-square {self._chi_square:,.1f} with {self._buckets - 1} degrees of freedom"
+            f"   p = {self.get_p_value():.4f}",
+            f"    collisions    {self._collisions:,} of {self._distinct_inputs:,} distinct inputs"
+            f"   (birthday bound {self._expected_collisions:,.1f}"
+            + (f", {ratio:.2f}x)" if ratio is not None else ")"),
+        ])
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_samples(self) -> int:
+        return self._samples
+
+    def get_bits(self) -> int:
+        return self._bits
+
+    def get_avalanche_matrix(self) -> np.ndarray:
+        """Probability that flipping input bit i (row) flips output bit j (column)"""
+        return self._avalanche
+
+    def get_avalanche_deviation(self) -> float:
+        """Largest distance of an avalanche matrix entry from 0.5 (0 is ideal, 0.5 means a bit never or always flips)"""
+        return float(np.abs(self._avalanche - 0.5).max())
+
+    def get_bias(self) -> np.ndarray:
+        return self._bias
+
+    def get_bias_deviation(self) -> float:
+        return float(np.abs(self._bias - 0.5).max())
+
+    def get_chi_square(self) -> float:
+        return self._chi_square
+
+    def get_p_value(self) -> float:
+        return _chi_square_p_value(self._chi_square, self._buckets - 1)
+
+    def get_collisions(self) -> int:
+        return self._collisions
+
+    def get_expected_collisions(self) -> float:
+        return self._expected_collisions
+
+    def get_collision_ratio(self) -> float | None:
+        """Observed collisions divided by the birthday bound (None if no collision is expected at all)"""
+        if self._expected_collisions < 0.01:
+            return None
+        return self._collisions / self._expected_collisions
+
+    def format_avalanche(self) -> str:
+        """Returns the avalanche matrix with one line per input bit and one digit per output bit (5 is ideal)"""
+        digits = np.minimum((self._avalanche * 10).astype(int), 9)
+        return "\n".join(f"    char {i // 8} bit {i % 8}  " + "".join(map(str, row)) for i, row in enumerate(digits))
+
+
+def analyze(hash_function, samples: int = 1_000_000, length: int = 8, alphabet: str | None = None,
+            avalanche_samples: int = 20_000, buckets: int = 4096, workers: int | None = None,
+            chunk_size: int = 1 << 17, seed: int = 0) -> HashQualityReport:
+    """
+    Analyzes a hash function with random inputs of a fixed length
+    :param hash_function: one of the hash functions of toycrypt.hashing
+    :param samples: number of random inputs for the bias, uniformity and collision tests
+    :param length: length of every input
+    :param alphabet: characters of the inputs (all 256 byte values if None)
+        The avalanche test flips single bits of the characters, so it may leave the alphabet
+    :param avalanche_samples: number of inputs whose bits are flipped (each costs 8 * length extra hashes)
+    :param buckets: number of buckets for the chi-square test
+    :param workers: number of processes (defaults to the number of CPUs, 1 runs everything in this process)
+    :param chunk_size: number of inputs each process analyzes at once
+    :param seed: the same seed always produces the same inputs and results
+    :return: a HashQualityReport
+    """
+    if length < 1 or samples < 1:
+        raise ValueError("samples and length must be at least 1")
+    hasher = type(hashing.get_hasher(hash_function))
+    bits = _OUTPUT_BITS.get(hasher, 32)
+    codes = np.arange(256) if alphabet is None else np.array([ord(char) for char in alphabet])
+    if len(codes) == 0 or codes.max() > 255:
+        raise ValueError("The alphabet must only contain characters with codes up to 255")
+    alphabet_codes = np.unique(codes).astype(np.uint64)
+    avalanche_samples = min(avalanche_samples, samples)
+
+    chunks = -(-samples // chunk_size)
+    sizes = [len(part) for part in np.array_split(np.arange(samples), chunks)]
+    avalanche_sizes = [len(part) for part in np.array_split(np.arange(avalanche_samples), chunks)]
+    tasks = [(hash_function, size, avalanche_size, length, alphabet_codes, bits, buckets, (seed, chunk))
+             for chunk, (size, avalanche_size) in enumerate(zip(sizes, avalanche_sizes))]
+    if workers == 1 or chunks == 1:
+        results = list(map(_analyze_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_analyze_chunk, tasks))
+
+    bit_counts = sum(result[0] for result in results)
+    bucket_counts = sum(result[1] for result in results)
+    flip_counts = sum(result[2] for result in results)
+    inputs = np.concatenate([result[3] for result in results])
+    hashes = np.concatenate([result[4] for result in results])
+
+    expected = samples / buckets
+    chi_square = float(((bucket_counts - expected) ** 2).sum() / expected)
+
+    # Equal inputs always have equal hashes - only distinct inputs count for collisions
+    rows = np.ascontiguousarray(inputs).view(np.dtype((np.void, length))).ravel()
+    _, first = np.unique(rows, return_index=True)
+    distinct_hashes = np.unique(hashes[first])
+    collisions = len(first) - len(distinct_hashes)
+
+    return HashQualityReport(hasher.name, samples, avalanche_samples, length, bits,
+                             flip_counts / max(avalanche_samples, 1), bit_counts / samples, buckets, chi_square,
+                             len(first), collisions)
@@ -0,0 +1,485 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Benchmark Suite
+
+# Measures the hot paths of hashing, toymath and crypto over several input sizes
+# Every public function of these modules has a case - --list also reports functions that are still missing one
+# A single timing is not reliable: the first calls are slower (caches, memory allocation) and other processes
+# disturb the measurement. So every benchmark
+#       - calibrates how many calls are needed for one sample to take at least min_time (short calls are batched)
+#       - runs a few warmup samples that are thrown away
+#       - takes repeat samples and reports the median time per call and the interquartile range (IQR)
+#         The median and IQR are not distorted by a few outliers like the mean and standard deviation are
+# Results are written to JSON and can be compared against a saved baseline to find regressions
+#
+# Usage: python -m toycrypt.benchmark [--filter hash] [--output results.json] [--baseline baseline.json]
+
+import argparse
+import inspect
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+
+from toycrypt import crypto, diffie_hellman, factorization, hashing, toymath, util
+
+_COVERED_MODULES = (hashing, toymath, crypto)  # Every public function of these modules needs a benchmark case
+_temp_dir: tempfile.TemporaryDirectory | None = None  # Holds the input files of the file benchmarks
+
+
+class BenchmarkResult:
+    """The timing of one benchmark at one input size"""
+    _name: str
+    _size: int
+    _unit: str  # What the size counts, e.g. "chars" or "bits"
+    _loops: int  # Calls per sample
+    _samples: [float]  # Nanoseconds per call of every sample
+
+    def __init__(self, name: str, size: int, unit: str, loops: int, samples: [float]):
+        self._name = name
+        self._size = size
+        self._unit = unit
+        self._loops = loops
+        self._samples = samples
+
+    def __str__(self):
+        return (f"{self._name:<32} {self._size:>10} {self._unit:<7} {self.get_median() / 1000:>12.2f} us"
+                f"  ± {self.get_iqr() / 1000:>9.2f} us  {self.get_ops_per_sec():>14,.1f} ops/s")
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_size(self) -> int:
+        return self._size
+
+    def get_samples(self) -> [float]:
+        return self._samples
+
+    def get_median(self) -> float:
+        """Returns the median time per call in nanoseconds"""
+        return statistics.median(self._samples)
+
+    def get_iqr(self) -> float:
+        """Returns the interquartile range of the time per call in nanoseconds"""
+        if len(self._samples) < 2:
+            return 0.0
+        q1, _, q3 = statistics.quantiles(self._samples, n=4)
+        return q3 - q1
+
+    def get_ops_per_sec(self) -> float:
+        return 1e9 / self.get_median() if self.get_median() > 0 else float("inf")
+
+    def to_dict(self) -> dict:
+        return {"name": self._name, "size": self._size, "unit": self._unit, "loops": self._loops,
+                "median_ns": self.get_median(), "iqr_ns": self.get_iqr(), "ops_per_sec": self.get_ops_per_sec(),
+                "samples_ns": self._samples}
+
+    @staticmethod
+    def from_dict(data: dict) -> "BenchmarkResult":
+        return BenchmarkResult(data["name"], data["size"], data["unit"], data["loops"], data["samples_ns"])
+
+
+def measure_ns(function, warmup: int = 3, repeat: int = 15, min_time_ns: int = 2_000_000) -> (int, [float]):
+    """
+    Times calls of function() (no arguments) with time.perf_counter_ns
+    :param function: the function to measure
+    :param warmup: number of samples that are not kept
+    :param repeat: number of samples that are kept
+    :param min_time_ns: minimal duration of one sample - short functions are called several times per sample
+    :return: the calls per sample and the nanoseconds per call of every sample
+    """
+    # Calibrate: double the loops until a sample is long enough
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time_ns:
+            break
+        loops *= 2
+    samples = []
+    for i in range(warmup + repeat):
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter_ns() - start
+        if i >= warmup:
+            samples.append(elapsed / loops)
+    return loops, samples
+
+
+# Benchmark cases: (name, unit, sizes, setup) - setup(size) returns the function to measure
+# All inputs are generated from a fixed seed so every run measures the same work
+
+def _text(size: int) -> str:
+    generator = random.Random(size)
+    return ''.join(generator.choice("abcdefghijklmnopqrstuvwxyz0123456789 ") for _ in range(size))
+
+
+def _numbers(bits: int, count: int = 1) -> [int]:
+    generator = random.Random(bits)
+    return [generator.getrandbits(bits) | (1 << (bits - 1)) | 1 for _ in range(count)]
+
+
+def _hash_case(hash_function):
+    def setup(size: int):
+        text = _text(size)
+        return lambda: hash_function(text)
+    return setup
+
+
+def _hash_codes_case(hash_function):
+    def setup(count: int):
+        codes = np.random.default_rng(count).integers(32, 127, (count, 8), dtype=np.uint64)
+        return lambda: hashing.hash_codes(hash_function, codes)
+    return setup
+
+
+def _temp_file(size: int) -> str:
+    """Returns the path of a file with size random bytes - all files are deleted when the interpreter exits"""
+    global _temp_dir
+    if _temp_dir is None:
+        _temp_dir = tempfile.TemporaryDirectory(prefix="toycrypt-benchmark-")
+    path = os.path.join(_temp_dir.name, f"input-{size}.bin")
+    if not os.path.exists(path):
+        with open(path, "wb") as file:
+            file.write(random.Random(size).randbytes(size))
+    return path
+
+
+def _hash_file_case(size: int):
+    path = _temp_file(size)
+    return lambda: hashing.hash_file(hashing.hash_toycrypt, path)
+
+
+def _hasher_case(size: int):
+    text = _text(size)
+    return lambda: hashing.get_hasher(hashing.hash_toycrypt, text)
+
+
+def _hash_many_case(hash_function):
+    def setup(size: int):
+        inputs = [_text(8 + i % 4) for i in range(size)]
+        return lambda: hashing.hash_many(hash_function, inputs)
+    return setup
+
+
+def _pair_case(function):
+    def setup(bits: int):
+        a, b = _numbers(bits, 2)
+        return lambda: function(a, b)
+    return setup
+
+
+def _triple_case(function):
+    def setup(bits: int):
+        a, b, n = _numbers(bits, 3)
+        return lambda: function(a, b, n)
+    return setup
+
+
+def _prime(bits: int) -> int:
+    candidate = _numbers(bits)[0]
+    while not factorization.is_prime(candidate):
+        candidate += 2
+    return candidate
+
+
+def _uncached(function):
+    # euler_phi and the factorization remember their results - clearing them makes every call do the whole work
+    def call(*arguments):
+        toymath.euler_phi.cache_clear()
+        factorization._factorize.cache_clear()
+        return function(*arguments)
+    return call
+
+
+def _inverse_case(bits: int):
+    a, n = _numbers(bits, 2)
+    while toymath.gcd(a, n) != 1:
+        a += 1
+    return lambda: toymath.get_multi_inverse(a, n)
+
+
+def _inverses_case(count: int):
+    n, = _numbers(256)
+    values = [value % n for value in _numbers(255, count)]
+    values = [value for value in values if toymath.gcd(value, n) == 1]
+    return lambda: toymath.get_multi_inverses(values, n)
+
+
+def _pow_case(bits: int):
+    x, y, n = _numbers(bits, 3)
+    return lambda: toymath.pow_mult_sqr(x, y, n)
+
+
+def _fermat_case(bits: int):
+    p = _prime(bits)
+    a = _numbers(bits - 1)[0]
+    return lambda: _uncached(toymath.little_fermat)(a, p)
+
+
+def _euler_fermat_case(n: int):
+    residue = toymath.get_reduced_residue_set(n)
+    return lambda: _uncached(toymath.euler_fermat)(residue, n)
+
+
+def _table_case(function):
+    def setup(n: int):
+        table = toymath.get_add_table(n)
+        return lambda: function(table)
+    return setup
+
+
+def _xor_str_case(function):
+    def setup(size: int):
+        text = _text(size)
+        return lambda: function(text, 0xDEADBEEF)
+    return setup
+
+
+def _xor_bytes_case(function):
+    def setup(size: int):
+        data = random.Random(size).randbytes(size)
+        out = bytearray(size)
+        return lambda: function(data, 0xDEADBEEF, 4, out)
+    return setup
+
+
+def _xor_file_case(function):
+    def setup(size: int):
+        input_path = _temp_file(size)
+        output_path = input_path + ".out"
+        return lambda: function(input_path, output_path, 0xDEADBEEF)
+    return setup
+
+
+def _dh_case(bits: int):
+    p, secret = _numbers(bits, 2)
+    return lambda: crypto.diffie_hellman_private(p, 5, secret)
+
+
+def _dh_exchange_case(bits: int):
+    p, secret, other = _numbers(bits, 3)
+    other_key = crypto.Key(other % p)
+    return lambda: crypto.diffie_hellman_exchange(p, 5, secret, other_key)
+
+
+def _dh_public_case(bits: int):
+    group = diffie_hellman.get_well_known_group(bits)
+    secret = _numbers(bits - 2)[0]
+    group.get_table()  # The table is built once per group - only the exponentiation is measured
+    return lambda: group.public_key(secret)
+
+
+def _conversion_case(function, to_text):
+    # to_text(number) gives the input of a function that parses text, None measures the number -> text direction
+    def setup(bits: int):
+        number = _numbers(bits)[0]
+        argument = number if to_text is None else to_text(number)
+        return lambda: function(argument)
+    return setup
+
+
+def _conversion_many_case(function, to_text):
+    def setup(count: int):
+        numbers = [value >> 1 for value in _numbers(64, count)]  # Non-negative 63-bit numbers fit into int64
+        arguments = numbers if to_text is None else [to_text(number) for number in numbers]
+        return lambda: function(arguments)
+    return setup
+
+
+_CASES = [
+    ("hashing.hash_addition", "chars", (16, 256, 4096), _hash_case(hashing.hash_addition)),
+    ("hashing.hash_allbits16", "chars", (16, 256, 4096), _hash_case(hashing.hash_allbits16)),
+    ("hashing.hash_allbits32", "chars", (16, 256, 4096), _hash_case(hashing.hash_allbits32)),
+    ("hashing.hash_toycrypt", "chars", (16, 256, 4096), _hash_case(hashing.hash_toycrypt)),
+    ("hashing.hash_addition_raw", "chars", (16, 256, 4096), _hash_case(hashing.hash_addition_raw)),
+    ("hashing.hash_allbits16_raw", "chars", (16, 256, 4096), _hash_case(hashing.hash_allbits16_raw)),
+    ("hashing.hash_allbits32_raw", "chars", (16, 256, 4096), _hash_case(hashing.hash_allbits32_raw)),
+    ("hashing.hash_toycrypt_raw", "chars", (16, 256, 4096), _hash_case(hashing.hash_toycrypt_raw)),
+    ("hashing.get_hasher", "chars", (16, 256, 4096), _hasher_case),
+    ("hashing.hash_file", "bytes", (4096, 1 << 20), _hash_file_case),
+    ("hashing.hash_codes[addition]", "inputs", (1000, 100_000), _hash_codes_case(hashing.hash_addition)),
+    ("hashing.hash_codes[toycrypt]", "inputs", (1000, 100_000), _hash_codes_case(hashing.hash_toycrypt)),
+    ("hashing.hash_many[addition]", "inputs", (1000, 100_000), _hash_many_case(hashing.hash_addition)),
+    ("hashing.hash_many[allbits16]", "inputs", (1000, 100_000), _hash_many_case(hashing.hash_allbits16)),
+    ("hashing.hash_many[allbits32]", "inputs", (1000, 100_000), _hash_many_case(hashing.hash_allbits32)),
+    ("hashing.hash_many[toycrypt]", "inputs", (1000, 100_000), _hash_many_case(hashing.hash_toycrypt)),
+    ("toymath.round_down", "value", (1,), lambda _: lambda: toymath.round_down(-12345.678)),
+    ("toymath.is_divider", "bits", (64, 512, 2048), _pair_case(toymath.is_divider)),
+    ("toymath.modulo", "bits", (64, 512, 2048), _pair_case(toymath.modulo)),
+    ("toymath.gcd", "bits", (64, 512, 2048), _pair_case(toymath.gcd)),
+    ("toymath.gcd_binary", "bits", (64, 512, 2048), _pair_case(toymath.gcd_binary)),
+    ("toymath.gcd_lehmer", "bits", (64, 512, 2048), _pair_case(toymath.gcd_lehmer)),
+    ("toymath.lcm", "bits", (64, 512, 2048), _pair_case(toymath.lcm)),
+    ("toymath.gcd_ex", "bits", (64, 512, 2048), _pair_case(toymath.gcd_ex)),
+    ("toymath.linear_combination_solvable", "bits", (64, 512, 2048),
+     _triple_case(toymath.linear_combination_solvable)),
+    ("toymath.is_modulo_congruent", "bits", (64, 512, 2048), _triple_case(toymath.is_modulo_congruent)),
+    ("toymath.get_least_positive_residue", "bits", (64, 512, 2048), _pair_case(toymath.get_least_positive_residue)),
+    ("toymath.eec", "bits", (64, 512, 2048), _pair_case(toymath.eec)),
+    ("toymath.eec_matrix", "bits", (64, 512, 2048), _pair_case(toymath.eec_matrix)),
+    ("toymath.has_mult_inverse", "bits", (64, 512, 2048), _pair_case(toymath.has_mult_inverse)),
+    ("toymath.get_multi_inverse", "bits", (64, 512, 2048), _inverse_case),
+    ("toymath.get_multi_inverses", "values", (100, 10_000), _inverses_case),
+    ("toymath.pow_naive", "exponent", (64, 1024, 16384), lambda y: lambda: toymath.pow_naive(3, y)),
+    ("toymath.pow_mult_sqr", "bits", (64, 512, 2048), _pow_case),
+    ("toymath.get_residue_set", "n", (10_000, 1_000_000), lambda n: lambda: toymath.get_residue_set(n)),
+    ("toymath.get_reduced_residue_set", "n", (10_000, 1_000_000),
+     lambda n: lambda: toymath.get_reduced_residue_set(n)),
+    ("toymath.iter_reduced_residue_set", "n", (10_000, 100_000),
+     lambda n: lambda: list(toymath.iter_reduced_residue_set(n))),
+    ("toymath.euler_phi", "n", (10_000, 1_000_000), lambda n: lambda: _uncached(toymath.euler_phi)(n - 1)),
+    ("toymath.euler_phi_range", "n", (10_000, 1_000_000), lambda n: lambda: toymath.euler_phi_range(0, n)),
+    ("toymath.get_add_table", "n", (256, 2048), lambda n: lambda: toymath.get_add_table(n)),
+    ("toymath.get_mult_table", "n", (256, 2048), lambda n: lambda: toymath.get_mult_table(n)),
+    ("toymath.little_fermat", "bits", (64, 512), _fermat_case),
+    ("toymath.euler_fermat", "n", (1000, 100_000), _euler_fermat_case),
+    ("toymath.write_table", "n", (64, 512), _table_case(lambda table: toymath.write_table(table, io.StringIO()))),
+    ("toymath.table_to_str", "n", (64, 512), _table_case(toymath.table_to_str)),
+    ("crypto.xor_key", "bytes", (4, 64), lambda size: lambda: crypto.xor_key(0xDEADBEEF, size)),
+    ("crypto.encrypt_xor", "chars", (1024, 65536), _xor_str_case(crypto.encrypt_xor)),
+    ("crypto.decrypt_xor", "chars", (1024, 65536), _xor_str_case(crypto.decrypt_xor)),
+    ("crypto.encrypt_xor_bytes", "bytes", (65536, 1 << 24), _xor_bytes_case(crypto.encrypt_xor_bytes)),
+    ("crypto.decrypt_xor_bytes", "bytes", (65536, 1 << 24), _xor_bytes_case(crypto.decrypt_xor_bytes)),
+    ("crypto.encrypt_file", "bytes", (65536, 1 << 24), _xor_file_case(crypto.encrypt_file)),
+    ("crypto.decrypt_file", "bytes", (65536, 1 << 24), _xor_file_case(crypto.decrypt_file)),
+    ("crypto.diffie_hellman_private", "bits", (256, 1024, 2048), _dh_case),
+    ("crypto.diffie_hellman_exchange", "bits", (256, 1024, 2048), _dh_exchange_case),
+    ("diffie_hellman.public_key", "bits", (768, 2048), _dh_public_case),
+    ("util.geometric_progression", "bits", (64, 4096, 65536),
+     _conversion_case(partial(util.geometric_progression, 7), partial(util.geometric_progression_rev, 7))),
+    ("util.geometric_progression_rev", "bits", (64, 4096, 65536),
+     _conversion_case(partial(util.geometric_progression_rev, 7), None)),
+    ("util.binary2decimal", "bits", (64, 4096, 65536), _conversion_case(util.binary2decimal, util.decimal2binary)),
+    ("util.decimal2binary", "bits", (64, 4096, 65536), _conversion_case(util.decimal2binary, None)),
+    ("util.hex2decimal", "bits", (64, 4096, 65536), _conversion_case(util.hex2decimal, util.decimal2hex)),
+    ("util.decimal2hex", "bits", (64, 4096, 65536), _conversion_case(util.decimal2hex, None)),
+    ("util.hex2decimal_many", "values", (1000, 100_000),
+     _conversion_many_case(util.hex2decimal_many, util.decimal2hex)),
+    ("util.decimal2hex_many", "values", (1000, 100_000), _conversion_many_case(util.decimal2hex_many, None)),
+]
+
+
+def get_benchmark_names() -> [str]:
+    return [name for name, _, _, _ in _CASES]
+
+
+def get_uncovered_functions() -> [str]:
+    """Returns the public functions of hashing, toymath and crypto that no benchmark case measures"""
+    covered = {name.split("[")[0] for name in get_benchmark_names()}
+    uncovered = []
+    for module in _COVERED_MODULES:
+        prefix = module.__name__.rsplit(".", 1)[-1]
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if not name.startswith("_") and function.__module__ == module.__name__ \
+                    and f"{prefix}.{name}" not in covered:
+                uncovered.append(f"{prefix}.{name}")
+    return uncovered
+
+
+def run_suite(name_filter: str | None = None, warmup: int = 3, repeat: int = 15, min_time_ns: int = 2_000_000,
+              quick: bool = False, report=None) -> [BenchmarkResult]:
+    """
+    Runs all benchmarks whose name contains name_filter
+    :param quick: only run the smallest size of every benchmark
+    :param report: called with every result as soon as it is finished (e.g. print)
+    :return: the results of all benchmarks and sizes
+    """
+    results = []
+    for name, unit, sizes, setup in _CASES:
+        if name_filter and name_filter not in name:
+            continue
+        for size in sizes[:1] if quick else sizes:
+            loops, samples = measure_ns(setup(size), warmup, repeat, min_time_ns)
+            result = BenchmarkResult(name, size, unit, loops, samples)
+            results.append(result)
+            if report:
+                report(result)
+    return results
+
+
+def save_results(results: [BenchmarkResult], path: str):
+    """Writes the results and a description of the machine to a JSON file"""
+    data = {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": [result.to_dict() for result in results],
+    }
+    with open(path, "w") as file:
+        json.dump(data, file, indent=2)
+
+
+def load_results(path: str) -> [BenchmarkResult]:
+    with open(path) as file:
+        return [BenchmarkResult.from_dict(result) for result in json.load(file)["results"]]
+
+
+def compare(results: [BenchmarkResult], baseline: [BenchmarkResult], threshold: float = 0.1) \
+        -> [(str, int, float, float, float, bool)]:
+    """
+    Compares the median times of results and baseline for every benchmark and size they have in common
+    :param threshold: relative slowdown that counts as regression (0.1 = 10% slower)
+    :return: name, size, baseline median, current median, relative change and whether it is a regression
+    """
+    base = {(result.get_name(), result.get_size()): result.get_median() for result in baseline}
+    comparisons = []
+    for result in results:
+        key = (result.get_name(), result.get_size())
+        if key not in base or base[key] <= 0:
+            continue
+        change = result.get_median() / base[key] - 1
+        comparisons.append((key[0], key[1], base[key], result.get_median(), change, change > threshold))
+    return comparisons
+
+
+def main(arguments: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Runs the toycrypt benchmark suite")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--warmup", type=int, default=3, help="samples thrown away before measuring")
+    parser.add_argument("--repeat", type=int, default=15, help="samples per benchmark and size")
+    parser.add_argument("--min-time", type=float, default=2.0, help="minimal duration of one sample in ms")
+    parser.add_argument("--quick", action="store_true", help="only run the smallest size of every benchmark")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare the results with this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown that fails the comparison")
+    parser.add_argument("--list", action="store_true", help="list the benchmark names and exit")
+    options = parser.parse_args(arguments)
+
+    if options.list:
+        print("\n".join(get_benchmark_names()))
+        uncovered = get_uncovered_functions()
+        if uncovered:
+            print(f"\nNo benchmark for: {', '.join(uncovered)}")
+        return 1 if uncovered else 0
+    results = run_suite(options.filter, options.warmup, options.repeat, int(options.min_time * 1e6), options.quick,
+                        print)
+    if options.output:
+        save_results(results, options.output)
+    if not options.baseline:
+        return 0
+
+    print(f"\nComparison with {options.baseline} (threshold {options.threshold:.0%})")
+    comparisons = compare(results, load_results(options.baseline), options.threshold)
+    for name, size, before, after, change, regression in comparisons:
+        marker = "REGRESSION" if regression else ""
+        print(f"{name:<32} {size:>10} {before / 1000:>12.2f} us -> {after / 1000:>12.2f} us  {change:>+8.1%}  {marker}")
+    regressions = sum(1 for comparison in comparisons if comparison[5])
+    print(f"\n{regressions} regression(s) in {len(comparisons)} comparisons")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Brute Force Engine
+
+# A brute force attack tries all possible inputs until one produces the wanted hash (see examples/attacks/hashing)
+# The naive way builds every candidate string and hashes it from the start
+# But all hash functions of toycrypt.hashing work character by character from left to right:
+# Candidates that share a prefix (e.g. "abca" and "abcb") also share the values after hashing that prefix
+# So we walk the keyspace like an odometer and keep the values (hash_num and state) of every prefix length
+# Changing the last character then costs a single hash step instead of hashing the whole string again
+# Only when a position "rolls over" (like 09 -> 10) the values after that position have to be recomputed
+
+# The keyspace is ordered like itertools.product(chars, repeat=length)
+# This means candidate number i is the number i written in base len(chars) with the chars as digits
+# mask_attack() searches a Mask of toycrypt.keyspace the same way - there every position has its own charset
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from toycrypt.hashing import Hash, get_hasher
+from toycrypt import keyspace
+from toycrypt.keyspace import Mask
+from toycrypt.telemetry import ProgressReporter
+
+_PROGRESS_BATCH = 1 << 18  # Candidates searched between two progress updates
+
+
+class BruteForceResult:
+    """
+    The outcome of a brute force search
+    """
+    _preimage: str | None  # The found input or None if nothing was found
+    _index: int | None  # Position of the preimage in the keyspace of its length
+    _attempts: int  # How many candidates were hashed (including the match)
+
+    def __init__(self, preimage: str | None, index: int | None, attempts: int):
+        self._preimage = preimage
+        self._index = index
+        self._attempts = attempts
+
+    def __str__(self):
+        if self._preimage is None:
+            return f"No preimage found after {self._attempts} attempts"
+        return f"Found preimage '{self._preimage}' after {self._attempts} attempts"
+
+    def is_found(self) -> bool:
+        return self._preimage is not None
+
+    def get_preimage(self) -> str | None:
+        return self._preimage
+
+    def get_index(self) -> int | None:
+        return self._index
+
+    def get_attempts(self) -> int:
+        return self._attempts
+
+
+def index_to_digits(index: int, base: int, length: int) -> [int]:
+    """Returns the digits of index in the given base with exactly length digits (most significant first)"""
+    return keyspace.index_to_digits(index, [base] * length)
+
+
+def _get_target(target) -> int:
+    return target.get_hash() if isinstance(target, Hash) else target
+
+
+def search_range(hash_function, target, chars, length: int, start: int = 0, end: int | None = None) -> BruteForceResult:
+    """
+    Searches the candidates with index start <= i < end of all strings with the given length for a preimage
+    :param hash_function: one of the hash functions of toycrypt.hashing
+    :param target: the wanted hash as hash object or number
+    :param chars: the allowed characters
+    :param length: length of the candidates (at least 1)
+    :param start: index of the first candidate
+    :param end: index after the last candidate (defaults to the whole keyspace)
+    :return: the result with the first preimage in this range
+    """
+    if length < 1:
+        raise ValueError("length must be at least 1")
+    return _search_positions(hash_function, _get_target(target), [chars] * length, start, end)
+
+
+def _search_positions(hash_function, target: int, charsets: [str], start: int, end: int | None) -> BruteForceResult:
+    # Like search_range, but every position has its own charset (the keyspace of one length of a Mask)
+    hasher = get_hasher(hash_function)
+    step = hasher.step
+    codes = [[ord(char) for char in charset] for charset in charsets]
+    bases = [len(position_codes) for position_codes in codes]
+    length = len(charsets)
+    size = 1
+    for base in bases:
+        size *= base
+    end = size if end is None else min(end, size)
+    if start >= end:
+        return BruteForceResult(None, None, 0)
+
+    digits = keyspace.index_to_digits(start, bases)
+    last = length - 1  # The innermost position that changes with every candidate
+    last_codes = codes[last]
+    last_base = bases[last]
+
+    # hash_nums[i] and states[i] are the values after hashing the first i characters of the current candidate
+    hash_nums = [0] * length
+    states = [0] * length
+    hash_nums[0], states[0] = hasher.get_values()
+    for i in range(last):
+        hash_nums[i + 1], states[i + 1] = step(hash_nums[i], states[i], codes[i][digits[i]])
+
+    index = start
+    while True:
+        # Try all characters at the last position with the shared prefix values
+        hash_num, state = hash_nums[last], states[last]
+        first = digits[last]
+        stop = min(last_base, first + end - index)
+        for digit in range(first, stop):
+            if step(hash_num, state, last_codes[digit])[0] == target:
+                digits[last] = digit
+                found = index + digit - first
+                preimage = ''.join(charset[d] for charset, d in zip(charsets, digits))
+                return BruteForceResult(preimage, found, found - start + 1)
+        index += stop - first
+        if index >= end:
+            return BruteForceResult(None, None, index - start)
+
+        # Roll over: increase the next position to the left until one does not overflow
+        digits[last] = 0
+        position = last - 1
+        while digits[position] == bases[position] - 1:
+            digits[position] = 0
+            position -= 1
+        digits[position] += 1
+        # Only the prefix values from the changed position onwards have to be recomputed
+        for i in range(position, last):
+            hash_nums[i + 1], states[i + 1] = step(hash_nums[i], states[i], codes[i][digits[i]])
+
+
+def brute_force(hash_function, target, chars, min_length: int = 1, max_length: int = 10,
+                max_attempts: int | None = None, progress: ProgressReporter | None = None) -> BruteForceResult:
+    """
+    Tries all strings from min_length up to max_length characters (shortest first) until one hashes to the target
+    :param hash_function: one of the hash functions of toycrypt.hashing
+    :param target: the wanted hash as hash object or number
+    :param chars: the allowed characters
+    :param min_length: length of the shortest candidates
+    :param max_length: length of the longest candidates
+    :param max_attempts: stop after this many candidates (None for no limit)
+    :param progress: receives progress updates - the keyspace is then searched in batches
+    :return: the result with the first found preimage
+    """
+    if progress is not None:
+        total = sum(pow(len(chars), length) for length in range(min_length, max_length + 1))
+        progress.start(total if max_attempts is None else min(total, max_attempts))
+    attempts = 0
+    result = BruteForceResult(None, None, 0)
+    for length in range(min_length, max_length + 1):
+        end = pow(len(chars), length) if max_attempts is None else max_attempts - attempts
+        if progress is None:
+            result = search_range(hash_function, target, chars, length, 0, end)
+            attempts += result.get_attempts()
+        else:
+            for batch_start in range(0, min(end, pow(len(chars), length)), _PROGRESS_BATCH):
+                result = search_range(hash_function, target, chars, length, batch_start,
+                                      min(batch_start + _PROGRESS_BATCH, end))
+                attempts += result.get_attempts()
+                progress.update(attempts)
+                if result.is_found():
+                    break
+        if result.is_found() or (max_attempts is not None and attempts >= max_attempts):
+            break
+    if progress is not None:
+        progress.finish(attempts)
+    if result.is_found():
+        return BruteForceResult(result.get_preimage(), result.get_index(), attempts)
+    return BruteForceResult(None, None, attempts)
+
+
+def mask_attack(hash_function, target, mask: Mask, start: int = 0, end: int | None = None,
+                progress: ProgressReporter | None = None) -> BruteForceResult:
+    """
+    Tries the candidates of a mask with index start <= i < end (in the order of the mask) until one hashes to the target
+    The index range makes it easy to resume a search or to split it between machines (see Mask.split())
+    :param hash_function: one of the hash functions of toycrypt.hashing
+    :param target: the wanted hash as hash object or number
+    :param mask: the keyspace to search
+    :param start: index of the first candidate
+    :param end: index after the last candidate (defaults to the whole mask)
+    :param progress: receives progress updates - the keyspace is then searched in batches
+    :return: the result with the first found preimage and its index in the mask
+    """
+    target = _get_target(target)
+    end = mask.get_size() if end is None else min(end, mask.get_size())
+    if progress is not None:
+        progress.start(max(end - start, 0))
+    attempts = 0
+    result = BruteForceResult(None, None, 0)
+    charsets = mask.get_charsets()
+    for length in mask.get_lengths():
+        offset, length_end = mask.get_length_range(length)
+        local_start, local_end = max(start, offset) - offset, min(end, length_end) - offset
+        batch_size = _PROGRESS_BATCH if progress is not None else max(local_end - local_start, 1)
+        for batch_start in range(local_start, local_end, batch_size):
+            result = _search_positions(hash_function, target, charsets[:length], batch_start,
+                                       min(batch_start + batch_size, local_end))
+            attempts += result.get_attempts()
+            if progress is not None:
+                progress.update(attempts)
+            if result.is_found():
+                break
+        if result.is_found():
+            break
+    if progress is not None:
+        progress.finish(attempts)
+    if result.is_found():
+        return BruteForceResult(result.get_preimage(), offset + result.get_index(), attempts)
+    return BruteForceResult(None, None, attempts)
+
+
+# Parallel Brute Force
+
+# Every candidate can be checked independently, so the keyspace can be split into shards (index ranges)
+# that are searched by different processes at the same time
+# Only about two shards per worker are submitted at a time, so huge keyspaces do not create millions of tasks
+# Long runs should survive being interrupted: after every completed shard a small checkpoint file is written
+# It stores a watermark (all shards below are done) and the few completed shards above it
+# When started again with the same parameters, the completed shards are skipped
+
+class ParallelBruteForceResult(BruteForceResult):
+    """
+    The outcome of a parallel brute force search including the aggregated speed of all workers
+    """
+    _elapsed: float  # Wall clock time in seconds
+    _completed_shards: int  # Number of shards that were fully searched (including ones from the checkpoint)
+
+    def __init__(self, preimage: str | None, index: int | None, attempts: int, elapsed: float,
+                 completed_shards: int):
+        super().__init__(preimage, index, attempts)
+        self._elapsed = elapsed
+        self._completed_shards = completed_shards
+
+    def __str__(self):
+        return f"{super().__str__()} ({self.get_hashes_per_second():,.0f} hashes/s)"
+
+    def get_elapsed(self) -> float:
+        return self._elapsed
+
+    def get_completed_shards(self) -> int:
+        return self._completed_shards
+
+    def get_hashes_per_second(self) -> float:
+        return self._attempts / self._elapsed if self._elapsed > 0 else 0.0
+
+
+_stop_event = None  # Set in each worker process - signals that another worker found a preimage
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _search_shard(hash_function, target: int, chars, length: int, shard: int, start: int, end: int,
+                  batch_size: int) -> (int, BruteForceResult):
+    # Search the shard in smaller batches, so the worker notices quickly when another one was successful
+    attempts = 0
+    for batch_start in range(start, end, batch_size):
+        if _stop_event.is_set():
+            break
+        result = search_range(hash_function, target, chars, length, batch_start, min(batch_start + batch_size, end))
+        attempts += result.get_attempts()
+        if result.is_found():
+            return shard, BruteForceResult(result.get_preimage(), result.get_index(), attempts)
+    return shard, BruteForceResult(None, None, attempts)
+
+
+class _Checkpoint:
+    """
+    The completed shards: all shards below the watermark and the few completed ones above it
+    Shards finish almost in order, so the set above the watermark stays small and so does the file
+    """
+    _watermark: int
+    _completed: set[int]
+
+    def __init__(self, watermark: int = 0, completed: [int] = ()):
+        self._watermark = watermark
+        self._completed = set(completed)
+        self._advance()
+
+    def __contains__(self, shard: int):
+        return shard < self._watermark or shard in self._completed
+
+    def __len__(self):
+        return self._watermark + len(self._completed)
+
+    def get_watermark(self) -> int:
+        return self._watermark
+
+    def get_above_watermark(self) -> [int]:
+        return sorted(self._completed)
+
+    def add(self, shard: int):
+        if shard >= self._watermark:
+            self._completed.add(shard)
+            self._advance()
+
+    def _advance(self):
+        while self._watermark in self._completed:
+            self._completed.remove(self._watermark)
+            self._watermark += 1
+
+    def to_dict(self) -> dict:
+        return {"watermark": self._watermark, "completed": self.get_above_watermark()}
+
+
+def _load_checkpoint(path: str | None, parameters: dict) -> _Checkpoint:
+    if path is None or not os.path.exists(path):
+        return _Checkpoint()
+    with open(path) as file:
+        checkpoint = json.load(file)
+    if checkpoint["parameters"] != parameters:
+        raise ValueError("Checkpoint was written for a different search")
+    return _Checkpoint(checkpoint.get("watermark", 0), checkpoint["completed"])
+
+
+def _save_checkpoint(path: str | None, parameters: dict, completed: _Checkpoint):
+    if path is None:
+        return
+    # Write to a temporary file first, so a killed run never leaves a half written checkpoint
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump({"parameters": parameters, **completed.to_dict()}, file)
+    os.replace(temp_path, path)
+
+
+def parallel_brute_force(hash_function, target, chars, length: int, workers: int | None = None,
+                         shard_size: int = 1_000_000, checkpoint_path: str | None = None,
+                         batch_size: int = 100_000,
+                         progress: ProgressReporter | None = None) -> ParallelBruteForceResult:
+    """
+    Searches all strings of the given length for a preimage using multiple processes
+    The keyspace is split into shards of shard_size candidates, all workers stop as soon as one finds a preimage
+    :param hash_function: one of the hash functions of toycrypt.hashing
+    :param target: the wanted hash as hash object or number
+    :param chars: the allowed characters
+    :param length: length of the candidates
+    :param workers: number of processes (defaults to the number of CPUs)
+    :param shard_size: how many candidates each shard contains
+    :param checkpoint_path: file that records completed shards - an existing checkpoint is resumed
+    :param batch_size: how many candidates a worker tries before checking if it should stop
+    :param progress: receives an update after every finished shard
+    :return: the result with the found preimage and the aggregated hashes per second
+    """
+    target = _get_target(target)
+    size = pow(len(chars), length)
+    shards = (size + shard_size - 1) // shard_size
+    parameters = {"hash_function": hash_function.__name__, "target": target, "chars": ''.join(chars),
+                  "length": length, "shard_size": shard_size}
+    completed = _load_checkpoint(checkpoint_path, parameters)
+
+    def shard_size_of(shard: int) -> int:
+        return min((shard + 1) * shard_size, size) - shard * shard_size
+
+    if progress is not None:
+        progress.start(size - min(completed.get_watermark() * shard_size, size)
+                       - sum(shard_size_of(shard) for shard in completed.get_above_watermark()))
+    start_time = time.perf_counter()
+    attempts = 0
+    found: BruteForceResult | None = None
+    # Only a few shards per worker are submitted at once - a new one whenever one finishes
+    pending = (shard for shard in range(completed.get_watermark(), shards) if shard not in completed)
+    in_flight_limit = 2 * (workers or os.cpu_count() or 1)
+    with multiprocessing.Manager() as manager:
+        stop_event = manager.Event()
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stop_event,)) as executor:
+            in_flight = set()
+            while True:
+                if found is None:
+                    for shard in islice(pending, in_flight_limit - len(in_flight)):
+                        in_flight.add(executor.submit(_search_shard, hash_function, target, chars, length, shard,
+                                                      shard * shard_size, shard * shard_size + shard_size_of(shard),
+                                                      batch_size))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard, result = future.result()
+                    attempts += result.get_attempts()
+                    if progress is not None:
+                        progress.update(attempts)
+                    if result.is_found():
+                        if found is None or result.get_index() < found.get_index():
+                            found = result
+                        stop_event.set()  # The shards still in flight stop at their next batch
+                    elif result.get_attempts() == shard_size_of(shard):
+                        # Only record shards that were searched completely (not stopped early)
+                        completed.add(shard)
+                        _save_checkpoint(checkpoint_path, parameters, completed)
+    elapsed = time.perf_counter() - start_time
+    if progress is not None:
+        progress.finish(attempts)
+
+    if found is None:
+        return ParallelBruteForceResult(None, None, attempts, elapsed, len(completed))
+    return ParallelBruteForceResult(found.get_preimage(), found.get_index(), attempts, elapsed, len(completed))
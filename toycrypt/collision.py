@@ -0,0 +1,211 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Collision Search
+
+# A collision attack needs any two different inputs with the same hash (see examples/attacks/hashing/collision.py)
+# Storing every hash until one repeats needs memory for about sqrt(2^bits) hashes (birthday bound)
+# Instead we walk through the keyspace with the function f(x) = reduce(hash(x)) starting at any input x0:
+#       x0 -> x1 = f(x0) -> x2 = f(x1) -> ...
+# As the keyspace is finite the walk must eventually repeat and run in a cycle (shaped like the greek letter rho)
+# The point where the tail enters the cycle is reached from two different inputs - one on the tail, one on the cycle
+# Those two inputs have the same f value and (if reduce does not lose information) the same hash
+# Finding that point only needs a few variables using Brent's cycle finding algorithm
+# https://en.wikipedia.org/wiki/Cycle_detection
+
+# For the parallel version every process walks from random starts until it hits a "distinguished point"
+# (an input whose index has the lowest bits all zero) and reports only the start and end of that trail
+# When two trails end in the same distinguished point, they merged somewhere - right at a collision
+# https://en.wikipedia.org/wiki/Pollard%27s_rho_algorithm (parallel collision search by van Oorschot and Wiener)
+
+import multiprocessing
+import random
+
+from toycrypt.bruteforce import index_to_digits
+from toycrypt.hashing import get_hasher
+
+
+class CollisionResult:
+    """
+    Two different inputs with the same hash
+    """
+    _first: str
+    _second: str
+    _hash: int
+    _steps: int  # Number of evaluations of the walk function
+
+    def __init__(self, first: str, second: str, hash_num: int, steps: int):
+        self._first = first
+        self._second = second
+        self._hash = hash_num
+        self._steps = steps
+
+    def __str__(self):
+        return f"Inputs '{self._first}' and '{self._second}' both hash to {self._hash} ({self._steps} steps)"
+
+    def get_inputs(self) -> (str, str):
+        return self._first, self._second
+
+    def get_hash(self) -> int:
+        return self._hash
+
+    def get_steps(self) -> int:
+        return self._steps
+
+
+class _Walk:
+    """
+    The walk function f(x) = reduce(hash(x)) over the indices of all strings with the given length
+    The reduction is simply hash mod keyspace size - it loses no information if the keyspace is larger than the hashes
+    """
+
+    def __init__(self, hash_function, chars: str, length: int):
+        hasher = get_hasher(hash_function)
+        self.step = hasher.step
+        self.initial = hasher.get_values()
+        self.chars = chars
+        self.codes = [ord(char) for char in chars]
+        self.length = length
+        self.size = pow(len(chars), length)
+        self.calls = 0
+
+    def hash(self, index: int) -> int:
+        hash_num, state = self.initial
+        for digit in index_to_digits(index, len(self.codes), self.length):
+            hash_num, state = self.step(hash_num, state, self.codes[digit])
+        return hash_num
+
+    def __call__(self, index: int) -> int:
+        self.calls += 1
+        return self.hash(index) % self.size
+
+    def to_string(self, index: int) -> str:
+        return ''.join(self.chars[digit] for digit in index_to_digits(index, len(self.codes), self.length))
+
+
+def _brent(walk: _Walk, start: int) -> (int, int):
+    # Returns the two different inputs with the same hash where the walk enters its cycle (None if there are none)
+    # Find the cycle length with Brent's algorithm - the hare searches in windows of increasing powers of two
+    power = cycle = 1
+    tortoise = start
+    hare = walk(start)
+    while tortoise != hare:
+        if power == cycle:
+            tortoise = hare
+            power *= 2
+            cycle = 0
+        hare = walk(hare)
+        cycle += 1
+
+    # Put the hare one cycle length ahead - then both meet exactly at the entry of the cycle
+    tortoise = hare = start
+    for _ in range(cycle):
+        hare = walk(hare)
+    if tortoise == hare:
+        return None  # The start is already on the cycle - there is no tail that leads into it
+    while True:
+        next_tortoise, next_hare = walk(tortoise), walk(hare)
+        if next_tortoise == next_hare:
+            return tortoise, hare  # Different inputs that lead to the same point
+        tortoise, hare = next_tortoise, next_hare
+
+
+def find_collision(hash_function, chars: str, length: int, seed: int | None = None,
+                   max_tries: int = 100) -> CollisionResult | None:
+    """
+    Finds two different inputs of the given length that have the same hash using constant memory
+    :param hash_function: one of the hash functions of toycrypt.hashing
+    :param chars: the allowed characters
+    :param length: length of the inputs
+    :param seed: seed of the random start points
+    :param max_tries: how many start points are tried (a start directly on the cycle gives no collision)
+    :return: the collision or None if no collision was found
+    """
+    walk = _Walk(hash_function, chars, length)
+    generator = random.Random(seed)
+    for _ in range(max_tries):
+        pair = _brent(walk, generator.randrange(walk.size))
+        if pair is None:
+            continue
+        first, second = pair
+        hash_num = walk.hash(first)
+        if hash_num == walk.hash(second):  # Otherwise the reduction caused the collision - try again
+            return CollisionResult(walk.to_string(first), walk.to_string(second), hash_num, walk.calls)
+    return None
+
+
+def _walk_trails(hash_function, chars: str, length: int, distinguished_bits: int, trails: int,
+                 seed: int) -> ([(int, int, int)], int):
+    # Worker: walk from random starts until a distinguished point is reached, return (start, end, length) of each trail
+    walk = _Walk(hash_function, chars, length)
+    generator = random.Random(seed)
+    mask = (1 << distinguished_bits) - 1
+    max_length = 20 << distinguished_bits  # Give up on trails that are stuck in a cycle without distinguished points
+    result = []
+    for _ in range(trails):
+        start = point = generator.randrange(walk.size)
+        for steps in range(1, max_length + 1):
+            point = walk(point)
+            if point & mask == 0:
+                result.append((start, point, steps))
+                break
+    return result, walk.calls
+
+
+def _merge_trails(walk: _Walk, first: (int, int), second: (int, int)) -> (int, int):
+    # Two trails (start, length) end in the same point - walk them in lockstep until they merge
+    # Returns the two inputs right before the merge (None if one trail is part of the other)
+    (a, a_length), (b, b_length) = first, second
+    if a_length < b_length:
+        (a, a_length), (b, b_length) = (b, b_length), (a, a_length)
+    for _ in range(a_length - b_length):
+        a = walk(a)
+    while a != b:
+        next_a, next_b = walk(a), walk(b)
+        if next_a == next_b:
+            return a, b
+        a, b = next_a, next_b
+    return None  # One trail starts on the other one - no collision
+
+
+def parallel_find_collision(hash_function, chars: str, length: int, workers: int | None = None,
+                            distinguished_bits: int = 8, trails_per_task: int = 64, seed: int = 0,
+                            max_tasks: int = 100_000) -> CollisionResult | None:
+    """
+    Finds two different inputs of the given length that have the same hash using multiple processes
+    Only the distinguished endpoints of the trails are stored - about 2^-distinguished_bits of all visited points
+    :param hash_function: one of the hash functions of toycrypt.hashing
+    :param chars: the allowed characters
+    :param length: length of the inputs
+    :param workers: number of processes (defaults to the number of CPUs)
+    :param distinguished_bits: how many low bits of a distinguished point are zero (average trail length is 2^bits)
+    :param trails_per_task: how many trails a worker walks before reporting them
+    :param seed: seed of the random start points
+    :param max_tasks: stop after this many tasks
+    :return: the collision or None if no collision was found
+    """
+    walk = _Walk(hash_function, chars, length)
+    endpoints: {int: (int, int)} = {}  # Maps a distinguished point to the (start, length) of a trail ending there
+    steps = 0
+    tasks = ((hash_function, chars, length, distinguished_bits, trails_per_task, seed * max_tasks + task)
+             for task in range(max_tasks))
+    with multiprocessing.Pool(workers) as pool:
+        for trails, calls in pool.imap_unordered(_walk_trails_task, tasks):
+            steps += calls
+            for start, end, trail_length in trails:
+                if end not in endpoints:
+                    endpoints[end] = (start, trail_length)
+                    continue
+                pair = _merge_trails(walk, endpoints[end], (start, trail_length))
+                if pair is None:
+                    continue
+                first, second = pair
+                hash_num = walk.hash(first)
+                if hash_num == walk.hash(second):
+                    pool.terminate()
+                    return CollisionResult(walk.to_string(first), walk.to_string(second), hash_num,
+                                           steps + walk.calls)
+    return None
+
+
+def _walk_trails_task(arguments: tuple) -> ([(int, int, int)], int):
+    return _walk_trails(*arguments)
@@ -0,0 +1,192 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Cryptanalysis of the repeating key XOR cipher
+
+# encrypt_xor repeats the key every key_bytes bytes. This makes the cipher easy to break for natural text:
+#       1. Find the key length: split the cipher text into columns of every key_bytes-th byte
+#          With the right length each column is encrypted with a single key byte and keeps the uneven letter
+#          distribution of the text ("e" and space are frequent). This is measured by
+#               - the index of coincidence: the chance that two random bytes of a column are equal
+#               - the normalized Hamming distance: how many bits differ between neighbouring blocks of key_bytes bytes
+#                 (the key cancels out in the XOR of two blocks, leaving the XOR of two text blocks which has few bits)
+#       2. Find each key byte: try all 256 values on its column and keep the one that produces the most text-like bytes
+# Everything is computed with NumPy on whole arrays of byte counts, no byte is looked at in a Python loop
+# crack_many() concatenates all cipher texts and scores them together: per key length one bincount over
+# (text, column, byte) gives the column counts of every text. This needs one index array of the size of the data
+# per key length, so the texts are processed in groups of _BATCH_CELLS count cells
+# https://en.wikipedia.org/wiki/Index_of_coincidence
+
+import numpy as np
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)  # Number of set bits of each byte
+_XOR_INDEX = np.bitwise_xor.outer(np.arange(256), np.arange(256))  # _XOR_INDEX[k, b] = k ^ b
+_BATCH_CELLS = 1 << 22  # Column count cells (texts * key bytes * 256) crack_many computes at once
+
+# Relative frequency of letters in English text (in percent) - https://en.wikipedia.org/wiki/Letter_frequency
+_LETTER_FREQUENCIES = {
+    "a": 8.2, "b": 1.5, "c": 2.8, "d": 4.3, "e": 12.7, "f": 2.2, "g": 2.0, "h": 6.1, "i": 7.0, "j": 0.15,
+    "k": 0.77, "l": 4.0, "m": 2.4, "n": 6.7, "o": 7.5, "p": 1.9, "q": 0.095, "r": 6.0, "s": 6.3, "t": 9.1,
+    "u": 2.8, "v": 0.98, "w": 2.4, "x": 0.15, "y": 2.0, "z": 0.074,
+}
+
+
+def _text_weights() -> np.ndarray:
+    # Log-likelihood of each byte value in English text - non-printable bytes are very unlikely
+    frequencies = np.full(256, 1e-6)
+    frequencies[32:127] = 0.05  # Printable characters like digits and punctuation
+    frequencies[ord("\n")] = frequencies[ord("\t")] = 0.5
+    frequencies[ord(" ")] = 15.0
+    for letter, frequency in _LETTER_FREQUENCIES.items():
+        frequencies[ord(letter)] = frequency
+        frequencies[ord(letter.upper())] = frequency / 10
+    return np.log(frequencies / frequencies.sum())
+
+
+_TEXT_WEIGHTS = _text_weights()
+_KEY_WEIGHTS = _TEXT_WEIGHTS[_XOR_INDEX]  # _KEY_WEIGHTS[c, k] = weight of the text byte c ^ k
+
+
+def _as_array(cipher_text) -> np.ndarray:
+    if isinstance(cipher_text, str):
+        cipher_text = cipher_text.encode("latin-1")  # encrypt_xor keeps latin-1 text within single bytes
+    return np.frombuffer(cipher_text, dtype=np.uint8)
+
+
+def _concatenate(cipher_texts) -> (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+    """Returns all bytes, the text number and the position within its text of every byte and the text lengths"""
+    arrays = [_as_array(cipher_text) for cipher_text in cipher_texts]
+    lengths = np.array([len(array) for array in arrays], dtype=np.int64)
+    data = np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.uint8)
+    owner = np.repeat(np.arange(len(arrays)), lengths)
+    local = np.arange(len(data)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return data, owner, local, lengths
+
+
+def _column_counts(data: np.ndarray, owner: np.ndarray, local: np.ndarray, texts: int, key_bytes: int) -> np.ndarray:
+    """Returns how often each byte value appears in each column of each text - shape (texts, key_bytes, 256)"""
+    cells = (owner * key_bytes + local % key_bytes) * 256 + data
+    return np.bincount(cells, minlength=texts * key_bytes * 256).reshape(texts, key_bytes, 256)
+
+
+def _hamming_distances(data: np.ndarray, owner: np.ndarray, local: np.ndarray, lengths: np.ndarray,
+                       key_bytes: int, max_blocks: int = 64) -> np.ndarray:
+    """Returns the normalized Hamming distance of every text (inf for texts shorter than two blocks)"""
+    blocks = np.minimum(lengths // key_bytes, max_blocks)
+    positions = np.flatnonzero((local >= key_bytes) & (local < (blocks * key_bytes)[owner]))
+    bits = np.bincount(owner[positions], weights=_POPCOUNT[data[positions] ^ data[positions - key_bytes]],
+                       minlength=len(lengths))
+    compared = (blocks - 1) * key_bytes
+    return np.divide(bits, compared, out=np.full(len(lengths), np.inf), where=blocks >= 2)
+
+
+def _coincidences(counts: np.ndarray) -> np.ndarray:
+    """Returns the index of coincidence of every text averaged over its columns with more than one byte"""
+    counts = counts.astype(np.float64)
+    sizes = counts.sum(axis=2)
+    valid = sizes > 1
+    ratios = np.divide((counts * (counts - 1)).sum(axis=2), sizes * (sizes - 1), out=np.zeros_like(sizes),
+                       where=valid)
+    columns = valid.sum(axis=1)
+    return np.divide(ratios.sum(axis=1), columns, out=np.zeros(len(counts)), where=columns > 0)
+
+
+def _estimate_key_lengths(data: np.ndarray, owner: np.ndarray, local: np.ndarray, lengths: np.ndarray,
+                          max_key_bytes: int, candidates: int) -> np.ndarray:
+    """estimate_key_length for every text at once - each key length is scored for all texts in one pass"""
+    texts = len(lengths)
+    distances = np.column_stack([_hamming_distances(data, owner, local, lengths, key_bytes)
+                                 for key_bytes in range(1, max_key_bytes + 1)]).reshape(texts, max_key_bytes)
+    # The candidates of every text: its lengths with the lowest distances (shorter lengths win ties)
+    best = np.argsort(distances, axis=1, kind="stable")[:, :candidates]
+    is_candidate = np.zeros((texts, max_key_bytes), dtype=bool)
+    np.put_along_axis(is_candidate, best, True, axis=1)
+    coincidences = np.full((texts, max_key_bytes), -np.inf)
+    for key_bytes in range(1, max_key_bytes + 1):
+        selected = is_candidate[:, key_bytes - 1]
+        coincidences[selected, key_bytes - 1] = _coincidences(
+            _column_counts(data, owner, local, texts, key_bytes)[selected])
+    # The shortest candidate close to the best one - multiples of the real length score as well as the real length
+    close = coincidences >= 0.9 * coincidences.max(axis=1, keepdims=True)
+    return close.argmax(axis=1) + 1
+
+
+def _recover_keys(data: np.ndarray, owner: np.ndarray, local: np.ndarray, key_lengths: np.ndarray) -> [int]:
+    """recover_key for every text at once - all texts with the same key length are scored together"""
+    keys = [0] * len(key_lengths)
+    for key_bytes in np.unique(key_lengths).tolist():
+        texts = np.flatnonzero(key_lengths == key_bytes)
+        number = np.zeros(len(key_lengths), dtype=np.int64)
+        number[texts] = np.arange(len(texts))
+        positions = np.flatnonzero(key_lengths[owner] == key_bytes)
+        counts = _column_counts(data[positions], number[owner[positions]], local[positions], len(texts), key_bytes)
+        # scores[text, column, k] = sum over cipher bytes c of count[text, column, c] * weight[c ^ k]
+        found = (counts.astype(np.float64) @ _KEY_WEIGHTS).argmax(axis=2).astype(np.uint8)
+        for text, key in zip(texts.tolist(), found):
+            keys[text] = int.from_bytes(bytes(key), "little")
+    return keys
+
+
+def hamming_distance(a, b) -> int:
+    """Returns the number of bits that differ between two byte sequences of the same length"""
+    return int(_POPCOUNT[np.bitwise_xor(_as_array(a), _as_array(b))].sum(dtype=np.int64))
+
+
+def normalized_hamming_distance(cipher_text, key_bytes: int, max_blocks: int = 64) -> float:
+    """Returns the average number of differing bits per byte between neighbouring blocks of key_bytes bytes"""
+    data, owner, local, lengths = _concatenate([cipher_text])
+    return float(_hamming_distances(data, owner, local, lengths, key_bytes, max_blocks)[0])
+
+
+def index_of_coincidence(cipher_text, key_bytes: int) -> float:
+    """Returns the average index of coincidence of all columns when the key repeats every key_bytes bytes"""
+    data, owner, local, _ = _concatenate([cipher_text])
+    return float(_coincidences(_column_counts(data, owner, local, 1, key_bytes))[0])
+
+
+def estimate_key_length(cipher_text, max_key_bytes: int = 16, candidates: int = 6) -> int:
+    """
+    Returns the most likely number of key bytes
+    The lengths with the lowest normalized Hamming distance are compared by their index of coincidence
+    Multiples of the real length score as well as the real length - so the shortest length close to the best is chosen
+    :param cipher_text: the encrypted bytes (or latin-1 string)
+    :param max_key_bytes: the longest key length that is considered
+    :param candidates: how many lengths with the best Hamming distance are compared
+    """
+    return int(_estimate_key_lengths(*_concatenate([cipher_text]), max_key_bytes, candidates)[0])
+
+
+def recover_key(cipher_text, key_bytes: int) -> int:
+    """
+    Returns the key (as used by encrypt_xor) that turns the cipher text into the most English-like text
+    All 256 candidates of all key bytes are scored at once: decrypting a column with key byte k turns the count of
+    cipher byte c into the count of text byte c ^ k, so the score is a matrix product with the permuted text weights
+    """
+    data, owner, local, _ = _concatenate([cipher_text])
+    return _recover_keys(data, owner, local, np.array([key_bytes]))[0]
+
+
+def crack_xor(cipher_text, max_key_bytes: int = 16) -> (int, int):
+    """
+    Recovers the key of a cipher text encrypted with encrypt_xor or encrypt_xor_bytes
+    :return: the secret key and the number of key bytes
+    """
+    return crack_many([cipher_text], max_key_bytes)[0]
+
+
+def crack_many(cipher_texts, max_key_bytes: int = 16) -> [(int, int)]:
+    """
+    Recovers the key of each cipher text (see crack_xor)
+    The texts are scored together: one pass over all of them per key length instead of one per text
+    :param cipher_texts: any number of cipher texts of any lengths
+    :param max_key_bytes: the longest key length that is considered
+    :return: the secret key and the number of key bytes of every cipher text
+    """
+    cipher_texts = list(cipher_texts)
+    group_size = max(1, _BATCH_CELLS // (max_key_bytes * 256))
+    results = []
+    for start in range(0, len(cipher_texts), group_size):
+        data, owner, local, lengths = _concatenate(cipher_texts[start:start + group_size])
+        key_lengths = _estimate_key_lengths(data, owner, local, lengths, max_key_bytes, 6)
+        keys = _recover_keys(data, owner, local, key_lengths)
+        results.extend(zip(keys, key_lengths.tolist()))
+    return results
@@ -1,7 +1,12 @@
 #  SPDX-License-Identifier: GPL-3.0-only
 
-from toycrypt import toymath
-from util import xor, decimal2hex, hex2decimal
+import mmap
+import os
+
+import numpy as np
+
+from toycrypt import modexp
+from toycrypt.util import xor, decimal2hex, hex2decimal
 
 
 class Key:
@@ -13,6 +18,17 @@ class Key:
     def __str__(self):
         return decimal2hex(self._number)
 
+    def __eq__(self, other):
+        if not isinstance(other, Key):
+            return False
+        return self._number == other._number
+
+    def __hash__(self):
+        return hash(self._number)
+
+    def get_number(self) -> int:
+        return self._number
+
 
 class KeyPair:
     _public: Key
@@ -25,6 +41,12 @@ class KeyPair:
     def __str__(self):
         return f"Private:{self._private} / Public:{self._public}"
 
+    def get_private(self) -> Key:
+        return self._private
+
+    def get_public(self) -> Key:
+        return self._public
+
 
 def encrypt_xor(input_string: str, secret_key: int, key_bytes: int = 4) -> str:
     """
@@ -35,15 +57,15 @@ def encrypt_xor(input_string: str, secret_key: int, key_bytes: int = 4) -> str:
     :param key_bytes: after how many bytes the key is repeated
     :return: the encrypted string
     """
-    output = ""
+    output = []  # Collect the characters and join them once - adding to a string copies it every time
     key_index = 0
     for byte in input_string:
         input_byte: int = ord(byte)
         key_byte = (secret_key >> 8 * key_index) & 0xFF  # Extract the first byte
         cypher_byte = xor(input_byte, key_byte)
-        output += chr(cypher_byte)
+        output.append(chr(cypher_byte))
         key_index = (key_index + 1) % key_bytes  # Repeat the key
-    return output
+    return ''.join(output)
 
 
 def decrypt_xor(cipher_text: str, secret_key: int, key_length: int = 4) -> str:
@@ -59,12 +81,94 @@ def decrypt_xor(cipher_text: str, secret_key: int, key_length: int = 4) -> str:
     return encrypt_xor(cipher_text, secret_key, key_length)
 
 
+# XOR on binary data
+
+# The functions above work on strings one character at a time
+# For binary data the whole buffer can be processed at once: the key repeats every key_bytes bytes,
+# so viewing the data as rows of key_bytes bytes lets NumPy XOR every row with the key in a single operation
+# Input and output are accessed through buffer views - nothing is copied and no keystream is allocated
+
+def xor_key(secret_key: int, key_bytes: int = 4) -> np.ndarray:
+    """Returns the key bytes in the order they are applied (lowest byte first - the same as encrypt_xor)"""
+    key = secret_key & ((1 << 8 * key_bytes) - 1)
+    return np.frombuffer(key.to_bytes(key_bytes, "little"), dtype=np.uint8)
+
+
+def encrypt_xor_bytes(data, secret_key: int, key_bytes: int = 4, out=None, offset: int = 0):
+    """
+    Encrypts binary data with the repeating key xor cipher. Gives the same result as encrypt_xor for latin-1 text
+    :param data: any bytes-like object (bytes, bytearray, memoryview, mmap)
+    :param secret_key: the secret key
+    :param key_bytes: after how many bytes the key is repeated
+    :param out: writable buffer of the same length for the result (can be data itself) - a new bytearray by default
+    :param offset: position of data in the whole message, so a message can be processed in pieces
+    :return: the buffer containing the result
+    """
+    source = np.frombuffer(data, dtype=np.uint8)
+    if out is None:
+        out = bytearray(len(source))
+    target = np.frombuffer(out, dtype=np.uint8)
+    if len(target) != len(source):
+        raise ValueError("out must have the same length as data")
+    # Rotate the key so that its first byte belongs to the first byte of data
+    key = np.roll(xor_key(secret_key, key_bytes), -(offset % key_bytes))
+    full = len(source) - len(source) % key_bytes
+    np.bitwise_xor(source[:full].reshape(-1, key_bytes), key, out=target[:full].reshape(-1, key_bytes))
+    np.bitwise_xor(source[full:], key[:len(source) - full], out=target[full:])
+    return out
+
+
+def decrypt_xor_bytes(data, secret_key: int, key_bytes: int = 4, out=None, offset: int = 0):
+    """Decrypts binary data - the same as encrypting it again with the same key (see encrypt_xor_bytes)"""
+    return encrypt_xor_bytes(data, secret_key, key_bytes, out, offset)
+
+
+def encrypt_file(input_path: str, output_path: str, secret_key: int, key_bytes: int = 4,
+                 chunk_size: int = 1 << 24):
+    """
+    Encrypts a file with the repeating key xor cipher
+    Both files are memory-mapped and processed in chunks, so even huge files need only little memory
+    :param input_path: the file to encrypt
+    :param output_path: the file the result is written to (can be the same as input_path)
+    :param secret_key: the secret key
+    :param key_bytes: after how many bytes the key is repeated
+    :param chunk_size: how many bytes are processed at once
+    """
+    size = os.path.getsize(input_path)
+    in_place = os.path.exists(output_path) and os.path.samefile(input_path, output_path)
+    with open(output_path, "r+b" if in_place else "w+b") as output_file:
+        output_file.truncate(size)
+        if size == 0:
+            return  # Empty files can not be memory-mapped
+        with mmap.mmap(output_file.fileno(), size) as output_map:
+            if in_place:
+                _xor_mapped(output_map, output_map, secret_key, key_bytes, chunk_size)
+                return
+            with open(input_path, "rb") as input_file, \
+                    mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as input_map:
+                _xor_mapped(input_map, output_map, secret_key, key_bytes, chunk_size)
+
+
+def decrypt_file(input_path: str, output_path: str, secret_key: int, key_bytes: int = 4,
+                 chunk_size: int = 1 << 24):
+    """Decrypts a file - the same as encrypting it again with the same key (see encrypt_file)"""
+    encrypt_file(input_path, output_path, secret_key, key_bytes, chunk_size)
+
+
+def _xor_mapped(source: mmap.mmap, target: mmap.mmap, secret_key: int, key_bytes: int, chunk_size: int):
+    with memoryview(source) as source_view, memoryview(target) as target_view:
+        for start in range(0, len(source_view), chunk_size):
+            end = min(start + chunk_size, len(source_view))
+            encrypt_xor_bytes(source_view[start:end], secret_key, key_bytes, target_view[start:end], start)
+
+
 def diffie_hellman_private(p: int, g: int, secret: int) -> Key:
-    q, r = toymath.modulo(pow(g, secret), p)
+    # Reduce after every multiplication - computing g^secret first would need secret * log2(g) bits
+    r = modexp.pow_mod(g, secret, p)
     # Note: this is NOT a key in the sens of public key cryptography
     return Key(r)
 
 
 def diffie_hellman_exchange(p: int, g: int, secret: int, other: Key) -> Key:
-    shared_secret = pow(other._number, secret, p)
+    shared_secret = modexp.pow_mod(other._number, secret, p)
     return Key(shared_secret)
@@ -0,0 +1,221 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Dictionary Attack
+
+# People do not choose random passwords - they use words and change them in predictable ways
+# ("password" -> "Password1", "p4ssw0rd"). A dictionary attack tries a list of known words and their variants
+# instead of the whole keyspace. It works in a pipeline of lazy stages, so memory does not grow with the wordlist:
+#       - read_words() reads the wordlist through mmap - the operating system loads the pages when they are needed
+#       - mangle() applies rules to every word (case changes, leetspeak, appended digits)
+#       - dictionary_attack() hashes the candidates in batches with hash_many()
+#       - every batch is looked up in a hash table of all target hashes (TargetSet)
+# Dumps of stored passwords contain thousands of hashes: each candidate is hashed only once and then compared
+# with all targets at once. A lookup costs about the same for ten or a million targets
+
+import mmap
+import os
+from itertools import islice
+from typing import Dict, Iterable, Iterator
+
+import numpy as np
+
+from toycrypt.hashing import Hash, hash_many
+from toycrypt.telemetry import ProgressReporter
+
+_READ_SIZE = 1 << 20  # Bytes of the wordlist decoded at once
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)  # Large odd number to spread the hashes over the buckets
+_LEET = str.maketrans({"a": "4", "e": "3", "i": "1", "o": "0", "s": "5", "t": "7"})
+
+
+def read_words(path: str, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Yields the lines of a wordlist file one by one (without line breaks, empty lines are skipped)
+    :param path: path to the wordlist (one word per line)
+    :param encoding: encoding of the file - undecodable bytes are replaced
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return  # Empty files can not be mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            rest = b""  # Incomplete last line of the previous block
+            for start in range(0, len(data), _READ_SIZE):
+                lines = (rest + data[start:start + _READ_SIZE]).split(b"\n")
+                rest = lines.pop()
+                for line in lines:
+                    if line := line.rstrip(b"\r"):
+                        yield line.decode(encoding, "replace")
+            if rest := rest.rstrip(b"\r"):
+                yield rest.decode(encoding, "replace")
+
+
+# Rules
+
+# A rule is a function that returns the variants of a word (an iterable of strings)
+# They are applied to every word independently, combine() chains them (e.g. capitalize and then append digits)
+
+def case_variants(word: str) -> Iterable[str]:
+    """The word unchanged, in lowercase, in uppercase and capitalized"""
+    return word, word.lower(), word.upper(), word.capitalize()
+
+
+def leetspeak(word: str) -> Iterable[str]:
+    """Replaces letters with similar looking digits: a -> 4, e -> 3, i -> 1, o -> 0, s -> 5, t -> 7"""
+    return (word.lower().translate(_LEET),)
+
+
+def append_digits(max_digits: int = 2):
+    """Returns a rule that appends all numbers with 1 up to max_digits digits (word0 ... word9, word00 ... word99)"""
+    suffixes = [str(number).zfill(digits) for digits in range(1, max_digits + 1) for number in range(10 ** digits)]
+
+    def rule(word: str) -> Iterable[str]:
+        return [word + suffix for suffix in suffixes]
+
+    return rule
+
+
+def combine(*rules):
+    """Returns a rule that applies the given rules one after another to all variants of the previous rule"""
+
+    def rule(word: str) -> Iterable[str]:
+        variants = [word]
+        for next_rule in rules:
+            variants = [variant for previous in variants for variant in next_rule(previous)]
+        return variants
+
+    return rule
+
+
+DEFAULT_RULES = (case_variants, leetspeak, combine(case_variants, append_digits()))
+
+
+def mangle(words: Iterable[str], rules=DEFAULT_RULES) -> Iterator[str]:
+    """
+    Yields every word followed by its variants from all rules - duplicates of the same word are only yielded once
+    :param words: any iterable of words (e.g. read_words())
+    :param rules: the rules to apply (an empty tuple yields only the words)
+    """
+    for word in words:
+        variants = dict.fromkeys((word,))  # Keeps the order of insertion
+        for rule in rules:
+            variants.update(dict.fromkeys(rule(word)))
+        yield from variants
+
+
+class TargetSet:
+    """
+    The hashes to crack as a static hash table: all hashes in one array, grouped by their bucket
+    The table has about one bucket per hash, so a lookup compares with one or two hashes - no matter how many there are
+    Lookups are done for a whole batch at once: each round compares every unresolved hash with the next entry
+    of its bucket, so the number of rounds is the size of the largest bucket that is looked up
+    """
+    _hashes: np.ndarray  # Sorted and without duplicates
+    _shift: np.uint64  # 64 - number of bucket bits
+    _table: np.ndarray  # The hashes ordered by bucket
+    _offsets: np.ndarray  # The hashes of bucket b are _table[_offsets[b]:_offsets[b + 1]]
+
+    def __init__(self, targets: Iterable):
+        if not isinstance(targets, np.ndarray):
+            targets = [target.get_hash() if isinstance(target, Hash) else target for target in targets]
+        self._hashes = np.unique(np.array(targets, dtype=np.uint64))
+        bits = max((len(self._hashes) - 1).bit_length(), 1)
+        self._shift = np.uint64(64 - bits)
+        buckets = self._get_buckets(self._hashes)
+        self._table = self._hashes[np.argsort(buckets, kind="stable")]
+        self._offsets = np.zeros((1 << bits) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(buckets, minlength=1 << bits), out=self._offsets[1:])
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, hash_num: int):
+        return bool(self.contains(np.array([hash_num], dtype=np.uint64))[0])
+
+    def _get_buckets(self, hash_nums: np.ndarray) -> np.ndarray:
+        # Multiplying spreads hashes that only differ in a few bits (e.g. of hash_addition) over all buckets
+        return ((hash_nums * _MULTIPLIER) >> self._shift).astype(np.intp)
+
+    def contains(self, hash_nums: np.ndarray) -> np.ndarray:
+        """Returns for every given hash number whether it is a target"""
+        hash_nums = np.asarray(hash_nums, dtype=np.uint64)
+        buckets = self._get_buckets(hash_nums)
+        starts = self._offsets[buckets]
+        sizes = self._offsets[buckets + 1] - starts
+        result = np.zeros(len(hash_nums), dtype=bool)
+        active = np.flatnonzero(sizes)  # Hashes that are not resolved yet
+        entry = 0
+        while len(active):
+            hits = self._table[starts[active] + entry] == hash_nums[active]
+            result[active[hits]] = True
+            entry += 1
+            active = active[~hits & (sizes[active] > entry)]
+        return result
+
+    def get_hashes(self) -> np.ndarray:
+        return self._hashes
+
+
+class DictionaryAttackResult:
+    """
+    The outcome of a dictionary attack: a preimage for every cracked target hash
+    """
+    _found: Dict[int, str]  # Target hash number -> first candidate with that hash
+    _targets: int
+    _attempts: int
+
+    def __init__(self, found: Dict[int, str], targets: int, attempts: int):
+        self._found = found
+        self._targets = targets
+        self._attempts = attempts
+
+    def __str__(self):
+        return f"Cracked {len(self._found)} of {self._targets} hashes after {self._attempts} attempts"
+
+    def get_found(self) -> Dict[int, str]:
+        return self._found
+
+    def get_preimage(self, target) -> str | None:
+        """Returns the found preimage of a target (hash object or number) or None"""
+        return self._found.get(target.get_hash() if isinstance(target, Hash) else target)
+
+    def get_attempts(self) -> int:
+        return self._attempts
+
+    def is_complete(self) -> bool:
+        """Returns true if every target was cracked"""
+        return len(self._found) == self._targets
+
+
+def dictionary_attack(hash_function, targets: Iterable, words: Iterable[str], rules=DEFAULT_RULES,
+                      batch_size: int = 1 << 16, stop_when_complete: bool = True,
+                      progress: ProgressReporter | None = None) -> DictionaryAttackResult:
+    """
+    Hashes every word and its variants once and finds all targets with the same hash
+    :param hash_function: one of the hash functions of toycrypt.hashing
+    :param targets: the hashes to crack as hash objects, numbers, an array or a TargetSet
+    :param words: any iterable of words - use read_words() for a wordlist file
+    :param rules: the rules that create the variants of each word (see mangle())
+    :param batch_size: number of candidates hashed at once
+    :param stop_when_complete: stop as soon as every target is cracked
+    :param progress: receives the number of candidates after every batch
+    :return: the result with the first preimage of every cracked target
+    """
+    target_set = targets if isinstance(targets, TargetSet) else TargetSet(targets)
+    found: Dict[int, str] = {}
+    attempts = 0
+    if progress is not None:
+        progress.start()
+
+    candidates = mangle(words, rules)
+    while batch := list(islice(candidates, batch_size)):
+        hash_nums = hash_many(hash_function, batch)
+        for index in np.flatnonzero(target_set.contains(hash_nums)).tolist():
+            found.setdefault(int(hash_nums[index]), batch[index])
+        attempts += len(batch)
+        if progress is not None:
+            progress.update(attempts)
+        if stop_when_complete and len(found) == len(target_set):
+            break
+
+    if progress is not None:
+        progress.finish(attempts)
+    return DictionaryAttackResult(found, len(target_set), attempts)
@@ -0,0 +1,202 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Diffie-Hellman Key Exchange
+
+# Two parties agree on a shared secret over a public channel (https://en.wikipedia.org/wiki/Diffie%E2%80%93Hellman_key_exchange)
+#       - Both use the same public group: a prime p and a generator g
+#       - Alice picks a secret a and sends A = g^a mod p, Bob picks b and sends B = g^b mod p
+#       - Alice computes B^a = g^(ab) mod p and Bob computes A^b = g^(ab) mod p - the same number
+# An eavesdropper only sees p, g, A and B. Getting a from A is the discrete logarithm problem (see discrete_log.py)
+
+# The group should use a "safe prime" p = 2q + 1 where q is prime as well
+# Then p - 1 = 2q has only the factors 2 and q, which makes the Pohlig-Hellman attack useless
+# Finding a safe prime needs many primality tests - most candidates are removed cheaply by sieving first
+
+import random
+import secrets
+from functools import lru_cache
+
+import numpy as np
+
+from toycrypt import factorization, modexp
+from toycrypt.crypto import Key, KeyPair
+
+# Well-known safe prime groups (generator 2) - the primes are derived from the digits of pi
+WELL_KNOWN_PRIMES = {
+    768: int(  # RFC 2409 group 1
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A63A3620FFFFFFFFFFFFFFFF", 16),
+    1024: int(  # RFC 2409 group 2
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE65381FFFFFFFFFFFFFFFF", 16),
+    1536: int(  # RFC 3526 group 5
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05"
+        "98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB"
+        "9ED529077096966D670C354E4ABC9804F1746C08CA237327FFFFFFFFFFFFFFFF", 16),
+    2048: int(  # RFC 3526 group 14
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05"
+        "98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB"
+        "9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B"
+        "E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718"
+        "3995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF", 16),
+    3072: int(  # RFC 3526 group 15
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05"
+        "98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB"
+        "9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B"
+        "E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718"
+        "3995497CEA956AE515D2261898FA051015728E5A8AAAC42DAD33170D04507A33"
+        "A85521ABDF1CBA64ECFB850458DBEF0A8AEA71575D060C7DB3970F85A6E1E4C7"
+        "ABF5AE8CDB0933D71E8C94E04A25619DCEE3D2261AD2EE6BF12FFA06D98A0864"
+        "D87602733EC86A64521F2B18177B200CBBE117577A615D6C770988C0BAD946E2"
+        "08E24FA074E5AB3143DB5BFCE0FD108E4B82D120A93AD2CAFFFFFFFFFFFFFFFF", 16),
+}
+
+_SIEVE_PRIMES = factorization.primes_up_to(1 << 16)[1:]  # Odd primes used to sieve candidates
+_SIEVE_WINDOW = 1 << 12  # Number of candidates sieved at once
+
+
+class DHGroup:
+    """
+    A Diffie-Hellman group: a safe prime p = 2q + 1 and a generator g
+    """
+    _p: int
+    _g: int
+    _q: int  # Order of the subgroup - (p - 1) / 2
+
+    def __init__(self, p: int, g: int):
+        self._p = p
+        self._g = g
+        self._q = (p - 1) // 2
+
+    def __str__(self):
+        return f"DHGroup({self._p.bit_length()} bit, g={self._g})"
+
+    def get_p(self) -> int:
+        return self._p
+
+    def get_g(self) -> int:
+        return self._g
+
+    def get_q(self) -> int:
+        return self._q
+
+    def get_table(self) -> modexp.FixedBaseTable:
+        """Returns the fixed-base table of g - built on the first call and shared by all groups with the same p and g"""
+        return _get_fixed_base_table(self._g, self._p, self._q.bit_length())
+
+    def public_key(self, secret: int) -> Key:
+        """Returns g^secret mod p using the cached fixed-base table of this group"""
+        return Key(self.get_table().pow(secret))
+
+    def generate_keypair(self, rng: random.Random | None = None) -> KeyPair:
+        """Returns a random secret and the matching public key"""
+        rng = rng or _SYSTEM_RANDOM
+        secret = rng.randrange(2, self._q)
+        return KeyPair(Key(secret), self.public_key(secret))
+
+    def shared_secret(self, keypair: KeyPair, other: Key) -> Key:
+        """Returns the shared secret other^secret mod p"""
+        return Key(modexp.pow_mod(other.get_number(), keypair.get_private().get_number(), self._p))
+
+
+_SYSTEM_RANDOM = secrets.SystemRandom()
+
+
+@lru_cache(maxsize=16)
+def _get_fixed_base_table(g: int, p: int, bits: int) -> modexp.FixedBaseTable:
+    # The table is built once per group and shared by all keys - building it costs about one exponentiation
+    return modexp.FixedBaseTable(g, p, bits)
+
+
+def generate_safe_prime(bits: int, rng: random.Random | None = None) -> int:
+    """
+    Returns a random safe prime p = 2q + 1 (q prime) with the given number of bits
+    Candidates for q are sieved: q and 2q + 1 must not be divisible by any small prime
+    Only the survivors are tested with Miller-Rabin (first q, then p)
+    """
+    if bits < 3:
+        raise ValueError("A safe prime needs at least 3 bits")
+    rng = rng or _SYSTEM_RANDOM
+    if bits < 16:  # Too small for sieving - just try all of them
+        candidates = [q for q in range(1 << (bits - 2), 1 << (bits - 1))
+                      if factorization.is_prime(q) and factorization.is_prime(2 * q + 1)]
+        return 2 * rng.choice(candidates) + 1
+    sieve_primes = _SIEVE_PRIMES[_SIEVE_PRIMES < (1 << (bits - 3))]
+    offsets = np.arange(_SIEVE_WINDOW, dtype=np.int64)
+    while True:
+        # q = start + 2k for k in the window, so q has bits - 1 bits and is odd
+        start = rng.getrandbits(bits - 1) | (1 << (bits - 2)) | (3 << (bits - 3)) | 1
+        keep = np.ones(_SIEVE_WINDOW, dtype=bool)
+        for r in sieve_primes.tolist():
+            # Remove k with q = start + 2k = 0 mod r (q divisible) or q = (r - 1) / 2 mod r (2q + 1 divisible)
+            inverse_two = (r + 1) // 2
+            first = (-start * inverse_two) % r
+            keep[first::r] = False
+            keep[((r - 1) // 2 - start) * inverse_two % r::r] = False
+        for k in np.flatnonzero(keep).tolist():
+            q = start + 2 * k
+            if q.bit_length() != bits - 1:
+                break
+            # A cheap Fermat test on p removes most remaining composites before the full tests
+            p = 2 * q + 1
+            if pow(2, p - 1, p) == 1 and factorization.is_prime(q) and factorization.is_prime(p):
+                return p
+
+
+def find_generator(p: int) -> int:
+    """
+    Returns the smallest generator of the whole multiplicative group of the safe prime p = 2q + 1
+    The order of any element divides p - 1 = 2q, so g generates the group if g^2 != 1 and g^q != 1
+    """
+    q = (p - 1) // 2
+    for g in range(2, p - 1):
+        if pow(g, 2, p) != 1 and modexp.pow_mod(g, q, p) != 1:
+            return g
+    raise ValueError("p is not a safe prime")
+
+
+def generate_group(bits: int, rng: random.Random | None = None) -> DHGroup:
+    """Returns a new random group with a safe prime of the given size"""
+    p = generate_safe_prime(bits, rng)
+    return DHGroup(p, find_generator(p))
+
+
+def get_well_known_group(bits: int) -> DHGroup:
+    """Returns the well-known group with the given size (768, 1024, 1536, 2048 or 3072 bits)"""
+    if bits not in WELL_KNOWN_PRIMES:
+        raise ValueError(f"No well-known group with {bits} bits")
+    return DHGroup(WELL_KNOWN_PRIMES[bits], 2)
+
+
+def batch_handshakes(group: DHGroup, count: int, rng: random.Random | None = None) -> [(KeyPair, KeyPair, Key)]:
+    """
+    Simulates many complete key exchanges between Alice and Bob in the given group
+    All public keys share the fixed-base table of the group
+    :return: Alice's keys, Bob's keys and the shared secret for each handshake
+    """
+    rng = rng or _SYSTEM_RANDOM
+    q = group.get_q()
+    alice_secrets = [rng.randrange(2, q) for _ in range(count)]
+    bob_secrets = [rng.randrange(2, q) for _ in range(count)]
+    table = group.get_table()
+    handshakes = []
+    for a, b in zip(alice_secrets, bob_secrets):
+        alice = KeyPair(Key(a), Key(table.pow(a)))
+        bob = KeyPair(Key(b), Key(table.pow(b)))
+        shared = group.shared_secret(alice, bob.get_public())
+        if shared != group.shared_secret(bob, alice.get_public()):
+            raise ValueError("Handshake failed - both sides computed different secrets")
+        handshakes.append((alice, bob, shared))
+    return handshakes
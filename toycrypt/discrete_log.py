@@ -0,0 +1,200 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Discrete Logarithm
+
+# Given a prime p, a generator g and h = g^x mod p, find the exponent x (the "discrete logarithm" of h)
+# This is what an eavesdropper of a Diffie-Hellman key exchange has to do to get a secret from a public key
+# Trying all x takes up to n steps for a group of order n. The attacks here are much faster:
+#       - baby-step giant-step: store m = sqrt(n) powers g^j, then jump through h * g^(-m*i) until one is stored
+#         Needs sqrt(n) time AND sqrt(n) memory
+#       - Pollard's rho: a random walk through elements g^a * h^b until it repeats, which gives an equation for x
+#         Needs sqrt(n) time but constant memory
+#       - Pohlig-Hellman: if the order n of g (a divisor of p - 1) has only small factors, solve the problem in each
+#         small subgroup and combine the results with the chinese remainder theorem
+#         This is why Diffie-Hellman uses safe primes: p - 1 = 2q has the huge factor q
+
+import math
+import random
+
+import numpy as np
+
+from toycrypt import factorization
+
+_KEY_MASK = (1 << 64) - 1  # Baby steps are stored by their lowest 64 bits (exact for p < 2^64)
+_GIANT_BLOCK = 1024  # Number of giant steps looked up at once
+
+
+def multiplicative_order(g: int, p: int) -> int:
+    """
+    Returns the order of g modulo the prime p: the smallest n > 0 with g^n = 1 mod p
+    The order divides p - 1, so every prime factor q of p - 1 is divided out as long as g^(order / q) is still 1
+    """
+    g %= p
+    if g == 0:
+        raise ValueError("0 has no multiplicative order")
+    order = p - 1
+    for q, e in factorization.factorize(p - 1).items():
+        for _ in range(e):
+            if pow(g, order // q, p) != 1:
+                break
+            order //= q
+    return order
+
+
+def baby_step_giant_step(g: int, h: int, p: int, order: int | None = None) -> int | None:
+    """
+    Returns x with g^x = h mod p using the baby-step giant-step algorithm
+    The baby steps are stored as sorted integer arrays (not a dict of Python ints) and searched in blocks
+    :param g: the generator
+    :param h: the element whose logarithm is wanted
+    :param p: the prime modulus
+    :param order: the order of g (computed with multiplicative_order() if not given)
+    :return: the smallest such x or None if there is none
+    """
+    order = order or multiplicative_order(g, p)
+    g, h = g % p, h % p
+    m = math.isqrt(order - 1) + 1
+
+    # Baby steps: g^j for 0 <= j < m
+    values = np.empty(m, dtype=np.uint64)
+    value = 1
+    for j in range(m):
+        values[j] = value & _KEY_MASK
+        value = value * g % p
+    order_of_keys = np.argsort(values, kind="stable")  # Stable - the smallest j comes first for equal keys
+    keys = values[order_of_keys]
+    exponents = order_of_keys.astype(np.int64)
+    del values
+
+    # Giant steps: h * g^(-m*i) for 0 <= i < m - one of them is a baby step if x exists
+    factor = pow(g, -m, p)
+    y = h
+    for block_start in range(0, m, _GIANT_BLOCK):
+        block = []
+        for _ in range(min(_GIANT_BLOCK, m - block_start)):
+            block.append(y)
+            y = y * factor % p
+        block_keys = np.array([value & _KEY_MASK for value in block], dtype=np.uint64)
+        positions = np.searchsorted(keys, block_keys)
+        positions[positions == m] = 0
+        for i in np.flatnonzero(keys[positions] == block_keys).tolist():
+            # Check all baby steps with that key (only needed if p >= 2^64)
+            position = int(positions[i])
+            while position < m and keys[position] == block_keys[i]:
+                x = (block_start + i) * m + int(exponents[position])
+                if pow(g, x, p) == h:
+                    return x
+                position += 1
+    return None
+
+
+def _solve_linear(a: int, b: int, n: int) -> [int]:
+    """Returns all x in [0, n) with a * x = b mod n"""
+    a, b = a % n, b % n
+    d = math.gcd(a, n)
+    if b % d != 0:
+        return []
+    n_reduced = n // d
+    x = (b // d) * pow(a // d, -1, n_reduced) % n_reduced if n_reduced > 1 else 0
+    return [x + k * n_reduced for k in range(d)]
+
+
+def pollard_rho_log(g: int, h: int, p: int, order: int | None = None, seed: int | None = None,
+                    max_restarts: int = 32) -> int | None:
+    """
+    Returns x with g^x = h mod p using Pollard's rho algorithm for logarithms
+    The walk keeps x_i = g^a * h^b and moves depending on x_i mod 3 (square, multiply by g or by h)
+    When the walk repeats (found with Brent's cycle detection) g^a1 * h^b1 = g^a2 * h^b2, so x = (a1 - a2) / (b2 - b1)
+    :param g: the generator
+    :param h: the element whose logarithm is wanted
+    :param p: the prime modulus
+    :param order: the order of g (computed with multiplicative_order() if not given) - works best if it is prime
+    :param seed: seed of the random start points
+    :param max_restarts: how many random starts are tried before giving up
+    :return: x or None if no logarithm was found
+    """
+    order = order or multiplicative_order(g, p)
+    g, h = g % p, h % p
+    if h == 1:
+        return 0
+    generator = random.Random(seed)
+
+    def step(x: int, a: int, b: int) -> (int, int, int):
+        partition = x % 3
+        if partition == 0:
+            return x * x % p, 2 * a % order, 2 * b % order
+        if partition == 1:
+            return x * g % p, (a + 1) % order, b
+        return x * h % p, a, (b + 1) % order
+
+    for _ in range(max_restarts):
+        a, b = generator.randrange(order), generator.randrange(order)
+        x = pow(g, a, p) * pow(h, b, p) % p
+        # Brent: the tortoise waits at the hare position and jumps there after 1, 2, 4, ... steps
+        tortoise = (x, a, b)
+        hare = step(x, a, b)
+        power = length = 1
+        while tortoise[0] != hare[0]:
+            if power == length:
+                tortoise = hare
+                power *= 2
+                length = 0
+            hare = step(*hare)
+            length += 1
+        (_, a1, b1), (_, a2, b2) = tortoise, hare
+        for candidate in _solve_linear(b2 - b1, a1 - a2, order):
+            if pow(g, candidate, p) == h:
+                return candidate
+    return None
+
+
+def chinese_remainder(residues: [int], moduli: [int]) -> int:
+    """Returns the x with x = r_i mod n_i for all i (the moduli must be co-prime)"""
+    x, n = 0, 1
+    for r, m in zip(residues, moduli):
+        # Find x + n * t = r mod m
+        t = (r - x) * pow(n, -1, m) % m
+        x += n * t
+        n *= m
+    return x % n
+
+
+def pohlig_hellman(g: int, h: int, p: int, order: int | None = None, small_limit: int = 1 << 32) -> int | None:
+    """
+    Returns x with g^x = h mod p by solving the problem in the subgroups of each prime power q^e dividing the order
+    x mod q^e is found digit by digit (base q), each digit is a logarithm in the subgroup of order q
+    :param g: the generator
+    :param h: the element whose logarithm is wanted
+    :param p: the prime modulus
+    :param order: the order of g (computed with multiplicative_order() if not given)
+    :param small_limit: subgroups up to this order use baby-step giant-step, larger ones Pollard's rho
+    :return: x or None if no logarithm was found
+    """
+    order = order or multiplicative_order(g, p)
+    g, h = g % p, h % p
+    residues, moduli = [], []
+    for q, e in factorization.factorize(order).items():
+        gamma = pow(g, order // q, p)  # Element of order q
+        x_q = 0
+        for k in range(e):
+            # Remove the known digits and move the rest into the subgroup of order q
+            h_k = pow(pow(g, -x_q, p) * h % p, order // pow(q, k + 1), p)
+            if q <= small_limit:
+                digit = baby_step_giant_step(gamma, h_k, p, q)
+            else:
+                digit = pollard_rho_log(gamma, h_k, p, q)
+            if digit is None:
+                return None
+            x_q += digit * pow(q, k)
+        residues.append(x_q)
+        moduli.append(pow(q, e))
+    x = chinese_remainder(residues, moduli)
+    return x if pow(g, x, p) == h else None
+
+
+def discrete_log(g: int, h: int, p: int, order: int | None = None) -> int | None:
+    """
+    Returns x with g^x = h mod p. Uses Pohlig-Hellman, which is fast if the order has only small factors
+    and falls back to baby-step giant-step or Pollard's rho for the large prime factors
+    """
+    return pohlig_hellman(g, h, p, order)
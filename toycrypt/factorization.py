@@ -0,0 +1,169 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Factorization
+
+# Every whole number n > 1 can be written as a product of primes in exactly one way: 360 = 2^3 * 3^2 * 5
+# Many functions of modular arithmetic only depend on these prime factors (e.g. euler_phi or the reduced residue set)
+# Finding the factors is hard for big numbers (which is what RSA relies on), but for the sizes used here
+# a combination of simple methods is fast:
+#       - trial division with a wheel for small factors
+#       - Miller-Rabin to check if the remaining number is already prime
+#       - Pollard's rho algorithm to split the remaining composite numbers
+#       - a sieve of smallest prime factors when whole ranges of numbers are needed
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from toycrypt import toymath
+
+# Wheel factorization: after 2, 3 and 5 only numbers that are not divisible by them can be prime
+# Starting at 7 these differences skip all multiples of 2, 3 and 5 (8 of every 30 numbers remain)
+_WHEEL_PRIMES = (2, 3, 5)
+_WHEEL_STEPS = (4, 2, 4, 2, 4, 6, 2, 6)
+
+# Miller-Rabin with these bases gives the correct answer for all n < 3.3 * 10^24
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_prime(n: int) -> bool:
+    """
+    Returns true if n is a prime. Uses the Miller-Rabin test
+    It is exact for n < 3.3 * 10^24 and has an error chance below 4^-13 for larger n
+    """
+    if n < 2:
+        return False
+    for p in _MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+    # Write n - 1 = d * 2^s with d odd
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for a in _MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False  # a is a witness that n is composite
+    return True
+
+
+def trial_division(n: int, limit: int) -> ({int: int}, int):
+    """
+    Divides out all prime factors up to limit
+    :return: the found factors mapped to their exponent and the remaining cofactor
+    """
+    factors: {int: int} = {}
+
+    def divide_out(p: int):
+        nonlocal n
+        while n % p == 0:
+            n //= p
+            factors[p] = factors.get(p, 0) + 1
+
+    for p in _WHEEL_PRIMES:
+        divide_out(p)
+    p = 7
+    step = 0
+    while p <= limit and p * p <= n:
+        divide_out(p)
+        p += _WHEEL_STEPS[step]
+        step = (step + 1) % len(_WHEEL_STEPS)
+    if 1 < n < p * p:  # No factor up to sqrt(n) - the rest must be prime
+        factors[n] = factors.get(n, 0) + 1
+        n = 1
+    return factors, n
+
+
+def pollard_rho(n: int) -> int:
+    """
+    Returns a non-trivial factor of the composite number n using Pollard's rho algorithm (with Brent's cycle finding)
+    The sequence x -> x^2 + c mod n repeats modulo an unknown factor p long before it repeats modulo n
+    A repetition modulo p shows up as gcd(x - y, n) > 1
+    """
+    if n % 2 == 0:
+        return 2
+    for c in range(1, n):
+        y, power, factor = 2, 1, 1
+        batch = 128  # Multiply many differences together and take a single gcd for all of them
+        while factor == 1:
+            x = y
+            for _ in range(power):
+                y = (y * y + c) % n
+            k = 0
+            while k < power and factor == 1:
+                saved = y
+                product = 1
+                for _ in range(min(batch, power - k)):
+                    y = (y * y + c) % n
+                    product = product * abs(x - y) % n
+                factor = toymath.gcd(product, n)
+                k += batch
+            power *= 2
+        if factor == n:
+            # The batch went past the factor - repeat it one step at a time
+            factor = 1
+            while factor == 1:
+                saved = (saved * saved + c) % n
+                factor = toymath.gcd(abs(x - saved), n)
+        if factor != n:
+            return factor
+    raise ValueError("No factor found")
+
+
+@lru_cache(maxsize=4096)
+def _factorize(n: int) -> ((int, int),):
+    factors, rest = trial_division(n, 1000)
+    stack = [rest] if rest > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+        else:
+            factor = pollard_rho(m)
+            stack += [factor, m // factor]
+    return tuple(sorted(factors.items()))
+
+
+def factorize(n: int) -> {int: int}:
+    """
+    Returns the prime factorization of n as a mapping of each prime to its exponent: 360 -> {2: 3, 3: 2, 5: 1}
+    Results are kept in a bounded cache, so repeated queries are effectively free
+    """
+    if n < 1:
+        raise ValueError("Only positive numbers can be factorized")
+    return dict(_factorize(n))
+
+
+def prime_factors(n: int) -> [int]:
+    """Returns the distinct prime factors of n in increasing order"""
+    return [p for p, exponent in _factorize(n)]
+
+
+def smallest_prime_factor_sieve(limit: int) -> np.ndarray:
+    """
+    Returns an array spf where spf[i] is the smallest prime factor of i for all i < limit (spf[0] = spf[1] = 0)
+    Any i < limit can then be factorized by repeatedly dividing by spf[i]
+    """
+    spf = np.zeros(limit, dtype=np.int64)
+    for p in range(2, math.isqrt(max(limit - 1, 0)) + 1):
+        if spf[p] == 0:  # p is a prime - mark all of its multiples that have no smaller factor
+            multiples = spf[p * p::p]
+            multiples[multiples == 0] = p
+    primes = np.flatnonzero(spf == 0)
+    primes = primes[primes >= 2]
+    spf[primes] = primes
+    return spf
+
+
+def primes_up_to(limit: int) -> np.ndarray:
+    """Returns all primes p <= limit"""
+    spf = smallest_prime_factor_sieve(limit + 1)
+    numbers = np.arange(limit + 1)
+    return numbers[(spf == numbers) & (numbers >= 2)]
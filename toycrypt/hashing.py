@@ -14,19 +14,25 @@
 #       - limiting the output space (16-bit and 32-bit)
 #       - using an evolving state to achieve avalanche effect
 
+from abc import ABC, abstractmethod
+
+import numpy as np
+
 from toycrypt.util import *
 
 
 class Hash:
     """
     A hash object that contains the numerical and string representation
+    The string is only computed when it is requested - attacks usually only compare the numbers
     """
-    _number: int  # The hash number
-    _string: str  # The hash encoded in hexadecimal using big-endian byte order
+    __slots__ = ("number", "_string")  # No per-object dict - many hashes are created in attack loops
+    number: int  # The hash number
+    _string: str | None  # The hash encoded in hexadecimal using big-endian byte order (None until requested)
 
     def __init__(self, number: int):
         self.number = number
-        self.string = decimal2hex(number)
+        self._string = None
 
     def __str__(self):
         return f"Hash:{self.string}"
@@ -36,6 +42,12 @@ class Hash:
             return False
         return self.number == other.number
 
+    @property
+    def string(self) -> str:
+        if self._string is None:
+            self._string = decimal2hex(self.number)
+        return self._string
+
     def get_string(self) -> str:
         return self.string
 
@@ -50,6 +62,7 @@ class HashPair:
     """
     A pair of a hash object and the input that produced it
     """
+    __slots__ = ("_hash", "_input")
     _hash: Hash  # The hash
     _input: str  # Input that produced this hash
 
@@ -64,27 +77,30 @@ class HashPair:
         return self._input
 
 
-def hash_addition(input_str: str) -> Hash:
+# Each hash function has a raw variant that returns only the hash number
+# Use them when only numbers are compared (e.g. in attacks) - they skip creating a hash object
+
+def hash_addition_raw(input_str: str) -> int:
     """
     Hashes the input string by simply adding the number values of each character
     This function has a major weakness, because the order of addition is not relevant
     This can easily be exploited: "15" hashes to same value as "51"
     :param input_str: any string
-    :return: a hash object
+    :return: the hash number
     """
     hash_num = 0
     for character in input_str:
         hash_num += ord(character)  # Transform the character to its ASCII number
         hash_num = hash_num & 0xFFFFFFFF  # Make sure it stays a 32-bit unsigned number
-    return Hash(hash_num)
+    return hash_num
 
 
-def hash_allbits16(input_str: str) -> Hash:
+def hash_allbits16_raw(input_str: str) -> int:
     """
     Hashes the input using big numbers to change all bit on every input and using the XOR operation
     Limits itself to only using the 16-bit (unsigned) space: 0 - 65,536
     :param input_str: any string
-    :return: a hash object
+    :return: the hash number
     """
     seed: int = 123456789  # Seed the generator to flip most bits
     hash_num: int = seed
@@ -92,15 +108,15 @@ def hash_allbits16(input_str: str) -> Hash:
         char_num = ord(char) * seed  # Make the number large so many bits are flipped
         hash_num = xor(char_num, hash_num)  # XOR the character and the current hash to produce the new hash
         hash_num = hash_num & 0xFFFF  # Make sure it stays a 16-bit unsigned number
-    return Hash(hash_num)
+    return hash_num
 
 
-def hash_allbits32(input_str: str) -> Hash:
+def hash_allbits32_raw(input_str: str) -> int:
     """
     Hashes the input using big numbers to change all bit on every input and using the XOR operation
     Limits itself to only using the 32-bit (unsigned) space: 0 - 4,294,967,295
     :param input_str: any string
-    :return: a hash object
+    :return: the hash number
     """
     seed: int = 123456789  # Seed the generator to flip most bits
     hash_num: int = seed
@@ -108,16 +124,16 @@ def hash_allbits32(input_str: str) -> Hash:
         char_num = ord(char) * seed  # Make the number large so many bits are flipped
         hash_num = xor(char_num, hash_num)  # XOR the character and the current hash to produce the new hash
         hash_num = hash_num & 0xFFFFFFFF  # Make sure it stays a 32-bit unsigned number
-    return Hash(hash_num)
+    return hash_num
 
 
-def hash_toycrypt(input_str: str) -> Hash:
+def hash_toycrypt_raw(input_str: str) -> int:
     """
     Hashes the input using big numbers to change all bits on every input using an XOR operation
     Additionally it uses an evolving state to achieve an avalanche effect (each input affects all following ones)
     Limits itself to only using the 32-bit (unsigned) space: 0 - 4,294,967,295
-    :param input_str:
-    :return: a hash object
+    :param input_str: any string
+    :return: the hash number
     """
     seed: int = 123456789  # Seed the generator to flip most bits
     state = seed  # Keep a state that changes with every input
@@ -126,5 +142,303 @@ def hash_toycrypt(input_str: str) -> Hash:
         char_num = ord(char) * state  # Make the number large so many bits are flipped
         hash_num = xor(char_num, hash_num)  # XOR the character and the current hash to produce the new hash
         state = xor(hash_num, state)  # XOR the state with the current hash
+        # Bits above 32 never influence the lower bits of a multiplication or XOR
+        # So cutting them off keeps the result the same, but stops the state from growing with every character
+        state = state & 0xFFFFFFFF
         hash_num = hash_num & 0xFFFFFFFF  # Make sure it stays a 32-bit unsigned number
-    return Hash(hash_num)
+    return hash_num
+
+
+def hash_addition(input_str: str) -> Hash:
+    """
+    Hashes the input string by simply adding the number values of each character (see hash_addition_raw)
+    :param input_str: any string
+    :return: a hash object
+    """
+    return Hash(hash_addition_raw(input_str))
+
+
+def hash_allbits16(input_str: str) -> Hash:
+    """
+    Hashes the input using big numbers and XOR in the 16-bit space (see hash_allbits16_raw)
+    :param input_str: any string
+    :return: a hash object
+    """
+    return Hash(hash_allbits16_raw(input_str))
+
+
+def hash_allbits32(input_str: str) -> Hash:
+    """
+    Hashes the input using big numbers and XOR in the 32-bit space (see hash_allbits32_raw)
+    :param input_str: any string
+    :return: a hash object
+    """
+    return Hash(hash_allbits32_raw(input_str))
+
+
+def hash_toycrypt(input_str: str) -> Hash:
+    """
+    Hashes the input using big numbers, XOR and an evolving state for an avalanche effect (see hash_toycrypt_raw)
+    :param input_str: any string
+    :return: a hash object
+    """
+    return Hash(hash_toycrypt_raw(input_str))
+
+
+# Maps the raw variants to their hash function - everything accepting a hash function also accepts its raw variant
+_RAW_FUNCTIONS = {
+    hash_addition_raw: hash_addition,
+    hash_allbits16_raw: hash_allbits16,
+    hash_allbits32_raw: hash_allbits32,
+    hash_toycrypt_raw: hash_toycrypt,
+}
+
+
+# Incremental hashing
+
+# The functions above need the whole input as one string, which is impossible for very large inputs (e.g. log files)
+# Because every hash function processes one character after another, we can instead keep the running values
+# (hash_num and state) in an object and feed the input piece by piece - just like Python's hashlib
+# Binary data (bytes, bytearray, memoryview, mmap) is read through a memoryview without copying it
+# Each byte is treated like a character with the same number, so b"abc" hashes the same as "abc"
+
+_BLOCK_SIZE = 1 << 20  # Binary data is processed in blocks of this size to keep temporary memory bounded
+
+
+class Hasher(ABC):
+    """
+    Base class of the incremental hash objects. Use get_hasher() to create the one matching a hash function
+    """
+    name: str  # Name of the matching hash function
+    digest_size: int = 4  # All hash numbers fit into 4 bytes (even the 16-bit variant starts with the 32-bit seed)
+    seed: int = 123456789  # Start value of hash_num and state - the same seed as the hash functions
+    _hash_num: int  # The running hash number
+    _state: int  # The running state (only used by hash_toycrypt)
+
+    def __init__(self, data=None):
+        self._hash_num = self.seed
+        self._state = self.seed
+        if data is not None:
+            self.update(data)
+
+    @staticmethod
+    @abstractmethod
+    def step(hash_num: int, state: int, code: int) -> (int, int):
+        """
+        Performs a single step of the hash function for one character code
+        :return: the new hash_num and state
+        """
+
+    def update(self, data) -> None:
+        """
+        Feeds more input to the hash. Calling update(a) and then update(b) is the same as update(a + b)
+        :param data: a string or any bytes-like object (bytes, bytearray, memoryview, mmap)
+        """
+        if isinstance(data, str):
+            hash_num, state = self._hash_num, self._state
+            for char in data:
+                hash_num, state = self.step(hash_num, state, ord(char))
+            self._hash_num, self._state = hash_num, state
+            return
+        with memoryview(data) as view, view.cast("B") as flat:
+            for start in range(0, len(flat), _BLOCK_SIZE):
+                self._update_bytes(flat[start:start + _BLOCK_SIZE])
+
+    def _update_bytes(self, block: memoryview) -> None:
+        hash_num, state = self._hash_num, self._state
+        for code in block:
+            hash_num, state = self.step(hash_num, state, code)
+        self._hash_num, self._state = hash_num, state
+
+    def copy(self) -> "Hasher":
+        """Returns an independent copy, so a common prefix can be hashed once and then continued differently"""
+        other = self.__class__.__new__(self.__class__)
+        other._hash_num = self._hash_num
+        other._state = self._state
+        return other
+
+    def get_values(self) -> (int, int):
+        """Returns the running hash_num and state, e.g. to continue with step() directly"""
+        return self._hash_num, self._state
+
+    def digest(self) -> bytes:
+        """Returns the hash number as bytes in big-endian byte order"""
+        return self._hash_num.to_bytes(self.digest_size, "big")
+
+    def hexdigest(self) -> str:
+        """Returns the digest encoded in hexadecimal"""
+        return self.digest().hex()
+
+    def to_hash(self) -> Hash:
+        """Returns the current value as a hash object - the same as the hash function returns for the whole input"""
+        return Hash(self._hash_num)
+
+
+class AdditionHasher(Hasher):
+    """Incremental version of hash_addition"""
+    name = "hash_addition"
+    seed = 0  # The sum starts at 0
+
+    @staticmethod
+    def step(hash_num: int, state: int, code: int) -> (int, int):
+        return (hash_num + code) & 0xFFFFFFFF, state
+
+    def _update_bytes(self, block: memoryview) -> None:
+        # The order of addition is not relevant - so we can sum the whole block at once
+        total = int(np.frombuffer(block, dtype=np.uint8).sum(dtype=np.uint64))
+        self._hash_num = (self._hash_num + total) & 0xFFFFFFFF
+
+
+class AllBits16Hasher(Hasher):
+    """Incremental version of hash_allbits16"""
+    name = "hash_allbits16"
+    _mask: int = 0xFFFF
+
+    @classmethod
+    def step(cls, hash_num: int, state: int, code: int) -> (int, int):
+        return xor(code * 123456789, hash_num) & cls._mask, state
+
+    def _update_bytes(self, block: memoryview) -> None:
+        # XOR is also order independent - the block reduces to the XOR of all its (large) character numbers
+        if len(block) == 0:
+            return
+        char_nums = np.frombuffer(block, dtype=np.uint8) * np.uint64(123456789)
+        self._hash_num = xor(int(np.bitwise_xor.reduce(char_nums)), self._hash_num) & self._mask
+
+
+class AllBits32Hasher(AllBits16Hasher):
+    """Incremental version of hash_allbits32"""
+    name = "hash_allbits32"
+    _mask: int = 0xFFFFFFFF
+
+
+class ToycryptHasher(Hasher):
+    """
+    Incremental version of hash_toycrypt
+    The state is kept as a 32-bit number - the higher bits never influence the resulting hash
+    """
+    name = "hash_toycrypt"
+
+    @staticmethod
+    def step(hash_num: int, state: int, code: int) -> (int, int):
+        hash_num = xor(code * state, hash_num)
+        state = xor(hash_num, state) & 0xFFFFFFFF
+        return hash_num & 0xFFFFFFFF, state
+
+
+_HASHERS = {
+    hash_addition: AdditionHasher,
+    hash_allbits16: AllBits16Hasher,
+    hash_allbits32: AllBits32Hasher,
+    hash_toycrypt: ToycryptHasher,
+}
+
+
+def _get_hasher_class(hash_function) -> type:
+    # Wrapped functions (e.g. by toycrypt.telemetry) are identified by the function they wrap
+    hash_function = getattr(hash_function, "__wrapped__", hash_function)
+    hash_function = _RAW_FUNCTIONS.get(hash_function, hash_function)
+    if hash_function not in _HASHERS:
+        raise ValueError(f"Unsupported hash function: {hash_function}")
+    return _HASHERS[hash_function]
+
+
+def get_hasher(hash_function, data=None) -> Hasher:
+    """
+    Returns a new incremental hash object for the given hash function
+    :param hash_function: one of the hash functions of this module
+    :param data: optional first input passed to update()
+    """
+    return _get_hasher_class(hash_function)(data)
+
+
+def hash_file(hash_function, path: str, chunk_size: int = 1 << 20) -> Hash:
+    """
+    Hashes the content of a file without loading it into memory
+    The file is read into a single reused buffer, so memory stays bounded by chunk_size
+    :param hash_function: one of the hash functions of this module
+    :param path: path to the file
+    :param chunk_size: how many bytes are read at once
+    :return: a hash object (the same as hashing the file content as a latin-1 string)
+    """
+    hasher = get_hasher(hash_function)
+    buffer = bytearray(chunk_size)
+    with open(path, "rb") as file, memoryview(buffer) as view:
+        while True:
+            read = file.readinto(buffer)
+            if not read:
+                break
+            hasher.update(view[:read])
+    return hasher.to_hash()
+
+
+# Batch hashing
+
+# Attacks like brute force or collision search hash millions of candidates, one string at a time
+# All hash functions above are sequential over the characters, but independent between inputs
+# So instead of looping per character and per input, we can pack many inputs of the same length into a matrix
+# (one input per row, one character code per column) and apply each step to a whole column at once using NumPy
+# Note: Bits above the output size never influence the lower bits for multiplication and XOR
+#       So the state can be kept as a 32-bit number without changing the result
+
+def hash_codes(hash_function, codes: np.ndarray) -> np.ndarray:
+    """
+    Hashes a batch of equal-length inputs given as a matrix of character codes (one input per row)
+    Evaluates the hash function column by column, so each step is a single operation over the whole batch
+    :param hash_function: one of the hash functions of this module
+    :param codes: 2D array of character codes (ord values) with shape (inputs, length)
+    :return: a flat array of the hash numbers (bit-identical to hash_function(input).get_hash())
+    """
+    hasher = _get_hasher_class(hash_function)
+    codes = np.asarray(codes, dtype=np.uint64)
+    if codes.ndim != 2:
+        raise ValueError("codes must be a 2D array")
+    rows, length = codes.shape
+    seed: int = 123456789  # Same seed as the scalar functions
+    char_num = np.empty(rows, dtype=np.uint64)  # Reused buffer to avoid allocating per column
+
+    if hasher is AdditionHasher:
+        hash_num = np.zeros(rows, dtype=np.uint64)
+        for i in range(length):
+            hash_num += codes[:, i]
+            hash_num &= 0xFFFFFFFF
+    elif hasher is AllBits16Hasher or hasher is AllBits32Hasher:
+        mask = 0xFFFF if hasher is AllBits16Hasher else 0xFFFFFFFF
+        hash_num = np.full(rows, seed, dtype=np.uint64)
+        for i in range(length):
+            np.multiply(codes[:, i], seed, out=char_num)
+            hash_num ^= char_num
+            hash_num &= mask
+    else:  # ToycryptHasher
+        state = np.full(rows, seed, dtype=np.uint64)
+        hash_num = np.full(rows, seed, dtype=np.uint64)
+        for i in range(length):
+            np.multiply(codes[:, i], state, out=char_num)
+            hash_num ^= char_num
+            state ^= hash_num
+            state &= 0xFFFFFFFF  # Keep the state 32-bit so the multiplication cannot overflow
+            hash_num &= 0xFFFFFFFF
+    return hash_num
+
+
+def hash_many(hash_function, inputs: [str]) -> np.ndarray:
+    """
+    Hashes all given inputs at once. Inputs are grouped by length and each group is hashed with hash_codes()
+    :param hash_function: one of the hash functions of this module
+    :param inputs: any strings
+    :return: a flat array of the hash numbers in the same order as the inputs
+    """
+    result = np.empty(len(inputs), dtype=np.uint64)
+    groups: dict[int, list[int]] = {}  # Maps an input length to the positions of all inputs with that length
+    for index, input_str in enumerate(inputs):
+        groups.setdefault(len(input_str), []).append(index)
+
+    for length, indices in groups.items():
+        if length == 0:
+            result[indices] = hash_codes(hash_function, np.empty((1, 0)))[0]
+            continue
+        # A fixed-width unicode array stores each character as a 32-bit code point - exactly the matrix we need
+        packed = np.array([inputs[i] for i in indices], dtype=f"<U{length}")
+        codes = packed.view(np.uint32).reshape(len(indices), length)
+        result[indices] = hash_codes(hash_function, codes)
+    return result
@@ -0,0 +1,257 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Mask Keyspaces
+
+# Passwords usually follow a pattern: a capital letter, some lowercase letters and digits at the end
+# A mask describes such a pattern with one charset per position (the same syntax as the hashcat password cracker):
+#       ?l = abcdefghijklmnopqrstuvwxyz         ?u = ABCDEFGHIJKLMNOPQRSTUVWXYZ
+#       ?d = 0123456789                          ?s = special characters (including space)
+#       ?a = ?l?u?d?s                            ?h = 0123456789abcdef   ?H = 0123456789ABCDEF
+#       ?b = all 256 byte values                 ?1 ... ?9 = custom charsets, ?? = a literal "?"
+#       any other character stands for itself
+# Example: "?u?l?l?l?d?d" contains "Pass12" and 26^4 * 10^2 = 45,697,600 other candidates
+# With a minimum length the shorter prefixes of the mask are included as well ("?d?d?d" from length 1: 0 ... 999)
+
+# The candidates of one length are ordered like itertools.product over the charsets of the positions
+# So candidate number i is the number i written in a mixed base: every position has the size of its charset as base
+# This makes it possible to jump to any candidate (and back) in O(length) steps, without trying the ones before:
+#       - exact progress: the size of the keyspace is known before starting
+#       - resuming: continue at the last index
+#       - splitting: machine k of n searches the index range [k * size / n, (k + 1) * size / n)
+
+import string
+from typing import Iterator
+
+import numpy as np
+
+CHARSETS: {str: str} = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "s": " " + string.punctuation,
+    "a": string.ascii_lowercase + string.ascii_uppercase + string.digits + " " + string.punctuation,
+    "h": "0123456789abcdef",
+    "H": "0123456789ABCDEF",
+    "b": ''.join(chr(code) for code in range(256)),
+}
+
+
+def index_to_digits(index: int, bases: [int]) -> [int]:
+    """
+    Returns the digits of index in a mixed base (most significant first): position i has the base bases[i]
+    With the same base everywhere this is writing index in that base with len(bases) digits
+    """
+    digits = [0] * len(bases)
+    for position in range(len(bases) - 1, -1, -1):
+        index, digits[position] = divmod(index, bases[position])
+    return digits
+
+
+def indices_to_digits(indices: np.ndarray, bases: [int]) -> np.ndarray:
+    """
+    Returns the digits of many indices at once (see index_to_digits) - one row per index
+    The indices must be smaller than 2^64
+    """
+    remaining = np.array(indices, dtype=np.uint64)
+    digits = np.empty((len(remaining), len(bases)), dtype=np.intp)
+    for position in range(len(bases) - 1, -1, -1):
+        base = np.uint64(bases[position])
+        digits[:, position] = remaining % base
+        remaining //= base
+    return digits
+
+
+def parse_charset(definition: str, custom: [str] = ()) -> str:
+    """
+    Returns all characters of a charset definition (e.g. "?l?d_" -> lowercase letters, digits and "_")
+    Duplicate characters are only kept once, so every character has a unique digit value
+    :param definition: characters and placeholders
+    :param custom: the custom charsets ?1, ?2, ... (already parsed)
+    """
+    chars = []
+    position = 0
+    while position < len(definition):
+        char = definition[position]
+        if char == "?":
+            if position + 1 == len(definition):
+                raise ValueError("Charset ends with an unfinished placeholder '?'")
+            chars.append(_placeholder(definition[position + 1], custom))
+            position += 2
+        else:
+            chars.append(char)
+            position += 1
+    return ''.join(dict.fromkeys(''.join(chars)))
+
+
+def _placeholder(name: str, custom: [str]) -> str:
+    if name == "?":
+        return "?"
+    if name in CHARSETS:
+        return CHARSETS[name]
+    if name.isdigit() and 1 <= int(name) <= len(custom):
+        return custom[int(name) - 1]
+    raise ValueError(f"Unknown charset '?{name}'")
+
+
+def parse_mask(mask: str, custom: [str] = ()) -> [str]:
+    """
+    Returns the charset of every position of a mask
+    :param mask: e.g. "?u?l?l?d" or "pass?d?d"
+    :param custom: definitions of the custom charsets ?1, ?2, ... (e.g. ["?l?d"])
+    """
+    custom = [parse_charset(definition) for definition in custom]
+    charsets = []
+    position = 0
+    while position < len(mask):
+        if mask[position] == "?":
+            if position + 1 == len(mask):
+                raise ValueError("Mask ends with an unfinished placeholder '?'")
+            charsets.append(parse_charset(mask[position:position + 2], custom))
+            position += 2
+        else:
+            charsets.append(mask[position])
+            position += 1
+    return charsets
+
+
+class Mask:
+    """
+    All candidates of a mask - from min_length up to the full length of the mask (shortest first)
+    Candidates can be accessed by their index like a list: mask[i], mask.index_of(candidate)
+    :param mask: the mask, e.g. "?u?l?l?l?d?d"
+    :param custom: definitions of the custom charsets ?1, ?2, ...
+    :param min_length: also include the prefixes of the mask down to this length (defaults to the full length)
+    """
+    _mask: str
+    _charsets: [str]  # Characters of every position
+    _digits: [{str: int}]  # Character -> digit value for every position
+    _min_length: int
+    _sizes: [int]  # _sizes[length] is the number of candidates with that length (product of the first charsets)
+    _offsets: [int]  # _offsets[length] is the index of the first candidate with that length
+
+    def __init__(self, mask: str, custom: [str] = (), min_length: int | None = None):
+        self._mask = mask
+        self._charsets = parse_mask(mask, custom)
+        if not self._charsets:
+            raise ValueError("Mask must contain at least one position")
+        self._digits = [{char: digit for digit, char in enumerate(charset)} for charset in self._charsets]
+        self._min_length = len(self._charsets) if min_length is None else min_length
+        if not 1 <= self._min_length <= len(self._charsets):
+            raise ValueError(f"min_length must be between 1 and {len(self._charsets)}")
+
+        self._sizes = [1]
+        for charset in self._charsets:
+            self._sizes.append(self._sizes[-1] * len(charset))
+        self._offsets = [0] * (len(self._charsets) + 2)
+        for length in range(self._min_length, len(self._charsets) + 1):
+            self._offsets[length + 1] = self._offsets[length] + self._sizes[length]
+
+    def __str__(self):
+        return self._mask
+
+    def __getitem__(self, index: int) -> str:
+        return self.candidate(index)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iterate()
+
+    def __contains__(self, candidate: str) -> bool:
+        try:
+            self.index_of(candidate)
+        except ValueError:
+            return False
+        return True
+
+    def get_charsets(self) -> [str]:
+        return self._charsets
+
+    def get_lengths(self) -> range:
+        return range(self._min_length, len(self._charsets) + 1)
+
+    def get_size(self) -> int:
+        """Returns the exact number of candidates"""
+        return self._offsets[len(self._charsets) + 1]
+
+    def get_length_range(self, length: int) -> (int, int):
+        """Returns the index range [start, end) of all candidates with the given length"""
+        if length not in self.get_lengths():
+            raise ValueError(f"The mask has no candidates of length {length}")
+        return self._offsets[length], self._offsets[length + 1]
+
+    def _locate(self, index: int) -> (int, int):
+        # Returns the length of the candidate and its index among the candidates of that length
+        if not 0 <= index < self.get_size():
+            raise IndexError("Candidate index out of range")
+        length = self._min_length
+        while index >= self._offsets[length + 1]:
+            length += 1
+        return length, index - self._offsets[length]
+
+    def _to_digits(self, length: int, index: int) -> [int]:
+        return index_to_digits(index, [len(charset) for charset in self._charsets[:length]])
+
+    def candidate(self, index: int) -> str:
+        """Returns the candidate with the given index (negative indices count from the end)"""
+        if index < 0:
+            index += self.get_size()
+        length, index = self._locate(index)
+        return ''.join(charset[digit] for charset, digit in zip(self._charsets, self._to_digits(length, index)))
+
+    def index_of(self, candidate: str) -> int:
+        """Returns the index of a candidate - raises ValueError if the candidate does not match the mask"""
+        length = len(candidate)
+        if length not in self.get_lengths():
+            raise ValueError(f"'{candidate}' does not have a length of the mask")
+        index = 0
+        for position, char in enumerate(candidate):
+            digit = self._digits[position].get(char)
+            if digit is None:
+                raise ValueError(f"'{candidate}' does not match the mask at position {position}")
+            index = index * len(self._charsets[position]) + digit
+        return self._offsets[length] + index
+
+    def iterate(self, start: int = 0, end: int | None = None) -> Iterator[str]:
+        """
+        Yields the candidates with index start <= i < end lazily
+        Jumps to start in O(length) - then every candidate only changes the last position (most of the time)
+        """
+        size = self.get_size()
+        end = size if end is None else min(end, size)
+        index = max(start, 0)
+        while index < end:
+            length, local = self._locate(index)
+            stop = min(end, self._offsets[length + 1]) - self._offsets[length]  # Stay within this length
+            digits = self._to_digits(length, local)
+            chars = [charset[digit] for charset, digit in zip(self._charsets, digits)]
+            last = length - 1
+            last_charset = self._charsets[last]
+            while True:
+                # Yield the candidates that only differ in the last position with one shared prefix
+                prefix = ''.join(chars[:last])
+                count = min(len(last_charset) - digits[last], stop - local)
+                for char in last_charset[digits[last]:digits[last] + count]:
+                    yield prefix + char
+                local += count
+                if local >= stop:
+                    break
+                # Roll over: increase the next position to the left until one does not overflow
+                digits[last] = 0
+                position = last - 1
+                while digits[position] == len(self._charsets[position]) - 1:
+                    digits[position] = 0
+                    chars[position] = self._charsets[position][0]
+                    position -= 1
+                digits[position] += 1
+                chars[position] = self._charsets[position][digits[position]]
+            index = self._offsets[length] + stop
+
+    def split(self, parts: int) -> [(int, int)]:
+        """
+        Splits the keyspace into parts index ranges [start, end) of (almost) the same size
+        The result only depends on the mask and parts - so independent machines can each take their own range
+        """
+        if parts < 1:
+            raise ValueError("parts must be at least 1")
+        size = self.get_size()
+        bounds = [size * part // parts for part in range(parts + 1)]
+        return list(zip(bounds, bounds[1:]))
@@ -0,0 +1,184 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Modular Exponentiation
+
+# Almost all public key cryptography computes g^e mod n for huge numbers (Diffie-Hellman, RSA, signatures)
+# Computing g^e first and reducing afterward is impossible: g^e has e * log2(g) bits
+# Reducing after every multiplication keeps all intermediate values below n
+# Square and multiply (see toymath.pow_mult_sqr) needs about log2(e) squarings and log2(e)/2 multiplications
+# The methods here reduce the number of multiplications further:
+#       - sliding window: process the exponent in windows of several bits using precomputed odd powers of g
+#       - fixed-base comb: if the same g is used many times (e.g. the generator in Diffie-Hellman),
+#         precompute a table once, so each exponentiation needs only about log2(e)/w squarings
+#       - Montgomery multiplication: replaces the division by n with shifts and masks by a power of two
+
+
+def _window_size(bits: int) -> int:
+    # Bigger windows need more precomputed powers but fewer multiplications - these sizes minimize the total
+    if bits <= 24:
+        return 1
+    if bits <= 80:
+        return 3
+    if bits <= 240:
+        return 4
+    if bits <= 672:
+        return 5
+    return 6
+
+
+def pow_mod(base: int, exponent: int, modulus: int, window: int | None = None) -> int:
+    """
+    Returns base^exponent mod modulus using left-to-right sliding window exponentiation
+    :param base: any number
+    :param exponent: a non-negative exponent
+    :param modulus: the modulus (at least 1)
+    :param window: maximum window size in bits (chosen from the exponent size by default)
+    """
+    return _sliding_window(base % modulus, exponent, lambda a, b: a * b % modulus, 1 % modulus, window)
+
+
+def _sliding_window(base: int, exponent: int, mul, one: int, window: int | None) -> int:
+    if exponent < 0:
+        raise ValueError("Only positive exponents")
+    if exponent == 0:
+        return one
+    window = window or _window_size(exponent.bit_length())
+
+    # Precompute the odd powers base^1, base^3, ..., base^(2^window - 1)
+    square = mul(base, base)
+    odd_powers = [base]
+    for _ in range(1, 1 << (window - 1)):
+        odd_powers.append(mul(odd_powers[-1], square))
+
+    result = one
+    i = exponent.bit_length() - 1
+    while i >= 0:
+        if not (exponent >> i) & 1:
+            result = mul(result, result)  # A zero bit is just a squaring
+            i -= 1
+            continue
+        # Take the longest window starting at bit i that ends with a one bit (so its value is odd)
+        low = max(i - window + 1, 0)
+        while not (exponent >> low) & 1:
+            low += 1
+        value = (exponent >> low) & ((1 << (i - low + 1)) - 1)
+        for _ in range(i - low + 1):
+            result = mul(result, result)
+        result = mul(result, odd_powers[value >> 1])
+        i = low - 1
+    return result
+
+
+class MontgomeryContext:
+    """
+    Precomputed values for Montgomery multiplication modulo an odd n
+    Numbers are stored as x * R mod n with R = 2^k > n ("Montgomery form")
+    Multiplying two of them and reducing needs only multiplications, a mask and a shift instead of a division by n
+    """
+    _n: int  # The modulus
+    _bits: int  # k with R = 2^k
+    _mask: int  # R - 1
+    _n_prime: int  # -n^-1 mod R
+    _r2: int  # R^2 mod n, used to convert into Montgomery form
+
+    def __init__(self, n: int):
+        if n < 3 or n % 2 == 0:
+            raise ValueError("Montgomery multiplication needs an odd modulus > 1")
+        self._n = n
+        self._bits = n.bit_length()
+        self._mask = (1 << self._bits) - 1
+        self._n_prime = -pow(n, -1, 1 << self._bits) & self._mask
+        self._r2 = pow(1 << self._bits, 2, n)
+
+    def get_modulus(self) -> int:
+        return self._n
+
+    def reduce(self, t: int) -> int:
+        """Returns t * R^-1 mod n for 0 <= t < n * R (Montgomery reduction - REDC)"""
+        m = ((t & self._mask) * self._n_prime) & self._mask  # Makes t + m * n divisible by R
+        u = (t + m * self._n) >> self._bits
+        return u - self._n if u >= self._n else u
+
+    def to_montgomery(self, x: int) -> int:
+        return self.reduce((x % self._n) * self._r2)
+
+    def from_montgomery(self, x: int) -> int:
+        return self.reduce(x)
+
+    def mul(self, a: int, b: int) -> int:
+        """Multiplies two numbers in Montgomery form"""
+        return self.reduce(a * b)
+
+    def pow(self, base: int, exponent: int, window: int | None = None) -> int:
+        """Returns base^exponent mod n (normal numbers in and out, Montgomery form only inside)"""
+        one = self.to_montgomery(1)
+        result = _sliding_window(self.to_montgomery(base), exponent, self.mul, one, window)
+        return self.from_montgomery(result)
+
+
+class FixedBaseTable:
+    """
+    Precomputed table for raising one fixed base to many different exponents (comb method by Lim and Lee)
+    The exponent bits are split into `teeth` rows of d bits each. Bit j of all rows together select one table entry,
+    which is the product of the bases g^(2^(i*d)) of all selected rows. Each exponentiation then needs
+    only d squarings and d multiplications instead of log2(e) squarings
+    """
+    _base: int
+    _modulus: int
+    _teeth: int  # Number of rows - the table has 2^teeth entries
+    _row_bits: int  # d - bits per row
+    _table: [int]
+
+    def __init__(self, base: int, modulus: int, max_bits: int, teeth: int = 8):
+        self._base = base % modulus
+        self._modulus = modulus
+        self._teeth = teeth
+        self._row_bits = max(1, -(-max_bits // teeth))
+        # g^(2^(i*d)) for every row i
+        row_bases = [self._base]
+        for _ in range(1, teeth):
+            row_bases.append(pow(row_bases[-1], 1 << self._row_bits, modulus))
+        # Entry s is the product of the row bases of all bits set in s
+        table = [1 % modulus] * (1 << teeth)
+        for s in range(1, 1 << teeth):
+            lowest = (s & -s).bit_length() - 1
+            table[s] = table[s & (s - 1)] * row_bases[lowest] % modulus
+        self._table = table
+
+    def get_max_bits(self) -> int:
+        return self._teeth * self._row_bits
+
+    def pow(self, exponent: int) -> int:
+        """Returns base^exponent mod modulus. Larger exponents than max_bits fall back to pow_mod"""
+        if exponent < 0:
+            raise ValueError("Only positive exponents")
+        if exponent.bit_length() > self.get_max_bits():
+            return pow_mod(self._base, exponent, self._modulus)
+        d = self._row_bits
+        mask = (1 << d) - 1
+        rows = [(exponent >> (i * d)) & mask for i in range(self._teeth)]
+        modulus = self._modulus
+        table = self._table
+        result = 1 % modulus
+        for j in range(d - 1, -1, -1):
+            index = 0
+            for i, row in enumerate(rows):
+                index |= ((row >> j) & 1) << i
+            result = result * result % modulus
+            if index:
+                result = result * table[index] % modulus
+        return result
+
+
+def pow_many(base: int, exponents: [int], modulus: int) -> [int]:
+    """
+    Returns base^e mod modulus for every exponent e
+    The fixed-base table is built once and shared by all exponents
+    """
+    if not exponents:
+        return []
+    max_bits = max(max(exponent.bit_length() for exponent in exponents), 1)
+    if len(exponents) < 4:  # Building the table does not pay off for very few exponents
+        return [pow_mod(base, exponent, modulus) for exponent in exponents]
+    table = FixedBaseTable(base, modulus, max_bits)
+    return [table.pow(exponent) for exponent in exponents]
@@ -0,0 +1,315 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Network Transport
+
+# Runs the devices of toycrypt.simulation in different processes connected over real sockets (asyncio)
+#       - A Hub process accepts TCP (host, port) or Unix socket (path) connections and forwards every message
+#         to the process of its target and to all processes with listeners of its topic (e.g. Eve)
+#       - A RemoteConnection is used like a Connection: devices connect to it, send and receive messages
+#         All devices of one process share a single socket (connection reuse)
+# Messages are sent as frames: 4 bytes length (big-endian), 1 byte frame type, then the body
+# A message body is: sent time (8 byte float), the lengths of sender, target and topic (2 bytes each),
+# the three names (UTF-8) and the content (UTF-8)
+# Sending only appends the frame to the socket buffer - many messages are in flight at once (pipelining)
+# Backpressure: every receiver has a bounded queue in the hub. If it is full, the hub stops reading from the sender
+# so the sender's socket buffer fills up and RemoteConnection.drain() waits until the receiver catches up
+
+import asyncio
+import struct
+import time
+from typing import Dict, List, Set
+
+from toycrypt.simulation import Connection, Device, Message
+
+_LENGTH = struct.Struct(">I")
+_HEADER = struct.Struct(">dHHH")  # Sent time and the lengths of sender, target and topic
+
+# Frame types
+_HELLO = 1  # Body: device name - the device is reachable through this connection
+_LISTEN = 2  # Body: topic - the connection wants copies of all messages of the topic (all topics if empty)
+_MESSAGE = 3
+_PING = 4  # Empty body - the hub answers with the same frame once it has processed all earlier frames
+
+_READ_SIZE = 1 << 16
+_QUEUE_FRAMES = 4096  # Frames buffered in the hub per connection before the senders are slowed down
+_HIGH_WATER = 1 << 20  # Bytes in the socket buffer before drain() waits
+
+
+def _frame(frame_type: int, body: bytes) -> bytes:
+    return _LENGTH.pack(len(body) + 1) + bytes((frame_type,)) + body
+
+
+def encode_message(message: Message) -> bytes:
+    """Returns the frame of a message"""
+    sender = message.get_sender().get_name().encode("utf-8")
+    target = message.get_target().get_name().encode("utf-8")
+    topic = (message.get_topic() or "").encode("utf-8")
+    header = _HEADER.pack(message.get_sent_time(), len(sender), len(target), len(topic))
+    return _frame(_MESSAGE, header + sender + target + topic + message.get_content().encode("utf-8"))
+
+
+def _parse_message(body: memoryview) -> (float, str, str, str, str):
+    sent_time, sender_length, target_length, topic_length = _HEADER.unpack_from(body)
+    position = _HEADER.size
+    names = []
+    for length in (sender_length, target_length, topic_length):
+        names.append(str(body[position:position + length], "utf-8"))
+        position += length
+    return sent_time, names[0], names[1], names[2], str(body[position:], "utf-8")
+
+
+def _split_frames(buffer: bytearray) -> List[bytes]:
+    """Removes all complete frames from the buffer and returns them (each with its length prefix)"""
+    frames = []
+    position = 0
+    while len(buffer) - position >= _LENGTH.size:
+        (length,) = _LENGTH.unpack_from(buffer, position)
+        end = position + _LENGTH.size + length
+        if end > len(buffer):
+            break
+        frames.append(bytes(buffer[position:end]))
+        position = end
+    del buffer[:position]
+    return frames
+
+
+async def _open(address):
+    if isinstance(address, str):
+        return await asyncio.open_unix_connection(address)
+    return await asyncio.open_connection(*address)
+
+
+class _HubClient:
+    """One connected process as seen by the hub"""
+    _writer: asyncio.StreamWriter
+    _queue: asyncio.Queue
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self._writer = writer
+        self._queue = asyncio.Queue(_QUEUE_FRAMES)
+
+    async def put(self, frame: bytes):
+        await self._queue.put(frame)  # Waits if the receiver is too slow - this is the backpressure
+
+    async def write_loop(self):
+        # Takes all queued frames at once, so many small frames become one write
+        queue = self._queue
+        while True:
+            frames = [await queue.get()]
+            while not queue.empty():
+                frames.append(queue.get_nowait())
+            self._writer.write(b"".join(frames))
+            await self._writer.drain()
+
+
+class Hub:
+    """
+    Forwards messages between the processes of a simulation
+    Every message goes to the process of its target and to every process listening to its topic - at most once each
+    """
+    _address: tuple | str
+    _routes: Dict[str, _HubClient]  # Device name -> connection
+    _listeners: Dict[str, Set[_HubClient]]  # Topic ("" for all) -> connections
+    _server: asyncio.AbstractServer | None
+    _forwarded: int
+    _unroutable: int
+
+    def __init__(self, address: tuple | str):
+        self._address = address
+        self._routes = {}
+        self._listeners = {}
+        self._server = None
+        self._forwarded = 0
+        self._unroutable = 0
+
+    def get_forwarded(self) -> int:
+        return self._forwarded
+
+    def get_unroutable(self) -> int:
+        return self._unroutable
+
+    async def start(self):
+        if isinstance(self._address, str):
+            self._server = await asyncio.start_unix_server(self._handle, self._address)
+        else:
+            self._server = await asyncio.start_server(self._handle, *self._address)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _HubClient(writer)
+        writer_task = asyncio.create_task(client.write_loop())
+        buffer = bytearray()
+        try:
+            while data := await reader.read(_READ_SIZE):
+                buffer += data
+                for frame in _split_frames(buffer):
+                    await self._route(client, frame)
+        except ConnectionError:
+            pass
+        finally:
+            writer_task.cancel()
+            self._routes = {name: route for name, route in self._routes.items() if route is not client}
+            for listeners in self._listeners.values():
+                listeners.discard(client)
+            writer.close()
+
+    async def _route(self, client: _HubClient, frame: bytes):
+        frame_type = frame[_LENGTH.size]
+        body = memoryview(frame)[_LENGTH.size + 1:]
+        if frame_type == _HELLO:
+            self._routes[str(body, "utf-8")] = client
+        elif frame_type == _LISTEN:
+            self._listeners.setdefault(str(body, "utf-8"), set()).add(client)
+        elif frame_type == _MESSAGE:
+            # Only the header is parsed - the frame is forwarded unchanged
+            _, sender_length, target_length, topic_length = _HEADER.unpack_from(body)
+            target_start = _HEADER.size + sender_length
+            target = str(body[target_start:target_start + target_length], "utf-8")
+            topic = str(body[target_start + target_length:target_start + target_length + topic_length], "utf-8")
+            receivers = set()
+            if target in self._routes:
+                receivers.add(self._routes[target])
+            else:
+                self._unroutable += 1
+            if self._listeners:
+                if topic:
+                    receivers.update(self._listeners.get(topic, ()))
+                receivers.update(self._listeners.get("", ()))
+            for receiver in receivers:
+                await receiver.put(frame)
+            self._forwarded += 1
+        elif frame_type == _PING:
+            await client.put(frame)
+
+
+def run_hub(address: tuple | str):
+    """Runs a hub until the process is stopped - the target of a hub process"""
+    asyncio.run(Hub(address).serve_forever())
+
+
+class RemoteConnection(Connection):
+    """
+    A Connection to a Hub. Used like a Connection: devices connect to it, send() and receive messages
+    The connection must be opened inside a running event loop before devices connect
+    Devices in other processes are addressed with get_device(name)
+    """
+    _address: tuple | str
+    _reader: asyncio.StreamReader | None
+    _writer: asyncio.StreamWriter | None
+    _read_task: asyncio.Task | None
+    _local: Dict[str, Device]  # Devices of this process by name
+    _remote: Dict[str, Device]  # Stand-ins for devices of other processes
+    _delivered_target: int
+    _delivered_event: asyncio.Event | None
+    _pings: List[asyncio.Future]
+
+    def __init__(self, address: tuple | str):
+        super().__init__()
+        self._address = address
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._local = {}
+        self._remote = {}
+        self._delivered_target = 0
+        self._delivered_event = None
+        self._pings = []
+
+    async def open(self):
+        self._reader, self._writer = await _open(self._address)
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def close(self):
+        await self.drain()
+        self._read_task.cancel()
+        self._writer.close()
+        await self._writer.wait_closed()
+
+    def get_time(self) -> float:
+        """Returns the wall-clock time - the same clock in all processes of the machine"""
+        return time.time()
+
+    def get_device(self, name: str) -> Device:
+        """Returns the device with this name - a stand-in if it lives in another process"""
+        if name in self._local:
+            return self._local[name]
+        if name not in self._remote:
+            self._remote[name] = Device(name)
+        return self._remote[name]
+
+    def add_client(self, client: Device):
+        super().add_client(client)
+        self._local[client.get_name()] = client
+        self._writer.write(_frame(_HELLO, client.get_name().encode("utf-8")))
+
+    def add_listener(self, listener: Device, topic: str | None = None):
+        super().add_listener(listener, topic)
+        self._local.setdefault(listener.get_name(), listener)
+        self._writer.write(_frame(_LISTEN, (topic or "").encode("utf-8")))
+
+    def send_message(self, message: Message):
+        """Appends the message to the socket buffer and returns immediately"""
+        if message.get_sender() not in self._clients:
+            print("Message could not be sent - Target not connected")
+            return
+        self._sent += 1
+        self._writer.write(encode_message(message))
+
+    async def drain(self):
+        """Waits until the socket buffer is below its limit - call it regularly when sending many messages"""
+        if self._writer.transport.get_write_buffer_size() > _HIGH_WATER:
+            await self._writer.drain()
+        elif self._writer.transport.get_write_buffer_size():
+            await asyncio.sleep(0)  # Lets the event loop write the buffer
+
+    async def sync(self):
+        """Waits until the hub has processed everything sent so far (e.g. before other processes send to a device)"""
+        pong = asyncio.get_running_loop().create_future()
+        self._pings.append(pong)
+        self._writer.write(_frame(_PING, b""))
+        await pong
+
+    async def wait_delivered(self, count: int):
+        """Waits until count messages were delivered to devices of this process"""
+        if self._delivered >= count:
+            return
+        self._delivered_target = count
+        self._delivered_event = asyncio.Event()
+        await self._delivered_event.wait()
+
+    async def _read_loop(self):
+        buffer = bytearray()
+        while data := await self._reader.read(_READ_SIZE):
+            buffer += data
+            for frame in _split_frames(buffer):
+                if frame[_LENGTH.size] == _PING:
+                    self._pings.pop(0).set_result(None)
+                    continue
+                sent_time, sender, target, topic, content = _parse_message(memoryview(frame)[_LENGTH.size + 1:])
+                message = Message(self.get_device(sender), self.get_device(target), content, topic or None, sent_time)
+                self._deliver_local(message)
+            if self._delivered_event is not None and self._delivered >= self._delivered_target:
+                self._delivered_event.set()
+
+    def _deliver_local(self, message: Message):
+        # The hub sends each message once per process - the process hands it to its target and its listeners
+        if message.get_target().get_name() in self._local and message.get_target() in self._clients:
+            message.get_target().receive_message(message)
+            self._delivered += 1
+        listeners = self._listeners
+        if listeners:
+            topic = message.get_topic()
+            if topic is not None:
+                for listener in listeners.get(topic, ()):
+                    listener.receive_message(message)
+            for listener in listeners.get(None, ()):
+                listener.receive_message(message)
@@ -0,0 +1,246 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Rainbow Tables
+
+# A brute force attack has to try the whole keyspace again for every hash it wants to crack
+# Storing every (input, hash) pair once instead is fast to look up but needs far too much memory
+# A rainbow table is a trade-off between both: It stores chains of alternating hash and reduce steps
+#       start -> hash -> reduce_0 -> hash -> reduce_1 -> ... -> reduce_t-1 -> end
+# A reduction function maps a hash back into the keyspace (it is NOT an inverse - just any input)
+# Only the start and end of each chain is stored, the inputs in between are recomputed when needed
+# Every column uses a different reduction function - so two chains that collide in different columns do not merge
+# https://en.wikipedia.org/wiki/Rainbow_table
+
+# Lookup of a hash h: assume h is in column c, reduce it and continue the chain up to the end
+# If that end is stored, rebuild the chain from its start up to column c - its input is likely a preimage of h
+# Doing this for all columns costs about t*t/2 hash steps, which are computed for all columns at once with NumPy
+
+# The keyspace is all strings of a fixed length over a charset, in the same order as itertools.product
+# Candidate number i is the number i written in base len(chars) with the chars as digits (see toycrypt.keyspace)
+
+import json
+import multiprocessing
+
+import numpy as np
+
+from toycrypt import hashing
+from toycrypt.hashing import Hash, hash_codes
+from toycrypt.keyspace import indices_to_digits
+from toycrypt.telemetry import ProgressReporter
+
+_MAGIC = b"TCRT"
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)  # Large odd number to spread a hash over the whole keyspace
+_LOOKUP_ROWS = 1 << 20  # Maximum number of (target, column) rows processed at once during a lookup
+
+
+class _ChainKeyspace:
+    """
+    All strings of a fixed length over the given characters
+    """
+    _chars: str
+    _length: int
+    _codes: np.ndarray  # Character codes of the chars
+    _size: int  # Number of strings in the keyspace
+
+    def __init__(self, chars: str, length: int):
+        self._chars = ''.join(chars)
+        self._length = length
+        self._codes = np.array([ord(char) for char in self._chars], dtype=np.uint32)
+        self._size = pow(len(self._chars), length)
+        if self._size >= 1 << 64:
+            raise ValueError("Keyspace must be smaller than 2**64")
+
+    def get_chars(self) -> str:
+        return self._chars
+
+    def get_length(self) -> int:
+        return self._length
+
+    def get_size(self) -> int:
+        return self._size
+
+    def to_codes(self, indices: np.ndarray) -> np.ndarray:
+        """Returns the character codes of the strings with the given indices (one string per row)"""
+        return self._codes[indices_to_digits(indices, [len(self._chars)] * self._length)]
+
+    def to_string(self, index: int) -> str:
+        """Returns the string with the given index"""
+        return ''.join(chr(code) for code in self.to_codes([index])[0])
+
+
+def _reduce(hash_nums: np.ndarray, column, size: int) -> np.ndarray:
+    # Each column adds its own number - making it a different reduction function
+    return (hash_nums * _MULTIPLIER + np.uint64(column)) % np.uint64(size)
+
+
+def _hash_indices(hash_function, keyspace: _ChainKeyspace, indices: np.ndarray) -> np.ndarray:
+    return hash_codes(hash_function, keyspace.to_codes(indices))
+
+
+def _walk_chains(hash_function, keyspace: _ChainKeyspace, starts: np.ndarray, first_column: int,
+                 chain_length: int) -> np.ndarray:
+    """Continues the chains at the given points from first_column up to the end and returns the end points"""
+    points = np.array(starts, dtype=np.uint64)
+    for column in range(first_column, chain_length):
+        points = _reduce(_hash_indices(hash_function, keyspace, points), column, keyspace.get_size())
+    return points
+
+
+def _generate_block(arguments: tuple) -> np.ndarray:
+    hash_function, chars, length, starts, chain_length = arguments
+    return _walk_chains(hash_function, _ChainKeyspace(chars, length), starts, 0, chain_length)
+
+
+def generate_table(path: str, hash_function, chars: str, length: int, chains: int, chain_length: int,
+                   workers: int | None = None, block_size: int = 1 << 16,
+                   progress: ProgressReporter | None = None) -> "RainbowTable":
+    """
+    Generates a rainbow table and writes it to a file
+    Chains whose end collides with another chain are dropped, as they cover the same inputs from there on
+    :param path: file the table is written to
+    :param hash_function: one of the hash functions of toycrypt.hashing
+    :param chars: the allowed characters
+    :param length: length of the inputs
+    :param chains: number of chains to generate (the stored number can be lower after removing duplicates)
+    :param chain_length: number of hash/reduce steps per chain
+    :param workers: number of processes (defaults to the number of CPUs)
+    :param block_size: number of chains each worker computes at once
+    :param progress: receives the number of finished chains after every block
+    :return: the opened table
+    """
+    keyspace = _ChainKeyspace(chars, length)
+    size = keyspace.get_size()
+    chains = min(chains, size)
+    # Spread the start points evenly over the keyspace
+    starts = np.arange(chains, dtype=np.uint64) * np.uint64(size // chains)
+
+    blocks = [starts[i:i + block_size] for i in range(0, chains, block_size)]
+    if progress is not None:
+        progress.start(chains)
+    ends = []
+    with multiprocessing.Pool(workers) as pool:
+        tasks = [(hash_function, keyspace.get_chars(), length, block, chain_length) for block in blocks]
+        for block_ends in pool.imap(_generate_block, tasks):  # In order of the blocks
+            ends.append(block_ends)
+            if progress is not None:
+                progress.update(min(len(ends) * block_size, chains))
+    if progress is not None:
+        progress.finish(chains)
+    ends = np.concatenate(ends) if ends else np.empty(0, dtype=np.uint64)
+
+    # Sort by the end point (for binary search) and keep only one chain per end point
+    order = np.argsort(ends, kind="stable")
+    ends, starts = ends[order], starts[order]
+    unique = np.ones(len(ends), dtype=bool)
+    unique[1:] = ends[1:] != ends[:-1]
+    ends, starts = ends[unique], starts[unique]
+
+    header = json.dumps({"hash_function": hash_function.__name__, "chars": keyspace.get_chars(), "length": length,
+                         "chain_length": chain_length, "chains": len(ends)}).encode()
+    header += b" " * (-(len(_MAGIC) + 4 + len(header)) % 8)  # Pad so the arrays start 8-byte aligned
+    with open(path, "wb") as file:
+        file.write(_MAGIC)
+        file.write(len(header).to_bytes(4, "little"))
+        file.write(header)
+        file.write(ends.astype("<u8").tobytes())
+        file.write(starts.astype("<u8").tobytes())
+    return RainbowTable(path)
+
+
+class RainbowTable:
+    """
+    A rainbow table stored in a file. The file is memory-mapped, so only the parts touched by a lookup are read
+    File layout: magic, header size, JSON header, all end points (sorted), all start points (same order)
+    """
+    _hash_function: object
+    _keyspace: _ChainKeyspace
+    _chain_length: int
+    _ends: np.ndarray  # Memory-mapped sorted end points
+    _starts: np.ndarray  # Memory-mapped start points of the chains
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError("Not a rainbow table file")
+            header_size = int.from_bytes(file.read(4), "little")
+            header = json.loads(file.read(header_size))
+        self._hash_function = getattr(hashing, header["hash_function"])
+        self._keyspace = _ChainKeyspace(header["chars"], header["length"])
+        self._chain_length = header["chain_length"]
+        chains = header["chains"]
+        offset = len(_MAGIC) + 4 + header_size
+        if chains == 0:
+            self._ends = self._starts = np.empty(0, dtype=np.uint64)
+            return
+        self._ends = np.memmap(path, dtype="<u8", mode="r", offset=offset, shape=(chains,))
+        self._starts = np.memmap(path, dtype="<u8", mode="r", offset=offset + 8 * chains, shape=(chains,))
+
+    def __len__(self):
+        return len(self._ends)
+
+    def get_hash_function(self):
+        return self._hash_function
+
+    def get_keyspace(self) -> _ChainKeyspace:
+        return self._keyspace
+
+    def get_chain_length(self) -> int:
+        return self._chain_length
+
+    def lookup(self, target) -> str | None:
+        """
+        Searches the table for an input that hashes to the target
+        :param target: the wanted hash as hash object or number
+        :return: a preimage or None if the table does not contain one
+        """
+        return self.lookup_many([target])[0]
+
+    def lookup_many(self, targets) -> [str | None]:
+        """
+        Searches the table for preimages of all targets. All targets and columns are processed at once
+        :param targets: the wanted hashes as hash objects or numbers
+        :return: a preimage or None for each target
+        """
+        targets = np.array([t.get_hash() if isinstance(t, Hash) else t for t in targets], dtype=np.uint64)
+        results: [str | None] = []
+        # Each target needs chain_length rows - process them in chunks to keep the memory bounded
+        chunk_size = max(1, _LOOKUP_ROWS // max(1, self._chain_length))
+        for start in range(0, len(targets), chunk_size):
+            results += self._lookup_chunk(targets[start:start + chunk_size])
+        return results
+
+    def _lookup_chunk(self, targets: np.ndarray) -> [str | None]:
+        size = self._keyspace.get_size()
+        t = self._chain_length
+        results: [str | None] = [None] * len(targets)
+        if len(self._ends) == 0 or t == 0:
+            return results
+
+        # One row per (target, assumed column) pair: reduce the hash in its column and continue to the end
+        target_rows = np.repeat(np.arange(len(targets)), t)
+        columns = np.tile(np.arange(t, dtype=np.uint64), len(targets))
+        points = _reduce(targets[target_rows], columns, size)
+        for column in range(1, t):
+            active = columns < column  # Rows whose assumed column is before this one still have to move on
+            hashes = _hash_indices(self._hash_function, self._keyspace, points[active])
+            points[active] = _reduce(hashes, column, size)
+
+        # Find the rows whose end point is stored in the table
+        positions = np.searchsorted(self._ends, points)
+        positions[positions == len(self._ends)] = 0
+        matches = np.flatnonzero(self._ends[positions] == points)
+        if len(matches) == 0:
+            return results
+
+        # Rebuild the matching chains from their start up to the assumed column (false alarms are possible)
+        candidates = np.array(self._starts[positions[matches]], dtype=np.uint64)
+        candidate_columns = columns[matches]
+        for column in range(int(candidate_columns.max())):
+            active = candidate_columns > column
+            hashes = _hash_indices(self._hash_function, self._keyspace, candidates[active])
+            candidates[active] = _reduce(hashes, column, size)
+        hashes = _hash_indices(self._hash_function, self._keyspace, candidates)
+        for row, candidate, hash_num in zip(target_rows[matches], candidates, hashes):
+            if results[row] is None and hash_num == targets[row]:
+                results[row] = self._keyspace.to_string(int(candidate))
+        return results
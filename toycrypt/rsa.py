@@ -0,0 +1,214 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# RSA and Digital Signatures
+
+# RSA works with a modulus n = p * q of two secret primes (https://en.wikipedia.org/wiki/RSA_(cryptosystem))
+#       - The public key is (n, e), usually e = 65537
+#       - The private key is d with e * d = 1 mod lcm(p - 1, q - 1), so (m^e)^d = m mod n for every m
+#       - Computing d needs p and q - getting them from n is the factorization problem
+# A signature of a message is s = h^d mod n where h is the hash of the message
+# Anyone can check it with the public key: s^e mod n must be the hash of the message again
+
+# Signing is slow because d has as many bits as n. The Chinese Remainder Theorem (CRT) makes it about 3-4x faster:
+#       - compute s mod p and s mod q with the much smaller exponents dp = d mod (p - 1) and dq = d mod (q - 1)
+#         (numbers of half the size, exponents of half the size)
+#       - combine both with qinv = q^-1 mod p: s = s_q + q * (qinv * (s_p - s_q) mod p)
+
+# Verifying many signatures under the same key can be batched (screening by Bellare, Garay and Rabin):
+#       (s_1 * ... * s_k)^e = h_1 * ... * h_k mod n   if all signatures are valid
+# This needs one exponentiation for the whole batch instead of one per signature
+# Screening shows that all messages were signed by the owner of the private key,
+# but it does not prove that each signature is valid: a swapped factor (s_1 * x, s_2 / x) also passes
+# So screen() only returns one verdict for the whole batch - verify_many() checks every signature on its own
+# Note: a shared Montgomery context (modexp.MontgomeryContext) is not used for the many verifications -
+# in Python its reductions are slower than the built-in big number division used by pow_mod
+
+# This is textbook RSA on a 32-bit hash without padding - it shows the math, it is not secure
+
+import math
+import random
+import secrets
+
+from toycrypt import factorization, hashing, modexp, toymath
+from toycrypt.crypto import Key, KeyPair
+
+_SYSTEM_RANDOM = secrets.SystemRandom()
+_SMALL_PRIMES = math.prod(factorization.primes_up_to(1000).tolist())  # Used to remove most candidates with one gcd
+
+
+class RSAPublicKey(Key):
+    """The public key (n, e). The number of the key is the modulus n"""
+    _e: int
+
+    def __init__(self, n: int, e: int):
+        super().__init__(n)
+        self._e = e
+
+    def __str__(self):
+        return f"RSAPublicKey({self._number.bit_length()} bit, e={self._e})"
+
+    def __eq__(self, other):
+        return isinstance(other, RSAPublicKey) and (self._number, self._e) == (other._number, other._e)
+
+    def __hash__(self):
+        return hash((self._number, self._e))
+
+    def get_n(self) -> int:
+        return self._number
+
+    def get_e(self) -> int:
+        return self._e
+
+
+class RSAPrivateKey(Key):
+    """
+    The private key. The number of the key is the exponent d
+    The primes and the precomputed CRT values dp, dq and qinv are kept for fast signing
+    """
+    _n: int
+    _p: int
+    _q: int
+    _dp: int  # d mod (p - 1)
+    _dq: int  # d mod (q - 1)
+    _qinv: int  # q^-1 mod p
+
+    def __init__(self, n: int, d: int, p: int, q: int):
+        super().__init__(d)
+        self._n = n
+        self._p = p
+        self._q = q
+        self._dp = d % (p - 1)
+        self._dq = d % (q - 1)
+        self._qinv = toymath.get_multi_inverse(q, p)
+
+    def __str__(self):
+        return f"RSAPrivateKey({self._n.bit_length()} bit)"
+
+    def __eq__(self, other):
+        return isinstance(other, RSAPrivateKey) and (self._number, self._n) == (other._number, other._n)
+
+    def __hash__(self):
+        return hash((self._number, self._n))
+
+    def get_n(self) -> int:
+        return self._n
+
+    def get_d(self) -> int:
+        return self._number
+
+    def get_primes(self) -> (int, int):
+        return self._p, self._q
+
+    def decrypt(self, c: int) -> int:
+        """Returns c^d mod n using the Chinese Remainder Theorem"""
+        m_p = modexp.pow_mod(c, self._dp, self._p)
+        m_q = modexp.pow_mod(c, self._dq, self._q)
+        h = self._qinv * (m_p - m_q) % self._p
+        return m_q + h * self._q
+
+
+def generate_prime(bits: int, rng: random.Random | None = None) -> int:
+    """
+    Returns a random prime with exactly the given number of bits (the two highest bits are set,
+    so the product of two such primes has exactly twice as many bits)
+    """
+    if bits < 4:
+        raise ValueError("A prime needs at least 4 bits")
+    rng = rng or _SYSTEM_RANDOM
+    while True:
+        candidate = rng.getrandbits(bits) | (3 << (bits - 2)) | 1
+        # One gcd with the product of all small primes removes about 90% of the candidates
+        if math.gcd(candidate, _SMALL_PRIMES) != 1 and candidate >= 1000:
+            continue
+        if factorization.is_prime(candidate):
+            return candidate
+
+
+def generate_keypair(bits: int = 2048, e: int = 65537, rng: random.Random | None = None) -> KeyPair:
+    """
+    Returns a new RSA key pair with a modulus of the given number of bits
+    :param bits: size of the modulus n (at least 16)
+    :param e: the public exponent - must be odd
+    :param rng: random generator for the primes (a cryptographically secure one by default)
+    :return: KeyPair of an RSAPrivateKey and an RSAPublicKey
+    """
+    if bits < 16:
+        raise ValueError("The modulus needs at least 16 bits")
+    if e < 3 or e % 2 == 0:
+        raise ValueError("The public exponent must be odd and at least 3")
+    rng = rng or _SYSTEM_RANDOM
+    while True:
+        p = generate_prime(bits - bits // 2, rng)
+        q = generate_prime(bits // 2, rng)
+        carmichael = toymath.lcm(p - 1, q - 1)
+        if p == q or toymath.gcd(e, carmichael) != 1:
+            continue
+        d = toymath.get_multi_inverse(e, carmichael)
+        n = p * q
+        return KeyPair(RSAPrivateKey(n, d, p, q), RSAPublicKey(n, e))
+
+
+def _message_hash(message, hash_function) -> int:
+    if isinstance(message, str):
+        return hash_function(message).get_hash()
+    return hashing.get_hasher(hash_function, message).to_hash().get_hash()
+
+
+def sign(private: RSAPrivateKey, message, hash_function=hashing.hash_toycrypt) -> int:
+    """
+    Returns the signature hash(message)^d mod n computed with the Chinese Remainder Theorem
+    :param private: the private key of the signer
+    :param message: a string or bytes
+    :param hash_function: any hash function of toycrypt.hashing
+    """
+    return private.decrypt(_message_hash(message, hash_function) % private.get_n())
+
+
+def verify(public: RSAPublicKey, message, signature: int, hash_function=hashing.hash_toycrypt) -> bool:
+    """Returns true if the signature belongs to the message: signature^e mod n is the hash of the message"""
+    n = public.get_n()
+    if not 0 <= signature < n:
+        return False
+    return modexp.pow_mod(signature, public.get_e(), n) == _message_hash(message, hash_function) % n
+
+
+def _pair_hashes(n: int, messages: list, hash_function) -> [int]:
+    # All messages are hashed at once if they are strings
+    if messages and all(isinstance(message, str) for message in messages):
+        return [h % n for h in hashing.hash_many(hash_function, messages).tolist()]
+    return [_message_hash(message, hash_function) % n for message in messages]
+
+
+def verify_many(public: RSAPublicKey, pairs: [(object, int)], hash_function=hashing.hash_toycrypt) -> [bool]:
+    """
+    Verifies many (message, signature) pairs signed with the same key - every signature on its own
+    Use screen() first when only a verdict for the whole batch is needed
+    :param public: the public key of the signer
+    :param pairs: (message, signature) pairs
+    :param hash_function: the hash function that was used for signing
+    :return: for every pair whether its signature is valid
+    """
+    n, e = public.get_n(), public.get_e()
+    hashes = _pair_hashes(n, [message for message, _ in pairs], hash_function)
+    return [0 <= signature < n and modexp.pow_mod(signature, e, n) == h for (_, signature), h in zip(pairs, hashes)]
+
+
+def screen(public: RSAPublicKey, pairs: [(object, int)], hash_function=hashing.hash_toycrypt) -> bool:
+    """
+    Checks a batch of (message, signature) pairs signed with the same key with a single exponentiation
+    True means all messages were signed by the owner of the private key - but not that every signature is valid
+    If it returns False, verify_many() finds the invalid signatures
+    :param public: the public key of the signer
+    :param pairs: (message, signature) pairs
+    :param hash_function: the hash function that was used for signing
+    :return: the verdict for the whole batch
+    """
+    n, e = public.get_n(), public.get_e()
+    hashes = _pair_hashes(n, [message for message, _ in pairs], hash_function)
+    signature_product = hash_product = 1
+    for (_, signature), h in zip(pairs, hashes):
+        if not 0 <= signature < n:
+            return False
+        signature_product = signature_product * signature % n
+        hash_product = hash_product * h % n
+    return modexp.pow_mod(signature_product, e, n) == hash_product
@@ -1,17 +1,36 @@
 #  SPDX-License-Identifier: GPL-3.0-only
 
-from typing import List
+# Network Simulation
+
+# Without a scheduler a connection delivers every message instantly
+# With a Scheduler the network is simulated with a virtual clock (discrete-event simulation):
+#       - every delivery is an event in a priority queue ordered by its virtual time
+#       - the scheduler always jumps to the next event - waiting costs no real time
+#       - a link has a latency (seconds until the first byte arrives) and a bandwidth (bytes per second)
+#         A message occupies its link for size / bandwidth seconds, later messages on the same link wait for it
+# Listeners subscribe to topics, so a message only visits the listeners of its topic (and those listening to all)
+# Inboxes can be bounded - messages arriving at a full inbox are dropped and counted
+
+import heapq
+from collections import deque
+from typing import Deque, Dict, List, Set, Tuple
 
 
 class Message:
+    __slots__ = ("_payload", "_sender", "_target", "_topic", "_sent_time")
     _payload: str
     _sender: "Device"
     _target: "Device"
+    _topic: str | None
+    _sent_time: float
 
-    def __init__(self, sender: "Device", target: "Device", content: str):
+    def __init__(self, sender: "Device", target: "Device", content: str, topic: str | None = None,
+                 sent_time: float = 0.0):
         self._payload = content
         self._sender = sender
         self._target = target
+        self._topic = topic
+        self._sent_time = sent_time
 
     def __str__(self):
         return f"Message from [{self._sender.get_name()}] to [{self._target.get_name()}]: {self._payload}"
@@ -25,73 +44,246 @@ class Message:
     def get_target(self) -> "Device":
         return self._target
 
+    def get_topic(self) -> str | None:
+        return self._topic
+
+    def get_sent_time(self) -> float:
+        return self._sent_time
+
+    def get_size(self) -> int:
+        return len(self._payload)
+
+
+class Scheduler:
+    """
+    Event queue with a virtual clock. Events are (time, sequence number, callback, argument) tuples in a heap
+    The sequence number keeps events with the same time in the order they were scheduled
+    """
+    _queue: List[Tuple[float, int, object, object]]
+    _time: float
+    _sequence: int
+    _processed: int
+
+    def __init__(self):
+        self._queue = []
+        self._time = 0.0
+        self._sequence = 0
+        self._processed = 0
+
+    def get_time(self) -> float:
+        return self._time
+
+    def get_processed(self) -> int:
+        return self._processed
+
+    def get_pending(self) -> int:
+        return len(self._queue)
+
+    def schedule(self, delay: float, callback, argument=None):
+        """Calls callback(argument) after delay seconds of virtual time"""
+        self.schedule_at(self._time + delay, callback, argument)
+
+    def schedule_at(self, time: float, callback, argument=None):
+        """Calls callback(argument) at the given virtual time"""
+        if time < self._time:
+            raise ValueError("Events can not be scheduled in the past")
+        self._sequence = sequence = self._sequence + 1
+        heapq.heappush(self._queue, (time, sequence, callback, argument))
+
+    def run(self, until: float | None = None) -> int:
+        """
+        Processes events in order of their time until the queue is empty or the next event is after until
+        :return: the number of processed events
+        """
+        queue = self._queue
+        pop = heapq.heappop
+        processed = 0
+        while queue and (until is None or queue[0][0] <= until):
+            time, _, callback, argument = pop(queue)
+            self._time = time
+            callback(argument)
+            processed += 1
+        if until is not None and until > self._time:
+            self._time = until
+        self._processed += processed
+        return processed
+
+
+class Link:
+    """
+    A one-way link with a latency in seconds and a bandwidth in bytes per second (None means unlimited)
+    """
+    __slots__ = ("_latency", "_bandwidth", "_busy_until")
+    _latency: float
+    _bandwidth: float | None
+    _busy_until: float  # Virtual time when the last message has left the link
+
+    def __init__(self, latency: float = 0.0, bandwidth: float | None = None):
+        self._latency = latency
+        self._bandwidth = bandwidth
+        self._busy_until = 0.0
+
+    def get_latency(self) -> float:
+        return self._latency
+
+    def get_bandwidth(self) -> float | None:
+        return self._bandwidth
+
+    def transmit(self, now: float, size: int) -> float:
+        """Reserves the link for a message of size bytes and returns its arrival time"""
+        start = now if now > self._busy_until else self._busy_until
+        if self._bandwidth:
+            start += size / self._bandwidth
+        self._busy_until = start
+        return start + self._latency
+
 
 class Connection:
     """
     Models an arbitrary network connection
+    Without a scheduler messages are delivered instantly, with a scheduler after the delay of their link
+    Every sender has its own uplink with the default latency and bandwidth - set_link() configures a single route
     """
-    _clients: List["Device"]
-    _listeners: List["Device"]
+    _clients: Set["Device"]
+    _listeners: Dict[str | None, List["Device"]]  # Topic -> listeners, None are listeners of all topics
+    _scheduler: Scheduler | None
+    _latency: float
+    _bandwidth: float | None
+    _uplinks: Dict["Device", Link]
+    _links: Dict[Tuple["Device", "Device"], Link]
+    _sent: int
+    _delivered: int
 
-    def __init__(self):
-        self._clients = []
-        self._listeners = []
+    def __init__(self, scheduler: Scheduler | None = None, latency: float = 0.0, bandwidth: float | None = None):
+        self._clients = set()
+        self._listeners = {}
+        self._scheduler = scheduler
+        self._latency = latency
+        self._bandwidth = bandwidth
+        self._uplinks = {}
+        self._links = {}
+        self._sent = 0
+        self._delivered = 0
 
-    def add_listener(self, listener: "Device"):
-        if listener in self._listeners:
+    def add_listener(self, listener: "Device", topic: str | None = None):
+        """Adds a device that receives a copy of every message of the topic (all messages if topic is None)"""
+        listeners = self._listeners.setdefault(topic, [])
+        if listener in listeners:
             raise ValueError("Device is already listening")
-        self._listeners.append(listener)
+        listeners.append(listener)
 
     def add_client(self, client: "Device"):
         if client in self._clients:
             raise ValueError("client is already connected")
-        self._clients.append(client)
+        self._clients.add(client)
+
+    def set_link(self, sender: "Device", target: "Device", latency: float, bandwidth: float | None = None):
+        """Sets the latency and bandwidth of the route from sender to target"""
+        self._links[(sender, target)] = Link(latency, bandwidth)
+
+    def get_scheduler(self) -> Scheduler | None:
+        return self._scheduler
+
+    def get_time(self) -> float:
+        """Returns the current time of the connection (virtual time of the scheduler, 0 without one)"""
+        return self._scheduler.get_time() if self._scheduler else 0.0
+
+    def get_sent(self) -> int:
+        return self._sent
+
+    def get_delivered(self) -> int:
+        return self._delivered
+
+    def _get_link(self, sender: "Device", target: "Device") -> Link:
+        link = self._links.get((sender, target)) if self._links else None
+        if link is None:
+            link = self._uplinks.get(sender)
+            if link is None:
+                link = self._uplinks[sender] = Link(self._latency, self._bandwidth)
+        return link
 
     def send_message(self, message: Message):
         if message.get_sender() not in self._clients:
             print("Message could not be sent - Target not connected")
+            return
+        self._sent += 1
+        scheduler = self._scheduler
+        if scheduler is None:
+            self._deliver(message)
+            return
+        link = self._get_link(message.get_sender(), message.get_target())
+        scheduler.schedule_at(link.transmit(scheduler.get_time(), message.get_size()), self._deliver, message)
 
+    def _deliver(self, message: Message):
         # Deliver the message to the target
-        message.get_target().get_received_messages().append(message)
+        message.get_target().receive_message(message)
+        self._delivered += 1
 
-        # all listeners get the message as well
-        for listener in self._listeners:
-            listener.get_received_messages().append(message)
+        # The listeners of the topic (and of all topics) get the message as well
+        listeners = self._listeners
+        if listeners:
+            topic = message.get_topic()
+            if topic is not None:
+                for listener in listeners.get(topic, ()):
+                    listener.receive_message(message)
+            for listener in listeners.get(None, ()):
+                listener.receive_message(message)
 
 
 class Device:
     """
     Models a network endpoint that can send and receive messages
+    The inbox holds at most inbox_size messages (unbounded if None), further messages are dropped
     """
-    _connection: Connection
+    _connection: Connection | None
     _name: str
-    _in_messages: List[Message]
+    _in_messages: Deque[Message]
     _out_messages: List[Message]
+    _inbox_size: int | None
+    _dropped: int
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, inbox_size: int | None = None):
         self._name = name
+        self._connection = None
         self._encryption_func = None
-        self._in_messages = []
+        self._in_messages = deque()
         self._out_messages = []
+        self._inbox_size = inbox_size
+        self._dropped = 0
 
     def connect(self, connection: Connection):
         self._connection = connection
         self._connection.add_client(self)
 
-    def send(self, target: "Device", content: str):
+    def send(self, target: "Device", content: str, topic: str | None = None):
         if self._connection is None:
             raise ValueError("Device is not connected - Use connect() to connect this device")
         if self._encryption_func:
             content = self._encryption_func(content)
-        message = Message(self, target, content)
+        message = Message(self, target, content, topic, self._connection.get_time())
         self._connection.send_message(message)
 
+    def receive_message(self, message: Message):
+        """Puts the message into the inbox or drops it if the inbox is full"""
+        inbox = self._in_messages
+        if self._inbox_size is not None and len(inbox) >= self._inbox_size:
+            self._dropped += 1
+            return
+        inbox.append(message)
+
+    def receive(self) -> Message | None:
+        """Removes and returns the oldest message of the inbox (None if it is empty)"""
+        return self._in_messages.popleft() if self._in_messages else None
+
     def get_received_messages(self) -> List[Message]:
-        return self._in_messages
+        return list(self._in_messages)
 
     def get_sent_messages(self) -> List[Message]:
         return self._out_messages
 
+    def get_dropped(self) -> int:
+        return self._dropped
+
     def get_name(self) -> str:
         return self._name
 
@@ -0,0 +1,229 @@
+#  SPDX-License-Identifier: GPL-3.0-only
+
+# Telemetry
+
+# Two opt-in tools to see what the library is doing:
+#       - Instrumentation: counts the calls and the time spent in every public function of hashing, toymath and crypto
+#         enable_instrumentation() replaces the functions in their modules with timing wrappers,
+#         disable_instrumentation() puts the originals back. While disabled nothing is wrapped - so there is no overhead
+#         Note: names imported before enabling (from toycrypt.toymath import gcd) still refer to the original function
+#         The time of a function includes the time of the instrumented functions it calls
+#       - Progress reporting: attacks publish snapshots (rate, ETA over the remaining keyspace, memory) at a fixed
+#         interval to a callback and/or a JSON-lines file (one JSON object per line, easy to follow with tail -f)
+
+import functools
+import importlib
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+_DEFAULT_MODULES = ("toycrypt.hashing", "toycrypt.toymath", "toycrypt.crypto")
+
+_counters: {str: [int, int]} = {}  # Qualified function name -> [calls, nanoseconds]
+_originals: {(object, str): object} = {}  # (module, attribute) -> original function
+
+
+def _wrap(name: str, function):
+    counter = _counters.setdefault(name, [0, 0])
+    clock = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            counter[0] += 1
+            counter[1] += clock() - start
+
+    return wrapper
+
+
+def enable_instrumentation(modules=_DEFAULT_MODULES):
+    """
+    Wraps all public functions defined in the given modules (names like "toycrypt.toymath") with call counters
+    Calling it again while enabled has no effect on the modules that are already instrumented
+    Names imported before (from toycrypt.hashing import hash_toycrypt) still refer to the original function and are
+    not counted - look them up through the module (hashing.hash_toycrypt) after enabling
+    """
+    for module_name in modules:
+        module = importlib.import_module(module_name)
+        for attribute, value in list(vars(module).items()):
+            if attribute.startswith("_") or (module, attribute) in _originals:
+                continue
+            if not callable(value) or isinstance(value, type) or getattr(value, "__module__", None) != module_name:
+                continue
+            _originals[(module, attribute)] = value
+            setattr(module, attribute, _wrap(f"{module_name.removeprefix('toycrypt.')}.{attribute}", value))
+
+
+def disable_instrumentation():
+    """Restores the original functions - the counters are kept until reset_counters()"""
+    for (module, attribute), function in _originals.items():
+        setattr(module, attribute, function)
+    _originals.clear()
+
+
+def is_instrumented() -> bool:
+    return bool(_originals)
+
+
+def reset_counters():
+    for counter in _counters.values():
+        counter[0] = counter[1] = 0
+
+
+def get_counters() -> {str: (int, float)}:
+    """Returns the number of calls and the total seconds of every function that was called"""
+    return {name: (calls, nanoseconds / 1e9) for name, (calls, nanoseconds) in _counters.items() if calls}
+
+
+def format_counters() -> str:
+    """Returns a table of the counters sorted by the time spent"""
+    lines = [f"{'function':<36} {'calls':>12} {'total s':>10} {'per call us':>12}"]
+    for name, (calls, seconds) in sorted(get_counters().items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:<36} {calls:>12,} {seconds:>10.4f} {seconds / calls * 1e6:>12.3f}")
+    return "\n".join(lines)
+
+
+@contextmanager
+def instrumented(modules=_DEFAULT_MODULES):
+    """Enables instrumentation with fresh counters inside a with block"""
+    reset_counters()
+    enable_instrumentation(modules)
+    try:
+        yield
+    finally:
+        disable_instrumentation()
+
+
+def get_memory_peak() -> int | None:
+    """Returns the peak memory (resident set size) of this process in bytes or None if it is unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports kilobytes
+
+
+class ProgressSnapshot:
+    """The state of a running attack at one point in time"""
+    _name: str
+    _attempts: int
+    _total: int | None  # Size of the keyspace (None if unknown)
+    _elapsed: float
+    _memory: int | None
+    _done: bool
+
+    def __init__(self, name: str, attempts: int, total: int | None, elapsed: float, memory: int | None,
+                 done: bool = False):
+        self._name = name
+        self._attempts = attempts
+        self._total = total
+        self._elapsed = elapsed
+        self._memory = memory
+        self._done = done
+
+    def __str__(self):
+        text = f"    [{self._name}] {self._attempts:,} tries"
+        if self._total:
+            text += f" of {self._total:,} ({self._attempts / self._total:.1%})"
+        text += f", {self.get_rate():,.0f}/s"
+        eta = self.get_eta()
+        if eta is not None and not self._done:
+            text += f", ETA {eta:.1f}s"
+        if self._memory is not None:
+            text += f", {self._memory / (1 << 20):.0f} MiB"
+        return text + (" - done" if self._done else "")
+
+    def get_attempts(self) -> int:
+        return self._attempts
+
+    def get_total(self) -> int | None:
+        return self._total
+
+    def get_elapsed(self) -> float:
+        return self._elapsed
+
+    def get_memory(self) -> int | None:
+        return self._memory
+
+    def is_done(self) -> bool:
+        return self._done
+
+    def get_rate(self) -> float:
+        return self._attempts / self._elapsed if self._elapsed > 0 else 0.0
+
+    def get_eta(self) -> float | None:
+        """Seconds until the whole keyspace is searched at the current rate"""
+        rate = self.get_rate()
+        if not self._total or rate == 0:
+            return None
+        return max(self._total - self._attempts, 0) / rate
+
+    def to_dict(self) -> dict:
+        return {"name": self._name, "time": time.time(), "attempts": self._attempts, "total": self._total,
+                "elapsed": self._elapsed, "rate": self.get_rate(), "eta": self.get_eta(), "memory": self._memory,
+                "done": self._done}
+
+
+class ProgressReporter:
+    """
+    Collects the progress of an attack and publishes a snapshot at most every interval seconds
+    Attacks call start() once, update() whenever they finished some work and finish() at the end
+    :param name: shown in every snapshot
+    :param callback: called with every ProgressSnapshot (e.g. print)
+    :param path: JSON-lines file every snapshot is appended to
+    :param interval: minimal time between two snapshots in seconds
+    """
+    _name: str
+    _callback: object
+    _path: str | None
+    _interval: float
+    _total: int | None
+    _start_time: float
+    _last_time: float
+    _snapshots: int
+
+    def __init__(self, name: str = "attack", callback=None, path: str | None = None, interval: float = 1.0):
+        self._name = name
+        self._callback = callback
+        self._path = path
+        self._interval = interval
+        self._total = None
+        self._start_time = self._last_time = time.perf_counter()
+        self._snapshots = 0
+
+    def get_snapshots(self) -> int:
+        return self._snapshots
+
+    def start(self, total: int | None = None):
+        """Starts the clock. total is the number of candidates in the keyspace"""
+        self._total = total
+        self._start_time = self._last_time = time.perf_counter()
+
+    def update(self, attempts: int):
+        """Reports the number of attempts so far - publishes a snapshot if the interval has passed"""
+        now = time.perf_counter()
+        if now - self._last_time >= self._interval:
+            self._last_time = now
+            self._publish(attempts, now, False)
+
+    def finish(self, attempts: int):
+        """Publishes the final snapshot"""
+        self._publish(attempts, time.perf_counter(), True)
+
+    def _publish(self, attempts: int, now: float, done: bool):
+        snapshot = ProgressSnapshot(self._name, attempts, self._total, now - self._start_time, get_memory_peak(),
+                                    done)
+        self._snapshots += 1
+        if self._callback is not None:
+            self._callback(snapshot)
+        if self._path is not None:
+            with open(self._path, "a") as file:
+                file.write(json.dumps(snapshot.to_dict()) + "\n")
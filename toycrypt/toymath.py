@@ -1,5 +1,11 @@
 #  SPDX-License-Identifier: GPL-3.0-only
+import io
 import math
+from functools import lru_cache
+
+import numpy as np
+
+from toycrypt import factorization
 
 
 def round_down(num: float) -> float:
@@ -13,22 +19,15 @@ def round_down(num: float) -> float:
 
 
 def is_divider(n: int, a: int) -> bool:
-    """Checks if a divides n. This means n is dividable by a. Uses naive approach"""
+    """Checks if a divides n. This means n is dividable by a"""
     n = abs(n)
     if n == 0:
         return True
     if a == 0:  # if a == 0 then 0 * b = n only holds for n == 0 as any b multiplied with 0 must be 0 (in real numbers)
         return n == 0
-    if a > n:
-        return False
-
-    # A number n is dividable if there is any factor b such that a * b = n
-    for i in range(n):
-        if i * a == n:  # Check positive multiplier
-            return True
-        elif -i * a == n:  # Check negative multiplier
-            return True
-    return False
+    # A number n is dividable if there is any factor b such that a * b = n - meaning there is no rest
+    q, r = modulo(n, a)
+    return r == 0
 
 
 # Division with rest
@@ -36,8 +35,8 @@ def modulo(a: int, n: int) -> [int, int]:
     """Returns q and r such that a = q * n + r or r = a mod n. Performs division with rest. n must be >0"""
     if n == 0:
         return [None, None]
-    q = round_down(float(a) / float(n))  # q = [a/n]
-    r = a - n * q
+    # Uses exact integer division - dividing as floats loses precision for numbers above 2^53
+    q, r = divmod(a, n)  # q = [a/n]
     return [q, r]
 
 
@@ -46,10 +45,55 @@ def gcd(a: int, b: int) -> int:
     """Returns the greatest common divisor (gcd) of a and b. It is the greatest number that divides both a and b"""
     if a == 0 and b == 0:  # Rule
         return 0
-    if b == 0:
-        return abs(a)  # gcd is always positive
-    q, r = modulo(a, b)
-    return gcd(b, r)
+    # Iterative version of gcd(a, b) = gcd(b, a mod b) - no recursion limit for big numbers
+    while b != 0:
+        q, r = modulo(a, b)
+        a, b = b, r
+    return abs(a)  # gcd is always positive
+
+
+def gcd_binary(a: int, b: int) -> int:
+    """Returns the gcd of a and b using only subtraction and shifts (Stein's algorithm)"""
+    a, b = abs(a), abs(b)
+    if a == 0 or b == 0:
+        return a | b
+    # Common factors of 2 are part of the gcd: gcd(2a, 2b) = 2 * gcd(a, b)
+    shift = ((a | b) & -(a | b)).bit_length() - 1
+    a >>= (a & -a).bit_length() - 1  # Remove all factors of 2 - now a is odd
+    while b != 0:
+        b >>= (b & -b).bit_length() - 1  # gcd(a, 2b) = gcd(a, b) if a is odd
+        if a > b:
+            a, b = b, a
+        b -= a  # gcd(a, b) = gcd(a, b - a) and b - a is even
+    return a << shift
+
+
+def gcd_lehmer(a: int, b: int, digit_bits: int = 62) -> int:
+    """
+    Returns the gcd of a and b using Lehmer's algorithm. Faster than gcd() for numbers with thousands of bits
+    Most Euclid steps only depend on the leading bits of a and b. So they are simulated on the leading digit_bits bits
+    with small numbers and then applied to the big numbers at once as a linear combination
+    """
+    a, b = abs(a), abs(b)
+    if a < b:
+        a, b = b, a
+    while b >> digit_bits != 0:
+        shift = a.bit_length() - digit_bits
+        x, y = a >> shift, b >> shift  # Leading digits of a and b
+        # Track a = A * a0 + B * b0 and b = C * a0 + D * b0 while the quotient is certain to be correct
+        A, B, C, D = 1, 0, 0, 1
+        while y + C != 0 and y + D != 0:
+            q = (x + A) // (y + C)
+            if q != (x + B) // (y + D):
+                break  # The quotient of the leading digits could differ from the real one
+            A, C = C, A - q * C
+            B, D = D, B - q * D
+            x, y = y, x - q * y
+        if B == 0:
+            a, b = b, a % b  # No step was certain - do a single full division
+        else:
+            a, b = A * a + B * b, C * a + D * b
+    return gcd(a, b)  # The remaining numbers are small
 
 
 # Euclidean Algorithm
@@ -72,14 +116,14 @@ def gcd_ex(a: int, b: int) -> [int, [int]]:
 
 def get_least_positive_residue(a: int, n: int) -> int:
     """Returns the least positive element in the same residue as the given a in modulo n"""
-    a = abs(a)  # Make it positive
-    q, r = modulo(a, n)  # Make it smaller than n
-    return n - r  # Returns the least positive element
+    # The floored division keeps the rest in {0, ..., n-1} for negative a as well
+    q, r = modulo(a, n)
+    return r
 
 
 def lcm(a: int, b: int) -> int:
     """Returns the least common multiple (lcm) of a and b."""
-    return int((a * b) / gcd(a, b))  # Because gcd(a,b) * lcm(a,b) = a * b holds
+    return abs(a * b) // gcd(a, b)  # Because gcd(a,b) * lcm(a,b) = a * b holds
 
 
 def linear_combination_solvable(a: int, b: int, n: int) -> bool:
@@ -103,9 +147,9 @@ class Matrix2x2:
         result: Matrix2x2 = Matrix2x2(0, 0, 0, 0)
 
         result.a11 = self.a11 * b.a11 + self.a12 * b.a21
-        result.a12 = self.a11 * b.a21 + self.a12 * b.a22
-        result.a21 = self.a21 * b.a11 + self.a22 * b.a12
-        result.a22 = self.a21 * b.a21 + self.a22 * b.a22
+        result.a12 = self.a11 * b.a12 + self.a12 * b.a22
+        result.a21 = self.a21 * b.a11 + self.a22 * b.a21
+        result.a22 = self.a21 * b.a12 + self.a22 * b.a22
 
         return result
 
@@ -125,6 +169,26 @@ class Matrix2x2:
 # Extended Euclidean Algorithm
 def eec(a: int, b: int) -> [int, int]:
     """Returns the coefficients x and y such that the linear combination gcd(a,b) = a*x + b*y holds"""
+    # Single pass: every remainder r is kept as a linear combination r = a*x + b*y
+    # Each step only needs the last two remainders and their coefficients - no list of quotients or matrices
+    old_r, r = a, b
+    old_x, x = 1, 0
+    old_y, y = 0, 1
+    while r != 0:
+        q = old_r // r
+        old_r, r = r, old_r - q * r
+        old_x, x = x, old_x - q * x
+        old_y, y = y, old_y - q * y
+    if old_r < 0:  # gcd is always positive
+        return -old_x, -old_y
+    return old_x, old_y
+
+
+def eec_matrix(a: int, b: int) -> [int, int]:
+    """
+    Returns the same coefficients as eec by multiplying the quotient matrices [[q, 1], [1, 0]] of all steps
+    Shows the idea behind the algorithm but allocates one matrix per step
+    """
     divisor, quotients = gcd_ex(a, b)
     result: Matrix2x2 = Matrix2x2.eec_Q(quotients[0])
     for i in range(1, len(quotients)):
@@ -149,48 +213,151 @@ def is_modulo_congruent(a: int, b: int, n: int) -> bool:
     return ar == br
 
 
-def table_to_str(table: [[int]], mode="add") -> str:
+# Cayley tables
+
+# The addition and multiplication tables of Z_n have n^2 cells - for n = 20000 that is 400 million numbers
+# As nested lists of Python ints (28+ bytes each plus 8 bytes per list slot) this does not fit in memory
+# So the tables are NumPy arrays with the smallest integer type that holds n - 1 (1 byte per cell for n <= 256)
+#       - The addition table needs no computation at all: row i is 0, ..., n-1 shifted left by i
+#         All rows are views into one array [0, ..., n-1, 0, ..., n-1]
+#       - The multiplication table is computed by broadcasting (outer product mod n) in blocks of rows
+# For even larger n a lazy CayleyTable computes single rows or cells only when they are accessed
+
+_TABLE_BLOCK = 1 << 22  # Number of cells computed at once for the multiplication table
+
+
+def _table_dtype(n: int) -> np.dtype:
+    """Returns the smallest unsigned integer type that can hold all residues 0, ..., n-1"""
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if n - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise ValueError("n is too large for a table")
+
+
+def _add_rows(n: int) -> np.ndarray:
+    # Row i of the addition table is the window [i, i + n) of the residues written twice
+    residues = np.arange(n, dtype=_table_dtype(n))
+    return np.lib.stride_tricks.sliding_window_view(np.concatenate([residues, residues]), n)[:n]
+
+
+def _mult_rows(n: int, start: int, stop: int) -> np.ndarray:
+    # i * j < n^2 must fit into 64 bits - Python ints are used for larger n
+    if n > 1 << 32:
+        return np.array([[i * j % n for j in range(n)] for i in range(start, stop)], dtype=_table_dtype(n))
+    residues = np.arange(n, dtype=np.uint64)
+    rows = np.arange(start, stop, dtype=np.uint64)[:, np.newaxis]
+    return (rows * residues % np.uint64(n)).astype(_table_dtype(n))
+
+
+class CayleyTable:
+    """
+    Lazy view of the addition or multiplication table of Z_n. Nothing is stored - rows and cells are computed on access
+    Supports table[i] (a row as array), table[i, j] and table[i][j] (a cell), len(table) and iterating over the rows
+    """
+    _n: int
+    _mode: str  # "add" or "mult"
+
+    def __init__(self, n: int, mode: str = "add"):
+        if mode not in ("add", "mult"):
+            raise ValueError("Invalid mode")
+        self._n = n
+        self._mode = mode
+
+    def get_n(self) -> int:
+        return self._n
+
+    def get_mode(self) -> str:
+        return self._mode
+
+    def row(self, i: int) -> np.ndarray:
+        """Returns row i of the table"""
+        if not 0 <= i < self._n:
+            raise IndexError("Row out of range")
+        if self._mode == "add":
+            residues = np.arange(self._n, dtype=_table_dtype(self._n))
+            return np.roll(residues, -i)
+        return _mult_rows(self._n, i, i + 1)[0]
+
+    def cell(self, i: int, j: int) -> int:
+        """Returns i + j mod n or i * j mod n"""
+        if not (0 <= i < self._n and 0 <= j < self._n):
+            raise IndexError("Cell out of range")
+        return (i + j) % self._n if self._mode == "add" else i * j % self._n
+
+    def to_array(self) -> np.ndarray:
+        """Materializes the whole table"""
+        return get_add_table(self._n) if self._mode == "add" else get_mult_table(self._n)
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            return self.cell(*index)
+        return self.row(index)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self.row(i)
+
+
+def write_table(table, file, mode="add"):
+    """
+    Writes the printable table to a file object (e.g. an open file or sys.stdout) row by row
+    Only one row is formatted at a time, so this also works for lazy tables that do not fit in memory
+    :param table: a table from get_add_table or get_mult_table (also lazy) or a nested list
+    :param file: any object with a write(str) method
+    :param mode: either add or mult
     """
-    Returns a printable string of the given table.
-    :param mode either add or mult"""
     if mode == "add":
-        ret = "|+|"
+        file.write("|+|")
     elif mode == "mult":
-        ret = "|*|"
+        file.write("|*|")
     else:
         raise ValueError("Invalid mode")
 
     n: int = len(table)
+    file.write(''.join(f"|{i}" for i in range(n)) + "|\n")
     for i in range(n):
-        ret += f"|{i}"
-    ret += "|\n"
+        row = table[i]
+        values = row.tolist() if isinstance(row, np.ndarray) else row
+        file.write(f"|{i}| " + ' '.join(map(str, values)) + "|\n")
 
-    for i in range(n):
-        ret += f"|{i}|"
-        for j in range(n):
-            ret += f" {table[i][j]}"
-        ret += "|\n"
-    return ret
+
+def table_to_str(table, mode="add") -> str:
+    """
+    Returns a printable string of the given table.
+    :param mode either add or mult"""
+    buffer = io.StringIO()
+    write_table(table, buffer, mode)
+    return buffer.getvalue()
 
 
-def get_add_table(n: int) -> [[int]]:
-    """Returns a numeric table of the addition table of the given n."""
-    ret: [[int]] = []
-    for i in range(n):
-        ret.append([])
-        for j in range(n):
-            ret[i].append(modulo(i + j, n)[1])
-    return ret
+def get_add_table(n: int, lazy: bool = False):
+    """
+    Returns the addition table of the given n: table[i][j] = i + j mod n
+    :param lazy: if true a CayleyTable is returned that computes rows only on access (for very large n)
+    :return: an n x n array with the smallest integer type that fits
+    """
+    if lazy:
+        return CayleyTable(n, "add")
+    return _add_rows(n).copy()
 
 
-def get_mult_table(n: int) -> [[int]]:
-    """Returns a numeric table of the addition table of the given n."""
-    ret: [[int]] = []
-    for i in range(n):
-        ret.append([])
-        for j in range(n):
-            ret[i].append(modulo(i * j, n)[1])
-    return ret
+def get_mult_table(n: int, lazy: bool = False):
+    """
+    Returns the multiplication table of the given n: table[i][j] = i * j mod n
+    :param lazy: if true a CayleyTable is returned that computes rows only on access (for very large n)
+    :return: an n x n array with the smallest integer type that fits
+    """
+    if lazy:
+        return CayleyTable(n, "mult")
+    table = np.empty((n, n), dtype=_table_dtype(n))
+    rows_per_block = max(1, _TABLE_BLOCK // max(n, 1))
+    for start in range(0, n, rows_per_block):
+        stop = min(start + rows_per_block, n)
+        table[start:stop] = _mult_rows(n, start, stop)
+    return table
 
 
 def has_mult_inverse(a: int, n: int) -> bool:
@@ -203,8 +370,34 @@ def has_mult_inverse(a: int, n: int) -> bool:
 def get_multi_inverse(a: int, n: int) -> int:
     if not has_mult_inverse(a, n):
         raise ValueError("a is not co-prime to n")
-    fa, fb = eec(n, a)
-    return get_least_positive_residue(fb, n)
+    x, y = eec(a, n)
+    return get_least_positive_residue(x, n)
+
+
+def get_multi_inverses(values: [int], n: int) -> [int]:
+    """
+    Returns the multiplicative inverse of every value modulo n using Montgomery's trick
+    Only the product of all values is inverted, then every single inverse is recovered with multiplications:
+    with prefix products P_i = a_1 * ... * a_i it holds that a_i^-1 = P_(i-1) * P_i^-1 and P_(i-1)^-1 = a_i * P_i^-1
+    So k values need one inversion and 3(k-1) multiplications instead of k inversions
+    """
+    values = [value % n for value in values]
+    if not values:
+        return []
+    prefix = [values[0]]
+    for value in values[1:]:
+        prefix.append(prefix[-1] * value % n)
+    if not has_mult_inverse(prefix[-1], n):
+        # Find the first value that has no inverse for the error message
+        bad = next(value for value in values if not has_mult_inverse(value, n))
+        raise ValueError(f"{bad} is not co-prime to n")
+    inverse = get_multi_inverse(prefix[-1], n)  # P_k^-1
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        inverses[i] = prefix[i - 1] * inverse % n
+        inverse = inverse * values[i] % n  # P_(i-1)^-1
+    inverses[0] = inverse
+    return inverses
 
 
 def pow_naive(x: int, y: int) -> int:
@@ -221,20 +414,26 @@ def pow_naive(x: int, y: int) -> int:
     return ret
 
 
-def pow_mult_sqr(x: int, y: int) -> int:
+def pow_mult_sqr(x: int, y: int, n: int | None = None) -> int:
+    """Returns x to the power of y. If n is given the result is reduced modulo n after every multiplication"""
     if y == 0:
-        return 1
+        return 1 if n is None else 1 % n
     if y < 0:
         raise ValueError("Only positive exponents")
     result: int = 1
-    base = x
+    base = x if n is None else x % n
     exp = y
     # This approach uses at most 2 * log2(y) multiplications
     # Thus has complexity O(log2(n))
+    # Without a modulus the numbers grow with every step - reducing keeps them smaller than n
     while exp > 0:
         if exp & 1:
             result *= base
+            if n is not None:
+                result %= n
         base *= base
+        if n is not None:
+            base %= n
         exp >>= 1
     return result
 
@@ -246,22 +445,62 @@ def get_residue_set(n: int) -> [int]:
 
 def get_reduced_residue_set(n: int) -> [int]:
     """Returns the reduced residue set of the given modulo n, such that all elements are co-prime to n."""
-    ret: [int] = []
-    for i in range(n):
-        if gcd(i, n) == 1:
-            ret.append(i)
-    return ret
+    if n < 1:
+        return []
+    # Sieve: a number is co-prime to n if it is not a multiple of any prime factor of n
+    coprime = bytearray([1]) * n
+    for p in factorization.prime_factors(n):
+        coprime[::p] = bytes(len(range(0, n, p)))
+    return [i for i in range(n) if coprime[i]]
 
 
+def iter_reduced_residue_set(n: int):
+    """Lazily yields the reduced residue set of n - useful when n is too large to hold the whole set in memory"""
+    primes = factorization.prime_factors(n) if n >= 1 else []
+    for i in range(max(n, 0)):
+        if all(i % p != 0 for p in primes):
+            yield i
+
+
+@lru_cache(maxsize=4096)
 def euler_phi(n: int) -> int:
-    """Applies the euler phi function to n."""
-    ret: int = 0
-    for i in range(n):
-        if gcd(i, n) == 1:
-            ret += 1
+    """Applies the euler phi function to n: the number of elements in {0, ..., n-1} co-prime to n"""
+    if n < 1:
+        return 0
+    # phi(n) = n * (1 - 1/p1) * ... * (1 - 1/pk) for the distinct prime factors p1, ..., pk of n
+    ret: int = n
+    for p in factorization.prime_factors(n):
+        ret -= ret // p
     return ret
 
 
+def euler_phi_range(lo: int, hi: int) -> np.ndarray:
+    """
+    Returns the euler phi function of every n with lo <= n < hi (phi of numbers < 1 is 0)
+    Uses a segmented sieve: each prime up to sqrt(hi) is only visited at its multiples
+    """
+    if hi <= lo:
+        return np.zeros(0, dtype=np.int64)
+    if lo < 1:  # Only the part from 1 on is sieved, the numbers below stay 0
+        result = np.zeros(hi - lo, dtype=np.int64)
+        result[1 - lo:] = euler_phi_range(1, hi)
+        return result
+    rest = np.arange(lo, hi, dtype=np.int64)  # The part of each n that is not factorized yet
+    phi = rest.copy()
+    for p in factorization.primes_up_to(math.isqrt(hi - 1)).tolist():
+        first = -lo % p  # Position of the first multiple of p in the range
+        multiples = phi[first::p]
+        multiples -= multiples // p
+        power = p
+        while power < hi:  # Divide out p completely from all of its multiples
+            rest[-lo % power::power] //= p
+            power *= p
+    # At most one prime factor larger than sqrt(n) remains
+    large = rest > 1
+    phi[large] -= phi[large] // rest[large]
+    return phi
+
+
 def little_fermat(a: int, p: int) -> bool:
     """Returns true if for a given a and p, a**(p1) congruent to 1 mod p holds. """
     if euler_phi(p) != p - 1 or gcd(a, p) != 1:
@@ -1,6 +1,10 @@
 #  SPDX-License-Identifier: GPL-3.0-only
 
 import time
+from functools import lru_cache
+
+import numpy as np
+
 from toycrypt import toymath
 
 
@@ -22,54 +26,146 @@ def xor(a: int, b: int) -> int:
 def measure(function, *args, **kwargs):
     """
     Measures the time it takes to complete the given method with the given arguments
+    This is a single run for demonstrations - use toycrypt.benchmark for reliable (repeated) measurements
     :param function: any function that is called
     :param args: function arguments in correct order
     :param kwargs: keyword arguments that can be in any order (e.g. input1="Hello")
     :return: result of the function call
     """
-    start_time = time.time()
+    start_time = time.perf_counter_ns()  # time.time() can jump and has a coarse resolution on some systems
     result = function(*args, **kwargs)
-    end_time = time.time()
-    print(f"Took {end_time - start_time}")
+    end_time = time.perf_counter_ns()
+    print(f"Took {(end_time - start_time) / 1e9}")
     return result
 
 
+# Base conversion
+
+# Converting digit by digit needs one multiplication or division of the whole (growing) number per digit
+# For numbers with many digits this is quadratic. Faster approaches:
+#       - Power-of-two bases (2, 4, 8, 16, 32): every digit is simply a group of bits (log2(b) bits per digit)
+#         So the number's bytes are sliced into digits directly - linear time
+#       - Other bases: divide and conquer. Split the digits in two halves: value = high * b^k + low
+#         Both halves are converted recursively. The powers b^k (k a power of two) are cached
+#         This uses few big multiplications and divisions instead of one per digit
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+_DIGIT_CODES = np.frombuffer(_DIGITS.encode("ascii"), dtype=np.uint8)
+_DIGIT_VALUES = np.full(256, 255, dtype=np.uint8)  # Maps an ASCII code to its digit value (255 = not a digit)
+_DIGIT_VALUES[_DIGIT_CODES] = np.arange(36)
+_DIGIT_VALUES[np.frombuffer(_DIGITS.upper().encode("ascii"), dtype=np.uint8)] = np.arange(36)
+_SMALL_DIGITS = 32  # Below this many digits the simple digit by digit conversion is faster
+
+
+def _bits_per_digit(b: int) -> int:
+    """Returns log2(b) if b is a power of two, otherwise 0"""
+    return b.bit_length() - 1 if b & (b - 1) == 0 else 0
+
+
+@lru_cache(maxsize=512)
+def _power(b: int, level: int) -> int:
+    """Returns b^(2^level) - each level is the square of the previous one"""
+    if level == 0:
+        return b
+    return _power(b, level - 1) * _power(b, level - 1)
+
+
+def _digit_values(b: int, sequence: str) -> np.ndarray:
+    try:
+        codes = np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)
+    except UnicodeEncodeError:
+        raise ValueError(f"Invalid digit for base {b}") from None
+    values = _DIGIT_VALUES[codes]
+    if (values >= b).any():
+        raise ValueError(f"Invalid digit for base {b}")
+    return values
+
+
+def _from_digits(b: int, values: [int]) -> int:
+    # Divide and conquer: value = high * b^k + low, k is the largest power of two smaller than the length
+    if len(values) <= _SMALL_DIGITS:
+        result = 0
+        for value in values:
+            result = result * b + value
+        return result
+    level = (len(values) - 1).bit_length() - 1
+    k = 1 << level
+    return _from_digits(b, values[:-k]) * _power(b, level) + _from_digits(b, values[-k:])
+
+
+def _to_digits(b: int, number: int, level: int, parts: [str]):
+    # Divide and conquer: number = high * b^(2^level) + low, low has exactly 2^level digits (with leading zeros)
+    if level < 0 or number < _power(b, 5):
+        digits = []
+        while number > 0:
+            q, r = toymath.modulo(number, b)
+            digits.append(_DIGITS[r])
+            number = q
+        digits = ''.join(reversed(digits))
+        parts.append(digits.rjust(1 << (level + 1), "0") if parts else digits)
+        return
+    high, low = divmod(number, _power(b, level))
+    if high == 0 and not parts:
+        _to_digits(b, low, level - 1, parts)
+        return
+    _to_digits(b, high, level - 1, parts)
+    _to_digits(b, low, level - 1, parts)
+
+
 def geometric_progression(b: int, sequence: str) -> int:
-    """Returns the numeric value of the sequence with the given base b. Only works for 1 <= g < 36"""
+    """Returns the numeric value of the sequence with the given base b. Works for 2 <= b <= 36"""
     if b == 0:
         return 1
-    k = len(sequence)
-    result: int = 0
-    for i, c in enumerate(sequence, 1):
-        a = int(c, b)
-        if a > b or a >= 26:
-            raise ValueError
-        result += a * pow(b, k - i)
-    return result
+    if not 2 <= b <= 36:
+        raise ValueError("Base must be between 2 and 36")
+    if len(sequence) <= _SMALL_DIGITS:
+        return _from_digits(b, [int(c, b) for c in sequence])
+    values = _digit_values(b, sequence)
+    bits = _bits_per_digit(b)
+    if bits:
+        # Expand every digit into its bits, then pack all bits into bytes
+        digit_bits = (values[:, np.newaxis] >> np.arange(bits - 1, -1, -1, dtype=np.uint8)) & 1
+        return _from_bits(digit_bits.ravel())
+    return _from_digits(b, values.tolist())
+
+
+def _from_bits(bits: np.ndarray) -> int:
+    # Pad at the front so the number of bits is a multiple of 8, then read the bytes as one big-endian number
+    padded = np.concatenate([np.zeros(-len(bits) % 8, dtype=np.uint8), bits.astype(np.uint8)])
+    return int.from_bytes(np.packbits(padded).tobytes(), "big")
 
 
 def geometric_progression_rev(b: int, number: int) -> str:
-    """Returns string representation of the number in the given base b. Only works for 1 <= g < 36"""
+    """Returns string representation of the number in the given base b. Works for 1 <= b <= 36"""
     if b == 0:
         raise ValueError
+    if number < 0:
+        raise ValueError("Only positive numbers")
 
     if number == 0:
         return "0"
 
-    result: str = ""
-
     if b == 1:
-        for i in range(number):
-            result += "1"
-        return result
-
-    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
-
-    while number > 0:
-        q, r = toymath.modulo(number, b)
-        result += digits[r]
-        number //= b
-    return ''.join(reversed(result))
+        return "1" * number
+    if b > 36:
+        raise ValueError("Base must be between 1 and 36")
+
+    bits = _bits_per_digit(b)
+    if bits and number >= _power(b, 5):
+        # Slice the bits of the number into groups of log2(b) bits - each group is one digit
+        digit_count = -(-number.bit_length() // bits)
+        raw = np.frombuffer(number.to_bytes((digit_count * bits + 7) // 8, "big"), dtype=np.uint8)
+        number_bits = np.unpackbits(raw)[-digit_count * bits:].reshape(digit_count, bits)
+        values = number_bits @ (1 << np.arange(bits - 1, -1, -1))
+        return _DIGIT_CODES[values].tobytes().decode("ascii")
+
+    # Find the largest level with b^(2^level) <= number, then split recursively
+    level = 0
+    while _power(b, level + 1) <= number:
+        level += 1
+    parts: [str] = []
+    _to_digits(b, number, level, parts)
+    return ''.join(parts)
 
 
 def binary2decimal(binary: str) -> int:
@@ -90,3 +186,48 @@ def decimal2hex(decimal: int) -> str:
     return "0x" + geometric_progression_rev(16, decimal)
 
 
+_NIBBLE_SHIFTS = np.arange(60, -4, -4, dtype=np.uint64)  # Shifts of the 16 hex digits of a 64-bit number
+
+
+def decimal2hex_many(numbers) -> [str]:
+    """
+    Returns the hex string ("0x...") of every number in an array of non-negative integers below 2^64
+    All numbers are converted at once: the 16 nibbles of each number are extracted with shifts and masks
+    and written into a character matrix with one row "0x<16 digits>," per number
+    The leading zeros are removed with a mask and the result is decoded and split in one step
+    """
+    numbers = np.asarray(numbers, dtype=np.uint64)
+    if numbers.size == 0:
+        return []
+    nibbles = ((numbers[:, np.newaxis] >> _NIBBLE_SHIFTS) & np.uint64(0xF)).astype(np.uint8)
+    rows = np.empty((len(numbers), 19), dtype=np.uint8)
+    rows[:, 0], rows[:, 1], rows[:, 18] = ord("0"), ord("x"), ord(",")
+    rows[:, 2:18] = _DIGIT_CODES[nibbles]
+    keep = np.ones(rows.shape, dtype=bool)
+    keep[:, 2:17] = ~np.logical_and.accumulate(nibbles[:, :15] == 0, axis=1)  # The last digit is always kept
+    return rows[keep].tobytes().decode("ascii")[:-1].split(",")
+
+
+def hex2decimal_many(hexas: [str]) -> np.ndarray:
+    """
+    Returns the numbers of a list of hex strings (with or without "0x", at most 16 digits each) as uint64 array
+    The strings are copied into a character matrix (padded with zero bytes) and all digits are decoded at once
+    The exponent of each digit is the number of digits that follow it in its row
+    """
+    if not hexas:
+        return np.zeros(0, dtype=np.uint64)
+    try:
+        rows = np.array(hexas, dtype="S19").view(np.uint8).reshape(len(hexas), 19)
+    except UnicodeEncodeError:
+        raise ValueError("Invalid hexa string") from None
+    is_digit = rows != 0
+    prefixed = (rows[:, 0] == ord("0")) & (rows[:, 1] == ord("x"))
+    is_digit[prefixed, :2] = False
+    values = _DIGIT_VALUES[rows]
+    lengths = is_digit.sum(axis=1)
+    if (values[is_digit] >= 16).any() or (lengths == 0).any() or (lengths > 16).any():
+        raise ValueError("Invalid hexa string")
+    following = lengths[:, np.newaxis] - np.cumsum(is_digit, axis=1)
+    shifts = np.where(is_digit, following * 4, 0).astype(np.uint64)
+    digits = np.where(is_digit, values, 0).astype(np.uint64)
+    return np.bitwise_or.reduce(digits << shifts, axis=1)